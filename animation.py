@@ -0,0 +1,286 @@
+"""
+Animated overlay playback for Display Control+
+GIF, APNG and animated WebP files are decoded frame by frame on a worker
+thread, and every frame is scaled to the monitor. When all frames fit the
+memory budget they are decoded once and stay in memory (as PhotoImages
+once shown); longer animations are streamed: the worker decodes the file
+again on every loop, a few frames ahead of playback, so neither memory
+nor disk use grows with the length of the animation.
+Playback follows each frame's own duration against fixed deadlines, so
+the timing does not drift; a late tick skips frames instead of slowing
+the animation down.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from framebuffer import frame_size
+from image_cache import scale_image
+
+ANIMATION_BUDGET_MB = 256  # default for the "animation_budget_mb" setting
+DEFAULT_DURATION = 0.1  # for frames without a usable duration, as browsers do
+FRAME_POLL = 0.01       # while the next frame is still being decoded
+STREAM_AHEAD = 3        # frames decoded ahead of playback when streaming
+
+
+def frame_duration(info):
+    """Seconds to show a frame; durations of 10 ms or less mean "unset"."""
+    ms = info.get("duration") or 0
+    return ms / 1000 if ms > 10 else DEFAULT_DURATION
+
+
+def budget_bytes(config):
+    """The config's "animation_budget_mb" in bytes (the default if unset or invalid)."""
+    try:
+        mb = float(config.get("animation_budget_mb", ANIMATION_BUDGET_MB))
+    except (TypeError, ValueError):
+        mb = ANIMATION_BUDGET_MB
+    return int(max(0.0, mb) * 1024 * 1024)
+
+
+class Animation:
+    """The frames of one animated image, scaled to ``width`` x ``height``.
+
+    ``start()`` decodes on a worker thread; ``count`` is None until the
+    file's frame count is known, and ``durations[i]`` is known for the
+    first ``decoded`` frames. Frame ``i`` is available once ``ready(i)``.
+    Frames stay in memory if ``count`` of them fit ``budget_bytes``;
+    otherwise at most STREAM_AHEAD frames are held, in playback order,
+    and ``release(i)`` lets the worker decode the next ones (``rewind()``
+    starts over from the first frame).
+    """
+
+    def __init__(self, path, width, height, fit="stretch",
+                 budget_bytes=ANIMATION_BUDGET_MB * 1024 * 1024):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fit = fit
+        self.budget_bytes = budget_bytes
+        self.count = None
+        self.in_memory = True
+        self.durations = []
+        self.decoded = 0
+        self.error = None
+        self._frames = {}
+        self._ahead = OrderedDict()  # streaming: decoded frames not yet played
+        self._next = 0
+        self._rewinds = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._decode, name="AnimationDecode", daemon=True)
+            self._thread.start()
+        return self
+
+    def ready(self, index):
+        if self.in_memory:
+            return index < self.decoded
+        return index in self._ahead
+
+    def wait_ready(self, index, timeout=None):
+        """Wait until frame ``index`` is decoded (or decoding ended); returns ready()."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.ready(index) or self._stopped or self.error is not None
+                                or (self.in_memory and self.count is not None and self.decoded == self.count),
+                                timeout)
+            return self.ready(index)
+
+    def frame(self, index):
+        """Frame ``index`` as an image of the target size; None if not decoded (or released)."""
+        with self._cond:
+            if self.in_memory:
+                return self._frames.get(index) if self.ready(index) else None
+            return self._ahead.get(index)
+
+    def release(self, index):
+        """Drop a frame once the player holds its own copy.
+
+        When streaming, frames queued before ``index`` (skipped by the
+        player) go too.
+        """
+        with self._cond:
+            if self.in_memory:
+                self._frames.pop(index, None)
+            elif index in self._ahead:
+                while self._ahead.popitem(last=False)[0] != index:
+                    pass
+                self._cond.notify_all()
+
+    def rewind(self):
+        """Streaming: decode from the first frame again (playback restarts)."""
+        with self._cond:
+            if not self.in_memory and next(iter(self._ahead), self._next) != 0:
+                self._ahead.clear()
+                self._next = 0
+                self._rewinds += 1
+                self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._stopped = True
+            self._frames.clear()
+            self._ahead.clear()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def _decode(self):
+        from PIL import Image
+        try:
+            with Image.open(self.path) as img:
+                count = getattr(img, "n_frames", 1)
+                in_memory = count * frame_size(self.width, self.height) <= self.budget_bytes
+                if not in_memory:
+                    logging.info(f"Streaming {count} frames of {self.path} from the file "
+                                 f"({self.width}x{self.height} exceeds the animation budget)")
+                with self._cond:
+                    self.count, self.in_memory = count, in_memory
+                    self._cond.notify_all()
+                while True:
+                    with self._cond:
+                        self._cond.wait_for(lambda: self._stopped or len(self._ahead) < STREAM_AHEAD)
+                        if self._stopped:
+                            return
+                        index, rewinds = self._next, self._rewinds
+                    img.seek(index)
+                    duration = frame_duration(img.info)
+                    frame = scale_image(img.convert("RGBA"), self.width, self.height, self.fit)
+                    with self._cond:
+                        if self._stopped:
+                            return
+                        if index == self.decoded:
+                            self.durations.append(duration)
+                            self.decoded = index + 1
+                        if in_memory:
+                            self._frames[index] = frame
+                        elif rewinds == self._rewinds:
+                            self._ahead[index] = frame
+                        else:
+                            continue  # rewound meanwhile: _next already points at the first frame
+                        self._next = (index + 1) % count
+                        self._cond.notify_all()
+                    if in_memory and self.decoded == count:
+                        return
+        except Exception as e:
+            logging.error(f"Could not decode animation {self.path}: {e}")
+            with self._cond:
+                self.error = e
+                self._cond.notify_all()
+
+
+class AnimationPlayer:
+    """Plays an Animation with a Tk-style ``root.after``.
+
+    ``show(photo)`` is called whenever the windows must display another
+    PhotoImage. In-memory animations get one PhotoImage per frame, built
+    the first time the frame is due; streamed ones reuse a single
+    PhotoImage and paste each frame into it. ``play()`` starts decoding
+    if it has not started yet and plays from the first frame; ``pause()``
+    stops the ticks, and in-memory frames stay decoded.
+    """
+
+    def __init__(self, root, animation, show, make_photo=None, clock=time.monotonic):
+        self.root = root
+        self.animation = animation
+        self._show = show
+        self._make_photo = make_photo or _photo_image
+        self._clock = clock
+        self._photos = {}
+        self._stream_photo = None
+        self._after = None
+        self._index = -1
+        self._due = 0.0
+        self.shown = 0
+        self.dropped = 0
+
+    @property
+    def playing(self):
+        return self._after is not None
+
+    def play(self):
+        self.pause()
+        self.animation.start()
+        if self._index >= 0:
+            self.animation.rewind()
+        self._index = -1
+        self._due = self._clock()
+        self._tick()
+
+    def pause(self):
+        if self._after is not None:
+            self.root.after_cancel(self._after)
+            self._after = None
+
+    def close(self):
+        self.pause()
+        self._photos.clear()
+        self._stream_photo = None
+        self.animation.close()
+
+    def _schedule(self, delay):
+        self._after = self.root.after(max(0, int(delay * 1000)), self._tick)
+
+    def _tick(self):
+        self._after = None
+        animation = self.animation
+        now = self._clock()
+        count = animation.count
+        if animation.error is not None and not animation.decoded:
+            return  # nothing to play; the first frame stays on screen
+        nxt = (self._index + 1) % count if count else 0
+        if not animation.ready(nxt):
+            if animation.error is not None and self._index >= 0:
+                if not animation.in_memory:
+                    return  # streaming stopped: the last frame stays on screen
+                nxt = 0  # decoding failed part way: loop over the frames we have
+            else:
+                # Decoding is behind playback: hold this frame and restart the clock
+                self._due = now
+                self._schedule(FRAME_POLL)
+                return
+        # Skip frames whose whole display time has already passed
+        while self._index >= 0:
+            after = (nxt + 1) % count
+            if self._due + animation.durations[nxt] > now or not animation.ready(after):
+                break
+            self._due += animation.durations[nxt]
+            nxt = after
+            self.dropped += 1
+        self._present(nxt)
+        self._index = nxt
+        if count == 1:
+            return  # a still image: nothing more to do
+        self._due += animation.durations[nxt]
+        if self._due < now:
+            self._due = now
+        self._schedule(self._due - now)
+
+    def _present(self, index):
+        animation = self.animation
+        if animation.in_memory:
+            photo = self._photos.get(index)
+            if photo is None:
+                photo = self._photos[index] = self._make_photo(animation.frame(index))
+                animation.release(index)
+            self._show(photo)
+        else:
+            frame = animation.frame(index)
+            if self._stream_photo is None:
+                self._stream_photo = self._make_photo(frame)
+                self._show(self._stream_photo)
+            else:
+                self._stream_photo.paste(frame)
+                if self._index < 0:
+                    self._show(self._stream_photo)
+            animation.release(index)
+        self.shown += 1
+
+
+def _photo_image(img):
+    from PIL import ImageTk
+    return ImageTk.PhotoImage(img)
@@ -0,0 +1,132 @@
+"""
+Benchmark: animated overlay frame rate, timing drift and CPU per monitor
+"naive" seeks, decodes and scales each frame on the UI thread when it is
+due and schedules the next one a frame duration later; "memory" and
+"stream" play through animation.AnimationPlayer. "memory" decodes every
+frame once up front and keeps it; "stream" decodes the file again on
+every loop, a few frames ahead on the worker thread. CPU is process time
+over wall time while playing, which for "stream" includes the decoding.
+Uses Tk when a display is available, otherwise a minimal after() loop.
+
+    python benchmarks/bench_animation.py [seconds] [frames] [width]x[height]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from animation import STREAM_AHEAD, Animation, AnimationPlayer
+from bench_slideshow import make_loop
+from image_cache import scale_image
+
+FRAME_MS = 30
+
+
+class BlockPhoto:
+    """Without a display: the pixel copy a PhotoImage would make."""
+
+    def __init__(self, img):
+        self.paste(img)
+
+    def paste(self, img):
+        from PIL import Image
+        self.block = Image.core.new_block("RGB", img.size)
+        img.im.convert2(self.block, img.im)
+
+
+def photo_maker(tk_root):
+    if tk_root:
+        from PIL import ImageTk
+        return ImageTk.PhotoImage
+    return BlockPhoto
+
+
+def run_naive(path, seconds, size):
+    from PIL import Image
+    loop, tk_root = make_loop()
+    make_photo = photo_maker(tk_root)
+    img = Image.open(path)
+    count = img.n_frames
+    state = {"index": 0, "shown": 0, "photo": None}
+
+    def tick():
+        img.seek(state["index"])
+        state["photo"] = make_photo(scale_image(img.convert("RGBA"), *size))
+        state["shown"] += 1
+        state["index"] = (state["index"] + 1) % count
+        if time.monotonic() - start >= seconds:
+            loop.quit()
+        else:
+            loop.after(FRAME_MS, tick)
+
+    start, cpu = time.monotonic(), time.process_time()
+    loop.after(0, tick)
+    loop.mainloop()
+    wall, cpu = time.monotonic() - start, time.process_time() - cpu
+    if tk_root:
+        loop.destroy()
+    return state["shown"], 0, wall, cpu, tk_root
+
+
+def run_engine(path, seconds, size, budget):
+    loop, tk_root = make_loop()
+    animation = Animation(path, *size, budget_bytes=budget).start()
+    if budget:
+        animation.wait_ready(10 ** 6, timeout=600)
+        assert animation.decoded == animation.count, "decoding did not finish"
+    else:
+        assert animation.wait_ready(STREAM_AHEAD - 1, timeout=600), "decoding did not start"
+    player = AnimationPlayer(loop, animation, lambda photo: None, make_photo=photo_maker(tk_root))
+    start, cpu = time.monotonic(), time.process_time()
+    player.play()
+    loop.after(int(seconds * 1000), loop.quit)
+    loop.mainloop()
+    wall, cpu = time.monotonic() - start, time.process_time() - cpu
+    in_memory = animation.in_memory
+    player.close()
+    if tk_root:
+        loop.destroy()
+    assert in_memory == (budget > 0)
+    return player.shown, player.dropped, wall, cpu, tk_root
+
+
+def make_animation(directory, frames):
+    """A 480x270 GIF of moving noise, FRAME_MS per frame."""
+    from PIL import Image
+    path = os.path.join(directory, "anim.gif")
+    base = Image.effect_noise((960, 270), 60).convert("P")
+    images = [base.crop((i * 480 // frames, 0, i * 480 // frames + 480, 270)) for i in range(frames)]
+    images[0].save(path, save_all=True, append_images=images[1:], duration=FRAME_MS, loop=0)
+    return path
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    size = tuple(int(v) for v in sys.argv[3].split("x")) if len(sys.argv) > 3 else (3840, 2160)
+    tmp = tempfile.mkdtemp(prefix="dcplus-bench-")
+    try:
+        path = make_animation(tmp, frames)
+        nominal = 1000 / FRAME_MS
+        print(f"{frames}-frame 480x270 GIF at {nominal:.1f} fps scaled to {size[0]}x{size[1]}, {seconds:g}s each")
+        print(f"{'path':>7} {'fps':>6} {'dropped':>8} {'drift':>9} {'CPU/monitor':>12}")
+        for kind in ("naive", "memory", "stream"):
+            if kind == "naive":
+                shown, dropped, wall, cpu, tk_root = run_naive(path, seconds, size)
+            else:
+                budget = 1 << 40 if kind == "memory" else 0
+                shown, dropped, wall, cpu, tk_root = run_engine(path, seconds, size, budget)
+            # How far the animation fell behind its own timeline (to within a frame)
+            drift = wall - (shown + dropped) * FRAME_MS / 1000
+            print(f"{kind:>7} {shown / wall:>6.1f} {dropped:>8} {drift * 1000:>6.0f} ms {cpu / wall * 100:>10.0f} %")
+        if not tk_root:
+            print("No display: frames stop at the Tk-ready pixel copy")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
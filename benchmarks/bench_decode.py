@@ -0,0 +1,108 @@
+"""
+Benchmark: full decode vs. draft-mode and reduce-first decoding of camera originals
+"full" opens the source at full resolution and resamples it (the previous
+behaviour); "reduced" uses image_cache.decode_image, which decodes JPEGs
+at a reduced DCT scale and reduce()s before the final resample. Each run
+is a fresh process, so the peak RSS is that of one decode.
+
+    python benchmarks/bench_decode.py [runs]
+"""
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SOURCES = [("24 MP", (6000, 4000)), ("50 MP", (8660, 5773)), ("100 MP", (12240, 8160))]
+TARGETS = [("64 px thumb", 64, 64), ("1080p", 1920, 1080), ("4K", 3840, 2160)]
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB, or None if unavailable."""
+    try:
+        # VmHWM starts afresh at exec, unlike ru_maxrss on Linux
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) // 1024
+    except ImportError:
+        return None
+
+
+def decode_once(conn, path, kind, width, height):
+    import warnings
+    from PIL import Image
+    from image_cache import decode_image, load_thumbnail, open_image, scale_image, _lanczos
+    warnings.simplefilter("ignore", Image.DecompressionBombWarning)  # 100 MP is a real camera
+    thumb = width == height == 64
+    start = time.perf_counter()
+    if kind == "full" and thumb:
+        # As update_thumbnails did: Pillow's thumbnail() drafts JPEGs by itself
+        img = Image.open(path)
+        img.thumbnail((width, height), _lanczos())
+    elif kind == "full":
+        img = scale_image(open_image(path), width, height)
+    elif thumb:
+        img = load_thumbnail(path, width)
+    else:
+        img = scale_image(decode_image(path, width, height), width, height)
+    conn.send((time.perf_counter() - start, peak_rss_kb()))
+
+
+def measure(path, kind, width, height):
+    # Spawned, not forked, so no pages of this process count towards its RSS
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe()
+    p = ctx.Process(target=decode_once, args=(child, path, kind, width, height))
+    p.start()
+    if not parent.poll(300):
+        p.terminate()
+        raise RuntimeError(f"{kind} run did not finish")
+    result = parent.recv()
+    p.join(10)
+    return result
+
+
+def make_source(directory, label, size):
+    """A camera-like JPEG: smooth gradients with some noise."""
+    from PIL import Image
+    path = os.path.join(directory, f"{label.replace(' ', '')}.jpg")
+    base = Image.linear_gradient("L").resize(size)
+    noise = Image.effect_noise(size, 24)
+    Image.merge("RGB", (base, noise, base.transpose(Image.Transpose.FLIP_LEFT_RIGHT))).save(path, quality=92)
+    return path
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    tmp = tempfile.mkdtemp(prefix="dcplus-bench-")
+    try:
+        print(f"{runs} runs each; p50 time and max peak RSS per fresh process")
+        print(f"{'source':>7} {'target':>12} {'full ms':>9} {'reduced ms':>11} {'full MiB':>9} {'reduced MiB':>12}")
+        for label, size in SOURCES:
+            path = make_source(tmp, label, size)
+            for target, width, height in TARGETS:
+                row = {}
+                for kind in ("full", "reduced"):
+                    results = [measure(path, kind, width, height) for _ in range(runs)]
+                    times = sorted(r[0] for r in results)
+                    peaks = [r[1] for r in results if r[1]]
+                    row[kind] = (times[len(times) // 2] * 1000, max(peaks) / 1024 if peaks else float("nan"))
+                print(f"{label:>7} {target:>12} {row['full'][0]:>9.0f} {row['reduced'][0]:>11.0f} "
+                      f"{row['full'][1]:>9.0f} {row['reduced'][1]:>12.0f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
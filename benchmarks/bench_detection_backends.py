@@ -0,0 +1,108 @@
+"""
+Benchmark: hook-based vs. hook-free (GetLastInputInfo only) idle detection
+Replays an active phase (synthetic input at 1000 Hz) followed by an idle
+phase past the timeout, and reports for each backend:
+  - CPU spent by detection per second of activity
+  - wakeups while active and while idle
+  - time added to every input event (the hook callback cost)
+  - how late the idle deadline fired
+
+The OS last-input tick is simulated so the benchmark runs on any platform.
+
+    python benchmarks/bench_detection_backends.py [active_seconds] [timeout_seconds]
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from idle_engine import IdleDeadlineEngine
+from input_buffer import CoalescingInputBuffer
+
+EVENT_RATE = 1000
+
+
+class SimulatedTick:
+    """Stands in for the OS last-input tick that the kernel updates for free."""
+
+    def __init__(self):
+        self.last = time.monotonic()
+
+    def source(self, key):
+        return self.last
+
+
+def run(backend, active_seconds, timeout):
+    tick = SimulatedTick()
+    fired = threading.Event()
+    fired_at = []
+    if backend == "hooks":
+        engine = IdleDeadlineEngine(last_input_source=tick.source, resume_poll=0.5)
+        buffer = CoalescingInputBuffer(lambda events: engine.touch("system", events[-1][0]))
+        buffer.start()
+        hook = buffer.push
+    else:
+        engine = IdleDeadlineEngine(last_input_source=tick.source, resume_poll=0.25)
+        buffer = None
+        hook = None
+    if backend == "none":
+        # Generator only: no timer armed, the engine thread is never started
+        engine.stop()
+        engine.wakeups = 0
+    else:
+        engine.add_timer("system", timeout, lambda timer, idle: (fired_at.append(time.monotonic()), fired.set()))
+        engine.start()
+
+    period = 1.0 / EVENT_RATE
+    costs = 0
+    events = int(active_seconds * EVENT_RATE)
+    cpu0 = time.process_time()
+    start = time.perf_counter()
+    for i in range(events):
+        due = start + i * period
+        remaining = due - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        tick.last = time.monotonic()
+        if hook is not None:
+            t0 = time.perf_counter_ns()
+            hook(i, 0)
+            costs += time.perf_counter_ns() - t0
+    active_cpu = time.process_time() - cpu0
+    active_wakeups = engine.wakeups + (buffer.batches if buffer else 0)
+
+    last_input = tick.last
+    idle_wakeups0 = active_wakeups
+    if backend != "none":
+        fired.wait(timeout + 2)
+    idle_wakeups = engine.wakeups + (buffer.batches if buffer else 0) - idle_wakeups0
+    engine.stop()
+    if buffer:
+        buffer.stop()
+    late_ms = (fired_at[0] - (last_input + timeout)) * 1000 if fired_at else float("nan")
+    return {
+        "cpu_ms_per_s": active_cpu * 1000 / active_seconds,
+        "active_wakeups": active_wakeups,
+        "idle_wakeups": idle_wakeups,
+        "hook_ns": costs / events if hook else 0.0,
+        "late_ms": late_ms,
+    }
+
+
+def main():
+    active_seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    timeout = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    # The generator's own cost is common to both runs; measure it once
+    base = run("none", active_seconds, timeout)["cpu_ms_per_s"]
+    print(f"{EVENT_RATE} Hz input for {active_seconds:.0f} s, then idle past a {timeout:.1f} s timeout")
+    print(f"{'backend':>10} {'CPU ms/s':>9} {'wakeups active':>15} {'wakeups idle':>13} {'added/event ns':>15} {'late ms':>8}")
+    for backend in ("hooks", "lastinput"):
+        r = run(backend, active_seconds, timeout)
+        cpu = max(0.0, r["cpu_ms_per_s"] - base)
+        print(f"{backend:>10} {cpu:>9.2f} {r['active_wakeups']:>15} {r['idle_wakeups']:>13} {r['hook_ns']:>15.0f} {r['late_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
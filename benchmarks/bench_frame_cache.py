@@ -0,0 +1,137 @@
+"""
+Benchmark: time to first paint and peak memory of an image overlay, per cache format
+"decode" opens the source and resizes it to the monitor (the path without a
+cache), "png" loads a pre-scaled PNG (compress_level=1) and "raw" maps a
+framebuffer file (see framebuffer). Each run is a fresh process, so peak
+RSS is that of one activation (for "raw" it includes the mapped file pages,
+which are shared with the page cache). With a display the time runs to the first
+Tk paint of a window showing the image; without one it stops after the copy
+into a Tk-ready pixel block that ImageTk would make.
+
+    python benchmarks/bench_frame_cache.py [runs] [source_width]x[source_height]
+"""
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RESOLUTIONS = [("1080p", 1920, 1080), ("1440p", 2560, 1440), ("4K", 3840, 2160), ("5K", 5120, 2880)]
+PATHS = ("decode", "png", "raw")
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB, or None if unavailable."""
+    try:
+        # VmHWM starts afresh at exec, unlike ru_maxrss on Linux
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) // 1024
+    except ImportError:
+        return None
+
+
+def first_paint(conn, path, kind, width, height):
+    """One activation in a fresh process; sends (seconds, peak KiB, painted)."""
+    from PIL import Image, ImageTk
+    from framebuffer import map_frame
+    from image_cache import open_image, scale_image
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception:
+        root = None
+    start = time.perf_counter()
+    if kind == "decode":
+        img = scale_image(open_image(path), width, height)
+    elif kind == "png":
+        with Image.open(path) as source:
+            source.load()
+            img = source
+    else:
+        img = map_frame(path)
+    if root is not None:
+        window = tk.Toplevel(root)
+        window.overrideredirect(True)
+        window.geometry(f"{width}x{height}+0+0")
+        photo = ImageTk.PhotoImage(img)
+        tk.Label(window, image=photo, bd=0).pack()
+        window.update()
+    else:
+        # The copy ImageTk.PhotoImage.paste makes before handing pixels to Tk
+        block = Image.core.new_block("RGB", img.size)
+        img.im.convert2(block, img.im)
+    elapsed = time.perf_counter() - start
+    conn.send((elapsed, peak_rss_kb(), root is not None))
+    if root is not None:
+        root.destroy()
+
+
+def measure(path, kind, width, height):
+    # Spawned, not forked, so no pages of this process count towards its RSS
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe()
+    p = ctx.Process(target=first_paint, args=(child, path, kind, width, height))
+    p.start()
+    if not parent.poll(120):
+        p.terminate()
+        raise RuntimeError(f"{kind} run did not finish")
+    result = parent.recv()
+    p.join(10)
+    return result
+
+
+def make_source(directory, size):
+    """A camera-sized JPEG with enough detail to make decoding realistic."""
+    from PIL import Image
+    path = os.path.join(directory, "source.jpg")
+    noise = [Image.effect_noise(size, 40 + 20 * i) for i in range(3)]
+    Image.merge("RGB", noise).save(path, quality=90)
+    return path
+
+
+def main():
+    from framebuffer import write_frame
+    from image_cache import open_image, scale_image
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    source_size = tuple(int(v) for v in sys.argv[2].split("x")) if len(sys.argv) > 2 else (6000, 4000)
+    tmp = tempfile.mkdtemp(prefix="dcplus-bench-")
+    try:
+        source = make_source(tmp, source_size)
+        print(f"{runs} activations per path, {source_size[0]}x{source_size[1]} JPEG source")
+        print(f"{'display':>8} {'path':>7} {'p50 ms':>9} {'max ms':>9} {'peak RSS MiB':>13}")
+        painted = False
+        for label, width, height in RESOLUTIONS:
+            scaled = scale_image(open_image(source), width, height)
+            files = {"decode": source, "png": os.path.join(tmp, f"{label}.png"),
+                     "raw": os.path.join(tmp, f"{label}.dcfb")}
+            scaled.save(files["png"], "PNG", compress_level=1)
+            write_frame(files["raw"], scaled)
+            for kind in PATHS:
+                results = [measure(files[kind], kind, width, height) for _ in range(runs)]
+                times = sorted(r[0] for r in results)
+                peaks = [r[1] for r in results if r[1]]
+                painted = results[0][2]
+                peak = f"{max(peaks) / 1024:.1f}" if peaks else "n/a"
+                print(f"{label:>8} {kind:>7} {times[len(times) // 2] * 1000:>9.1f} "
+                      f"{times[-1] * 1000:>9.1f} {peak:>13}")
+        if not painted:
+            print("No display: times stop at the Tk-ready pixel copy, before the paint")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: hook callback cost and CPU use, locked scan vs. coalescing ring buffer
+Feeds synthetic mouse events at 125/500/1000/8000 Hz for each path.
+
+    python benchmarks/bench_input_buffer.py [seconds_per_rate]
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from idle_engine import IdleDeadlineEngine
+from input_buffer import CoalescingInputBuffer
+
+RATES = (125, 500, 1000, 8000)
+MONITORS = [{'geometry': (i * 1920, 0, (i + 1) * 1920, 1080)} for i in range(4)]
+
+
+class LockedPath:
+    """The previous _mark_input: lock + geometry scan inside the hook."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.engine = IdleDeadlineEngine()
+        self.monitors = [dict(m) for m in MONITORS]
+
+    def callback(self, x, y):
+        now = time.monotonic()
+        with self.lock:
+            keys = ["system"]
+            for m in self.monitors:
+                left, top, right, bottom = m['geometry']
+                if left <= x < right and top <= y < bottom:
+                    m['last_input_time'] = now
+                    keys.append(str(tuple(m['geometry'])))
+                    break
+        self.engine.touch_many(keys, now)
+
+    def close(self):
+        return 0.0
+
+
+class BufferedPath:
+    """Hook pushes into the ring; the scan runs per batch on the consumer."""
+
+    def __init__(self):
+        self.engine = IdleDeadlineEngine()
+        self.monitors = [dict(m) for m in MONITORS]
+        self.consumer_cpu = 0.0
+        self.buffer = CoalescingInputBuffer(self.apply)
+        self.buffer.start()
+
+    def apply(self, events):
+        t0 = time.thread_time()
+        touched = {}
+        for when, x, y in events:
+            touched["system"] = when
+            for m in self.monitors:
+                left, top, right, bottom = m['geometry']
+                if left <= x < right and top <= y < bottom:
+                    touched[str(tuple(m['geometry']))] = when
+                    break
+        for key, when in touched.items():
+            self.engine.touch(key, when)
+        self.consumer_cpu += time.thread_time() - t0
+
+    def callback(self, x, y):
+        self.buffer.push(x, y)
+
+    def close(self):
+        self.buffer.stop()
+        self.buffer.flush()
+        return self.consumer_cpu
+
+
+def run(path, rate, seconds):
+    period = 1.0 / rate
+    total = int(rate * seconds)
+    costs = []
+    start = time.perf_counter()
+    for i in range(total):
+        due = start + i * period
+        while True:
+            remaining = due - time.perf_counter()
+            if remaining <= 0:
+                break
+            if remaining > 0.002:
+                time.sleep(remaining - 0.001)
+        x = (i * 7) % (1920 * len(MONITORS))
+        t0 = time.perf_counter_ns()
+        path.callback(x, 500)
+        costs.append(time.perf_counter_ns() - t0)
+    elapsed = time.perf_counter() - start
+    consumer_cpu = path.close()
+    costs.sort()
+    hook_cpu = sum(costs) / 1e9
+    return {
+        "mean_ns": sum(costs) / len(costs),
+        "p99_ns": costs[int(len(costs) * 0.99) - 1],
+        "cpu_pct": 100.0 * (hook_cpu + consumer_cpu) / elapsed,
+        "batches": getattr(getattr(path, "buffer", None), "batches", len(costs)),
+    }
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    print(f"{'rate':>6} {'path':>9} {'mean ns':>9} {'p99 ns':>9} {'CPU %':>7} {'applies':>8}")
+    for rate in RATES:
+        for name, cls in (("locked", LockedPath), ("buffered", BufferedPath)):
+            r = run(cls(), rate, seconds)
+            print(f"{rate:>6} {name:>9} {r['mean_ns']:>9.0f} {r['p99_ns']:>9.0f} {r['cpu_pct']:>7.3f} {r['batches']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Microbenchmark: point-to-monitor lookup, linear scan vs. MonitorIndex
+Simulates grids of 1, 4, 16 and 64 monitors.
+
+    python benchmarks/bench_monitor_index.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor_index import MonitorIndex
+
+COUNTS = (1, 4, 16, 64)
+LOOKUPS = 200_000
+
+
+def make_wall(count):
+    cols = 1
+    while cols * cols < count:
+        cols += 1
+    monitors = []
+    for i in range(count):
+        row, col = divmod(i, cols)
+        monitors.append({'geometry': (col * 1920, row * 1080, (col + 1) * 1920, (row + 1) * 1080)})
+    return monitors
+
+
+def linear_lookup(monitors, x, y):
+    # The previous _mark_input scan, including the string key it built
+    for m in monitors:
+        left, top, right, bottom = m['geometry']
+        if left <= x < right and top <= y < bottom:
+            return str(tuple(m['geometry']))
+    return None
+
+
+def main():
+    print(f"{'monitors':>8} {'linear ns':>10} {'index ns':>9} {'build ms':>9}")
+    for count in COUNTS:
+        monitors = make_wall(count)
+        right = max(m['geometry'][2] for m in monitors)
+        bottom = max(m['geometry'][3] for m in monitors)
+        rng = random.Random(count)
+        points = [(rng.randrange(right), rng.randrange(bottom)) for _ in range(LOOKUPS)]
+
+        t0 = time.perf_counter()
+        for x, y in points:
+            linear_lookup(monitors, x, y)
+        linear_ns = (time.perf_counter() - t0) * 1e9 / LOOKUPS
+
+        t0 = time.perf_counter()
+        index = MonitorIndex(monitors)
+        build_ms = (time.perf_counter() - t0) * 1e3
+        keys = index.keys
+        slot_at = index.slot_at
+        t0 = time.perf_counter()
+        for x, y in points:
+            slot = slot_at(x, y)
+            if slot >= 0:
+                keys[slot]
+        index_ns = (time.perf_counter() - t0) * 1e9 / LOOKUPS
+
+        print(f"{count:>8} {linear_ns:>10.0f} {index_ns:>9.0f} {build_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: overlay activation latency and memory, spawn-per-cycle vs. persistent host
+Spawn-per-cycle starts a process per monitor that imports tkinter/PIL and builds
+the black window (the previous overlay_bg behaviour); the host path sends
+"show"/"hide" to prewarmed Toplevels in one process. Runs for 1..N monitors so
+the per-monitor memory cost of each path is visible. Needs a display.
+
+    python benchmarks/bench_overlay_host.py [cycles] [max_monitors]
+"""
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from overlay_host import OverlayHost
+
+
+def spawned_overlay(conn, geometry):
+    """The old activation path, acknowledging once the window is mapped."""
+    import tkinter as tk
+    from PIL import Image, ImageTk  # noqa: F401  (imported by every old overlay process)
+    left, top, right, bottom = geometry
+    root = tk.Tk()
+    root.overrideredirect(True)
+    root.geometry(f"{right - left}x{bottom - top}+{left}+{top}")
+    root.configure(bg='black')
+    root.attributes('-topmost', True)
+    root.update()
+    conn.send(("shown", os.getpid()))
+    root.after(200, root.destroy)
+    root.mainloop()
+
+
+def rss_kb(pid):
+    """Resident set size of a process in KiB, or None if unavailable."""
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss // 1024
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def bench_spawn(geometries, cycles):
+    latencies, memory = [], []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        procs = []
+        for geometry in geometries:
+            parent, child = multiprocessing.Pipe()
+            p = multiprocessing.Process(target=spawned_overlay, args=(child, geometry))
+            p.start()
+            procs.append((p, parent))
+        for p, parent in procs:
+            parent.poll(30)
+            parent.recv()
+        latencies.append(time.perf_counter() - start)
+        memory.append(sum(rss_kb(p.pid) or 0 for p, _ in procs))
+        for p, _ in procs:
+            p.join(5)
+            if p.is_alive():
+                p.terminate()
+    return latencies, memory
+
+
+def bench_host(geometries, cycles):
+    host = OverlayHost()
+    try:
+        host.prepare([(g, "blank", [], 30) for g in geometries])
+        # The first show also waits for start-up; that happens while idle in the service
+        host.show()
+        host.hide()
+        latencies = []
+        for _ in range(cycles):
+            if not host.show():
+                raise RuntimeError("overlay host did not respond")
+            latencies.append(host.last_show_latency)
+            host.hide()
+        memory = [rss_kb(host.process.pid) or 0]
+    finally:
+        host.stop()
+    return latencies, memory
+
+
+def report(monitors, name, latencies, memory):
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] * 1000
+    worst = latencies[-1] * 1000
+    mem = f"{max(memory) / 1024:.1f}" if any(memory) else "n/a"
+    print(f"{monitors:>8} {name:>8} {p50:>10.1f} {worst:>10.1f} {mem:>10}")
+
+
+def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    max_monitors = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    print(f"{cycles} activations per run")
+    print(f"{'monitors':>8} {'path':>8} {'p50 ms':>10} {'max ms':>10} {'RSS MiB':>10}")
+    for monitors in range(1, max_monitors + 1):
+        geometries = [(i * 640, 0, (i + 1) * 640, 480) for i in range(monitors)]
+        report(monitors, "spawn", *bench_spawn(geometries, cycles))
+        report(monitors, "host", *bench_host(geometries, cycles))
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
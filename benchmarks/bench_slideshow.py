@@ -0,0 +1,162 @@
+"""
+Benchmark: slideshow interval jitter and UI stall, synchronous steps vs. prefetching
+"sync" decodes and scales each image inside the step on the UI thread, then
+schedules the next step an interval later (the previous behaviour);
+"prefetch" takes frames from a Prefetcher and steps on fixed deadlines.
+A 10 ms heartbeat on the same loop measures how long the UI was blocked.
+Uses Tk when a display is available, otherwise a minimal after() loop.
+
+    python benchmarks/bench_slideshow.py [steps] [interval_s] [images] [width]x[height]
+"""
+import heapq
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_cache import open_image, scale_image
+from prefetch import PREFETCH_RETRY, PREFETCH_WAIT, Prefetcher
+
+HEARTBEAT_MS = 10
+
+
+class Loop:
+    """Just enough of Tk's event loop: after(), mainloop() and quit()."""
+
+    def __init__(self):
+        self._timers = []
+        self._seq = 0
+        self._running = False
+
+    def after(self, ms, fn, *args):
+        self._seq += 1
+        heapq.heappush(self._timers, (time.monotonic() + ms / 1000, self._seq, fn, args))
+
+    def mainloop(self):
+        self._running = True
+        while self._running and self._timers:
+            when, _, fn, args = heapq.heappop(self._timers)
+            delay = when - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            fn(*args)
+
+    def quit(self):
+        self._running = False
+
+
+def make_loop():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        return root, True
+    except Exception:
+        return Loop(), False
+
+
+def present(img, tk_root):
+    """What a step does with a ready frame on the UI thread."""
+    from PIL import Image, ImageTk
+    if tk_root:
+        return ImageTk.PhotoImage(img)
+    block = Image.core.new_block("RGB", img.size)
+    img.im.convert2(block, img.im)
+    return block
+
+
+def run(kind, paths, steps, interval, size):
+    loop, tk_root = make_loop()
+    load = lambda path: scale_image(open_image(path), *size)
+    switches, gaps = [], []
+    last_beat = [None]
+
+    def heartbeat():
+        now = time.monotonic()
+        if last_beat[0] is not None:
+            gaps.append(now - last_beat[0])
+        last_beat[0] = now
+        loop.after(HEARTBEAT_MS, heartbeat)
+
+    present(load(paths[0]), tk_root)
+    start = time.monotonic()
+    prefetcher = Prefetcher(paths, load, start=1).start() if kind == "prefetch" else None
+    state = {"index": 0, "due": start + interval}
+
+    def step():
+        if prefetcher is None:
+            state["index"] += 1
+            present(load(paths[state["index"] % len(paths)]), tk_root)
+            switches.append(time.monotonic())
+            delay = interval
+        else:
+            item = prefetcher.take(PREFETCH_WAIT)
+            if item is None:
+                loop.after(int(PREFETCH_RETRY * 1000), step)
+                return
+            present(item[1], tk_root)
+            now = time.monotonic()
+            switches.append(now)
+            state["due"] += interval
+            if state["due"] <= now:
+                state["due"] = now + interval
+            delay = state["due"] - now
+        if len(switches) >= steps:
+            loop.quit()
+        else:
+            loop.after(int(delay * 1000), step)
+
+    loop.after(HEARTBEAT_MS, heartbeat)
+    loop.after(int(interval * 1000), step)
+    loop.mainloop()
+    if prefetcher is not None:
+        prefetcher.stop()
+    if tk_root:
+        loop.destroy()
+    # Lateness of each switch against the ideal schedule start + k * interval
+    lateness = [t - (start + (k + 1) * interval) for k, t in enumerate(switches)]
+    deltas = [b - a for a, b in zip([start] + switches, switches)]
+    stalls = [g - HEARTBEAT_MS / 1000 for g in gaps]
+    return deltas, lateness, stalls, tk_root
+
+
+def make_folder(directory, count, size):
+    from PIL import Image
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"photo{i}.jpg")
+        noise = [Image.effect_noise(size, 30 + 10 * ((i + c) % 4)) for c in range(3)]
+        Image.merge("RGB", noise).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    interval = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    size = tuple(int(v) for v in sys.argv[4].split("x")) if len(sys.argv) > 4 else (3840, 2160)
+    tmp = tempfile.mkdtemp(prefix="dcplus-bench-")
+    try:
+        paths = make_folder(tmp, count, (6000, 4000))
+        print(f"{steps} steps every {interval:g}s, {count} 6000x4000 JPEGs scaled to {size[0]}x{size[1]}")
+        print(f"{'path':>9} {'interval p50':>13} {'jitter max':>11} {'drift':>8} "
+              f"{'stall max':>10} {'stall >50ms':>12}")
+        for kind in ("sync", "prefetch"):
+            deltas, lateness, stalls, tk_root = run(kind, paths, steps, interval, size)
+            deltas = sorted(deltas)
+            jitter = max(abs(d - interval) for d in deltas)
+            long_stalls = sum(s for s in stalls if s > 0.05)
+            print(f"{kind:>9} {deltas[len(deltas) // 2] * 1000:>10.0f} ms {jitter * 1000:>8.0f} ms "
+                  f"{lateness[-1] * 1000:>5.0f} ms {max(stalls) * 1000:>7.0f} ms {long_stalls * 1000:>9.0f} ms")
+        if not tk_root:
+            print("No display: steps stop at the Tk-ready pixel copy")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
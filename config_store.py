@@ -0,0 +1,261 @@
+"""
+Cached configuration store for Display Control+
+Holds an immutable parsed snapshot of config.json and reloads it only when the
+file actually changes, so the service no longer opens and parses the JSON on
+every loop tick. Consumers subscribe to change events instead of comparing
+dicts.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections.abc import Mapping
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return ConfigSnapshot(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, ConfigSnapshot):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+class ConfigSnapshot(Mapping):
+    """Read-only view of a parsed config; nested dicts and lists are frozen too.
+
+    ``generation`` increases by one for every reload that changed the content.
+    Use ``thaw()`` for a mutable deep copy (e.g. to edit and save).
+    """
+    __slots__ = ("_data", "generation")
+
+    def __init__(self, data=None, generation=0):
+        self._data = {k: _freeze(v) for k, v in (data or {}).items()}
+        self.generation = generation
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __eq__(self, other):
+        if isinstance(other, ConfigSnapshot):
+            return self._data == other._data
+        if isinstance(other, Mapping):
+            return self.thaw() == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"ConfigSnapshot({self.thaw()!r}, generation={self.generation})"
+
+    def thaw(self):
+        return _thaw(self)
+
+
+class ConfigStore:
+    """Single source of the current config for one process.
+
+    ``get()`` returns the cached snapshot. The file is checked by mtime and
+    size: by a watcher thread after ``start()`` (woken by a directory change
+    notification on Windows, polling every ``poll_interval`` seconds
+    elsewhere), or at most every ``check_interval`` seconds from ``get()``
+    when no watcher runs. A changed file is reloaded once it has been stable
+    for ``debounce`` seconds, so half-written saves are not parsed.
+    Subscribers are called as ``callback(old, new)`` only when the parsed
+    content differs. A file that fails to load keeps the previous snapshot.
+    """
+
+    def __init__(self, path, loader, debounce=0.2, poll_interval=1.0, check_interval=1.0, clock=time.monotonic):
+        self.path = path
+        self._loader = loader
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._signature = None
+        self._last_check = None
+        self._subscribers = []
+        self._thread = None
+        self._notifier = None
+        self._stop = threading.Event()
+        self.loads = 0
+
+    # --- Reading ---
+
+    def get(self):
+        """The current ConfigSnapshot, or None if the config never loaded."""
+        if self._snapshot is None:
+            self.reload()
+        elif self._thread is None and self._clock() - self._last_check >= self.check_interval:
+            self.check()
+        return self._snapshot
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def check(self):
+        """Reload if the file's mtime or size changed; return True if the content changed."""
+        self._last_check = self._clock()
+        if self._stat() == self._signature:
+            return False
+        return self.reload()
+
+    def reload(self, force=False):
+        """Parse the file now; return True if the content changed."""
+        with self._lock:
+            signature = self._stat()
+            self._last_check = self._clock()
+            try:
+                data = self._loader()
+            except Exception as e:
+                logging.error(f"Failed to load config: {e}")
+                data = None
+            self.loads += 1
+            self._signature = signature
+            if data is None:
+                return False
+            old = self._snapshot
+            if old is not None and not force and old == data:
+                return False
+            new = ConfigSnapshot(data, old.generation + 1 if old is not None else 0)
+            self._snapshot = new
+            subscribers = list(self._subscribers)
+        if old is not None:
+            logging.info(f"Config changed (generation {new.generation})")
+            for callback in subscribers:
+                try:
+                    callback(old, new)
+                except Exception as e:
+                    logging.error(f"Config subscriber failed: {e}")
+        return True
+
+    # --- Change events ---
+
+    def subscribe(self, callback):
+        """Call ``callback(old, new)`` after every content change; returns ``callback``."""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    # --- Watcher ---
+
+    def start(self):
+        """Watch the file from a background thread (idempotent)."""
+        if self._thread is not None:
+            return
+        if self._snapshot is None:
+            self.reload()
+        # A fresh event per watcher: one still winding down after a quick
+        # stop()/start() must not be revived
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, args=(self._stop,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        notifier = self._notifier
+        if notifier is not None:
+            notifier.wake()
+        self._thread = None
+
+    def _settle(self, stop):
+        """Wait until the file stops changing, then reload it."""
+        signature = self._stat()
+        if signature == self._signature:
+            return
+        while not stop.wait(self.debounce):
+            current = self._stat()
+            if current == signature:
+                self.reload()
+                return
+            signature = current
+
+    def _watch(self, stop):
+        notifier = None
+        if sys.platform == "win32":
+            try:
+                notifier = _DirectoryNotifier(os.path.dirname(os.path.abspath(self.path)))
+            except Exception as e:
+                logging.debug(f"Config change notification unavailable: {e}")
+        self._notifier = notifier
+        try:
+            while not stop.is_set():
+                if notifier is not None:
+                    # Any write in the directory (the log file too) wakes us; the stat filters
+                    if not notifier.wait():
+                        continue
+                elif stop.wait(self.poll_interval):
+                    return
+                try:
+                    self._settle(stop)
+                except Exception as e:
+                    logging.debug(f"Config watcher check failed: {e}")
+        finally:
+            if self._notifier is notifier:
+                self._notifier = None
+            if notifier is not None:
+                notifier.close()
+
+
+class _DirectoryNotifier:
+    """FindFirstChangeNotification on a directory plus a wake event (Windows)."""
+    FILE_NOTIFY_CHANGE_FILE_NAME = 0x1
+    FILE_NOTIFY_CHANGE_SIZE = 0x8
+    FILE_NOTIFY_CHANGE_LAST_WRITE = 0x10
+    INFINITE = 0xFFFFFFFF
+
+    def __init__(self, directory):
+        import ctypes
+        from ctypes import wintypes
+        k32 = ctypes.windll.kernel32
+        k32.FindFirstChangeNotificationW.restype = wintypes.HANDLE
+        k32.CreateEventW.restype = wintypes.HANDLE
+        k32.WaitForMultipleObjects.restype = wintypes.DWORD
+        self._kernel32 = k32
+        change = k32.FindFirstChangeNotificationW(
+            directory, False,
+            self.FILE_NOTIFY_CHANGE_FILE_NAME | self.FILE_NOTIFY_CHANGE_SIZE | self.FILE_NOTIFY_CHANGE_LAST_WRITE)
+        if not change or change == wintypes.HANDLE(-1).value:
+            raise OSError("FindFirstChangeNotification failed")
+        self._event = k32.CreateEventW(None, True, False, None)
+        self._handles = (wintypes.HANDLE * 2)(change, self._event)
+
+    def wait(self):
+        """Block until the directory changes (True) or wake() is called (False)."""
+        res = self._kernel32.WaitForMultipleObjects(2, self._handles, False, self.INFINITE)
+        if res == 0:
+            self._kernel32.FindNextChangeNotification(self._handles[0])
+            return True
+        return False
+
+    def wake(self):
+        self._kernel32.SetEvent(self._event)
+
+    def close(self):
+        self._kernel32.FindCloseChangeNotification(self._handles[0])
+        self._kernel32.CloseHandle(self._event)
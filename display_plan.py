@@ -0,0 +1,118 @@
+"""
+Per-display protection settings for Display Control+
+Turns a config (the classic single-timeout layout or the v2 "displays"
+section written by the new GUI) into one plan per protected display: its
+geometry, idle timeout, overlay mode and media.
+"""
+import collections
+import logging
+import os
+
+from monitor_index import monitor_key
+
+DisplayPlan = collections.namedtuple("DisplayPlan", "key geometry timeout mode file_paths interval")
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
+# v2 GUI mode names -> overlay modes
+V2_MODES = {"blank": "blank", "image": "single", "slideshow": "slideshow", "gif": "gif"}
+
+
+def _seconds(minutes, default=5):
+    try:
+        return max(1, int(float(minutes) * 60))
+    except (TypeError, ValueError):
+        return default * 60
+
+
+def _media_files(path):
+    """A v2 ``media_path``: one file, or every image in a folder (sorted)."""
+    if not path:
+        return []
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path)
+                      if name.lower().endswith(IMAGE_EXTENSIONS))
+    return [path]
+
+
+def _content(mode, file_paths):
+    """``(mode, files)`` for a display, or None if it has nothing to show."""
+    if mode not in ('blank', 'single', 'slideshow', 'gif'):
+        logging.warning(f"Overlay mode '{mode}' not supported by the service, using blank")
+        return 'blank', []
+    if mode != 'blank' and not file_paths:
+        # As before: image modes without images show no overlay
+        logging.info(f"No images selected for {mode} mode")
+        return None
+    return mode, list(file_paths)
+
+
+def _v2_plans(config, monitors):
+    plans = []
+    for display_id, display in sorted(config.get('displays', {}).items()):
+        if not display.get('enabled', True):
+            continue
+        index = display.get('index')
+        if index is None:
+            # "display_3" -> third monitor
+            try:
+                index = int(str(display_id).rsplit('_', 1)[-1]) - 1
+            except ValueError:
+                index = -1
+        if not 0 <= index < len(monitors):
+            logging.warning(f"Display {display_id} (index {index}) is not connected")
+            continue
+        geometry = tuple(monitors[index]['geometry'])
+        content = _content(V2_MODES.get(display.get('mode', 'blank'), display.get('mode')),
+                           _media_files(display.get('media_path', '')))
+        if content is None:
+            continue
+        mode, files = content
+        plans.append(DisplayPlan(monitor_key(geometry), geometry, _seconds(display.get('timeout_minutes', 3), 3),
+                                 mode, files, int(config.get('interval', 30))))
+    return plans
+
+
+def with_overrides(plan, timeout_minutes=None, mode=None):
+    """``plan`` with another timeout and/or mode (e.g. from a schedule rule).
+
+    An image mode the display has no files for is not applied.
+    """
+    if timeout_minutes is not None:
+        plan = plan._replace(timeout=_seconds(timeout_minutes))
+    if mode is not None:
+        content = _content(V2_MODES.get(mode, mode), plan.file_paths)
+        if content is not None:
+            plan = plan._replace(mode=content[0])
+    return plan
+
+
+def plan_displays(config, monitors=None):
+    """One DisplayPlan per protected display, in config order.
+
+    A config with a ``displays`` section is read per display (``index``
+    into ``monitors``, ``enabled``, ``timeout_minutes``, ``mode``,
+    ``media_path``). Otherwise every geometry in ``monitors`` of the config
+    shares the global ``timeout``, ``mode`` and ``file_paths``; a
+    ``monitor_modes`` entry (keyed by monitor index or geometry key)
+    overrides the mode of one monitor.
+    """
+    if not config:
+        return []
+    if config.get('displays'):
+        return _v2_plans(config, monitors or [])
+    timeout = _seconds(config.get('timeout', 5))
+    interval = int(config.get('interval', 30))
+    overrides = config.get('monitor_modes') or {}
+    indices = list(config.get('monitor_indices') or [])
+    plans = []
+    for i, geometry in enumerate(config.get('monitors', [])):
+        geometry = tuple(geometry)
+        key = monitor_key(geometry)
+        index = indices[i] if i < len(indices) else i
+        mode = overrides.get(key, overrides.get(str(index), config.get('mode', 'blank')))
+        content = _content(mode, config.get('file_paths', []))
+        if content is None:
+            continue
+        mode, files = content
+        plans.append(DisplayPlan(key, geometry, timeout, mode, files, interval))
+    return plans
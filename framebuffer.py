@@ -0,0 +1,58 @@
+"""
+Raw framebuffer files for Display Control+
+A display-ready frame is a 16-byte header followed by the pixels in the
+layout Pillow uses in memory (RGBX, 4 bytes per pixel, no row padding).
+Opening one maps the file and wraps the mapping in an Image: nothing is
+decoded or copied in Python, and the only copy left before the screen is
+the one Tk makes into its own photo block.
+"""
+import mmap
+import struct
+
+MAGIC = b"DCFB"
+VERSION = 1
+PIXEL_MODE = "RGBX"
+BYTES_PER_PIXEL = 4
+
+# magic, version, bytes per pixel, width, height
+_HEADER = struct.Struct("<4sHHII")
+HEADER_SIZE = _HEADER.size
+
+
+def frame_size(width, height):
+    """File size of a width x height frame."""
+    return HEADER_SIZE + width * height * BYTES_PER_PIXEL
+
+
+def write_frame(path, img):
+    """Write ``img`` to ``path`` as a raw frame."""
+    if img.mode != PIXEL_MODE:
+        img = img.convert(PIXEL_MODE)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, BYTES_PER_PIXEL, *img.size))
+        f.write(img.tobytes("raw", PIXEL_MODE))
+
+
+def map_frame(path):
+    """The frame in ``path`` as a read-only Image backed by a memory map.
+
+    The mapping lives as long as the Image. Raises ValueError if the file
+    is not a complete frame.
+    """
+    from PIL import Image
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version, bpp, width, height = _HEADER.unpack_from(mapped, 0)
+    except struct.error:
+        mapped.close()
+        raise ValueError(f"{path} is not a frame file")
+    if magic != MAGIC or version != VERSION or bpp != BYTES_PER_PIXEL:
+        mapped.close()
+        raise ValueError(f"{path} is not a version {VERSION} frame file")
+    end = frame_size(width, height)
+    if len(mapped) < end:
+        mapped.close()
+        raise ValueError(f"{path} is truncated")
+    pixels = memoryview(mapped)[HEADER_SIZE:end]
+    return Image.frombuffer(PIXEL_MODE, (width, height), pixels, "raw", PIXEL_MODE, 0, 1)
@@ -0,0 +1,204 @@
+"""
+HID report diffing for Display Control+
+Decides whether a raw HID input report is real user activity or just sensor
+noise (gyro/accelerometer, timestamps, counters) from controllers that stream
+reports continuously.
+"""
+import time
+from collections import namedtuple
+
+# Same defaults and units as GamepadWatcher: sticks on the XInput int16
+# scale, triggers 0-255
+DEFAULT_STICK_DEADZONE = 7849
+DEFAULT_TRIGGER_THRESHOLD = 30
+
+# Stick axis encodings: unsigned 8-bit centred on 128, or 12-bit values
+# packed low/high nibble-wise over three bytes (Nintendo)
+U8 = "u8"
+U12_LO = "u12lo"
+U12_HI = "u12hi"
+
+
+class HidLayout(namedtuple("HidLayout", "name min_length buttons sticks triggers")):
+    """Byte layout of one input report.
+
+    ``buttons`` is a tuple of ``(offset, mask)``, ``sticks`` of
+    ``(offset, encoding)`` and ``triggers`` of offsets. Offsets count the
+    report ID byte. Every other byte is ignored.
+    """
+
+
+def _axis(report, offset, encoding):
+    """Decode one stick axis onto the XInput int16 scale."""
+    if encoding == U8:
+        return (report[offset] - 128) << 8
+    if encoding == U12_LO:
+        return ((report[offset] | ((report[offset + 1] & 0x0F) << 8)) - 2048) << 4
+    return (((report[offset] >> 4) | (report[offset + 1] << 4)) - 2048) << 4
+
+
+_DS4_SIMPLE = HidLayout(
+    "DualShock 4 / DualSense (basic)", 10,
+    ((5, 0xFF), (6, 0xFF), (7, 0x03)),
+    ((1, U8), (2, U8), (3, U8), (4, U8)),
+    (8, 9))
+_DS4_BT = HidLayout(
+    "DualShock 4 (Bluetooth)", 12,
+    ((7, 0xFF), (8, 0xFF), (9, 0x03)),
+    ((3, U8), (4, U8), (5, U8), (6, U8)),
+    (10, 11))
+_DUALSENSE_USB = HidLayout(
+    "DualSense (USB)", 11,
+    ((8, 0xFF), (9, 0xFF), (10, 0x07)),
+    ((1, U8), (2, U8), (3, U8), (4, U8)),
+    (5, 6))
+_DUALSENSE_BT = HidLayout(
+    "DualSense (Bluetooth)", 12,
+    ((9, 0xFF), (10, 0xFF), (11, 0x07)),
+    ((2, U8), (3, U8), (4, U8), (5, U8)),
+    (6, 7))
+_SWITCH_PRO = HidLayout(
+    "Switch Pro Controller", 12,
+    ((3, 0xFF), (4, 0xFF), (5, 0xFF)),
+    ((6, U12_LO), (7, U12_HI), (9, U12_LO), (10, U12_HI)),
+    ())
+
+# (vendor id, product id) -> {report id: layouts tried in order by length}
+KNOWN_LAYOUTS = {
+    (0x054C, 0x05C4): {0x01: (_DS4_SIMPLE,), 0x11: (_DS4_BT,)},
+    (0x054C, 0x09CC): {0x01: (_DS4_SIMPLE,), 0x11: (_DS4_BT,)},
+    (0x054C, 0x0CE6): {0x01: (_DUALSENSE_USB, _DS4_SIMPLE), 0x31: (_DUALSENSE_BT,)},
+    (0x054C, 0x0DF2): {0x01: (_DUALSENSE_USB, _DS4_SIMPLE), 0x31: (_DUALSENSE_BT,)},
+    (0x057E, 0x2009): {0x30: (_SWITCH_PRO,)},
+}
+
+
+class _LearnedMask:
+    """Noise mask for one report ID of a device with no known layout."""
+    __slots__ = ("started", "reports", "changes", "watch")
+
+    def __init__(self, now):
+        self.started = now
+        self.reports = 0
+        self.changes = []
+        self.watch = None  # byte offsets that count once learning is done
+
+
+class _Device:
+    __slots__ = ("layouts", "last", "learned")
+
+    def __init__(self, layouts):
+        self.layouts = layouts
+        self.last = {}
+        self.learned = {}
+
+
+class HidReportFilter:
+    """Per-device report diffing with stick deadzones and trigger thresholds.
+
+    Reports are compared with the previous report of the same ID from the
+    same device. Known controllers are decoded with their layout: a change
+    counts if buttons changed, or a stick axis or trigger changed and is past
+    its deadzone/threshold (as GamepadWatcher treats XInput packets).
+
+    Other devices get a learned noise mask. The first ``LEARN_REPORTS``
+    reports (or ``LEARN_SECONDS``) are only observed. If the device streamed
+    faster than ``STREAMING_HZ`` in that window, bytes that changed in more
+    than ``NOISE_RATIO`` of its reports are ignored from then on; a device
+    that only reports on change keeps every byte.
+    """
+    LEARN_REPORTS = 64
+    LEARN_SECONDS = 1.0
+    STREAMING_HZ = 30.0
+    NOISE_RATIO = 0.5
+
+    def __init__(self, stick_deadzone=DEFAULT_STICK_DEADZONE, trigger_threshold=DEFAULT_TRIGGER_THRESHOLD, clock=time.monotonic):
+        self.stick_deadzone = max(0, int(stick_deadzone))
+        self.trigger_threshold = max(0, int(trigger_threshold))
+        self._clock = clock
+        self._devices = {}
+        self.reports = 0
+        self.active = 0
+
+    def add_device(self, device, vendor_id=0, product_id=0):
+        self._devices[device] = _Device(KNOWN_LAYOUTS.get((vendor_id, product_id), {}))
+
+    def remove_device(self, device):
+        self._devices.pop(device, None)
+
+    def has_device(self, device):
+        return device in self._devices
+
+    def noise_mask(self, device, report_id):
+        """Learned ignored byte offsets, or None while learning / for known layouts."""
+        dev = self._devices.get(device)
+        learned = dev.learned.get(report_id) if dev else None
+        if learned is None or learned.watch is None:
+            return None
+        return sorted(set(range(len(learned.changes))) - set(learned.watch))
+
+    def feed(self, device, report):
+        """Return True if ``report`` (bytes, report ID first) is user activity."""
+        self.reports += 1
+        dev = self._devices.get(device)
+        if dev is None:
+            self.add_device(device)
+            dev = self._devices[device]
+        if not report:
+            return False
+        rid = report[0]
+        last = dev.last.get(rid)
+        dev.last[rid] = report
+        if last is None or last == report:
+            return False
+        for layout in dev.layouts.get(rid, ()):
+            if len(report) >= layout.min_length and len(last) >= layout.min_length:
+                active = self._layout_changed(layout, last, report)
+                break
+        else:
+            active = self._masked_changed(dev, rid, last, report)
+        if active:
+            self.active += 1
+        return active
+
+    def _layout_changed(self, layout, last, report):
+        for offset, mask in layout.buttons:
+            if (last[offset] ^ report[offset]) & mask:
+                return True
+        dz = self.stick_deadzone
+        for offset, encoding in layout.sticks:
+            value = _axis(report, offset, encoding)
+            if abs(value) > dz and value != _axis(last, offset, encoding):
+                return True
+        trig = self.trigger_threshold
+        for offset in layout.triggers:
+            if report[offset] > trig and report[offset] != last[offset]:
+                return True
+        return False
+
+    def _masked_changed(self, dev, rid, last, report):
+        learned = dev.learned.get(rid)
+        now = self._clock()
+        if learned is None:
+            learned = dev.learned[rid] = _LearnedMask(now)
+        n = min(len(last), len(report))
+        if learned.watch is not None:
+            if len(report) != len(last):
+                return True
+            for i in learned.watch:
+                if i < n and last[i] != report[i]:
+                    return True
+            return False
+        changes = learned.changes
+        if len(changes) < n:
+            changes.extend([0] * (n - len(changes)))
+        for i in range(n):
+            if last[i] != report[i]:
+                changes[i] += 1
+        learned.reports += 1
+        elapsed = now - learned.started
+        if learned.reports >= self.LEARN_REPORTS or elapsed >= self.LEARN_SECONDS:
+            streaming = learned.reports >= self.STREAMING_HZ * max(elapsed, 1e-6)
+            limit = learned.reports * self.NOISE_RATIO
+            learned.watch = tuple(i for i, c in enumerate(changes) if not (streaming and c > limit))
+        return False
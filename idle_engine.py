@@ -0,0 +1,252 @@
+"""
+Deadline-driven idle engine for Display Control+
+Keeps a heap of idle deadlines and sleeps until the earliest one is due,
+instead of waking every second to recompute idle times.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+# Clock jitter tolerated between two reads of the same last-input tick
+RESUME_TOLERANCE = 0.02
+
+
+class IdleTimer:
+    """One idle threshold (``timeout`` seconds) watched for one key."""
+    __slots__ = ("key", "timeout", "on_idle", "on_resume", "deadline", "idle_since", "fired", "cancelled")
+
+    def __init__(self, key, timeout, on_idle, on_resume=None):
+        self.key = key
+        self.timeout = float(timeout)
+        self.on_idle = on_idle
+        self.on_resume = on_resume
+        self.deadline = 0.0
+        self.idle_since = 0.0
+        self.fired = False
+        self.cancelled = False
+
+    def __repr__(self):
+        return f"IdleTimer(key={self.key!r}, timeout={self.timeout}, fired={self.fired})"
+
+
+class IdleDeadlineEngine:
+    """Fire idle/resume callbacks exactly when a key crosses its timeout.
+
+    Keys are ``"system"`` or a monitor key. ``touch()`` only records a
+    timestamp; the engine thread is woken by input only when a timer for that
+    key has already fired (so it can report the resume). Deadlines that pass
+    while the user is active are re-armed lazily from the latest input time,
+    so an active user costs one wakeup per timeout period at most.
+
+    ``last_input_source(key)`` may return an extra last-input timestamp on the
+    engine clock (e.g. from GetLastInputInfo) or None. Because such a source
+    cannot push, ``resume_poll`` seconds is used as the re-check interval while
+    a timer is fired.
+
+    ``park()`` stops all deadline wakeups (session locked, system asleep);
+    ``unpark()`` re-seeds every idle baseline so the parked time never counts
+    as idle.
+    """
+
+    def __init__(self, clock=time.monotonic, last_input_source=None, resume_poll=None):
+        self._clock = clock
+        self._last_input_source = last_input_source
+        self.resume_poll = resume_poll
+        self._start_time = clock()
+        self._last_input = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._fired = []
+        self._fired_keys = {}
+        self._cond = threading.Condition()
+        self._wake = False
+        self._running = False
+        self._parked = False
+        self._thread = None
+        self.wakeups = 0
+
+    # --- Input side ---
+
+    def touch(self, key, when=None):
+        """Record input for ``key``. Cheap: no lock unless a timer has fired."""
+        self._last_input[key] = self._clock() if when is None else when
+        if key in self._fired_keys:
+            self.notify()
+
+    def touch_many(self, keys, when=None):
+        when = self._clock() if when is None else when
+        wake = False
+        for key in keys:
+            self._last_input[key] = when
+            if key in self._fired_keys:
+                wake = True
+        if wake:
+            self.notify()
+
+    def notify(self):
+        """Wake the engine thread to re-evaluate timers now."""
+        with self._cond:
+            self._wake = True
+            self._cond.notify()
+
+    def last_input(self, key):
+        last = self._last_input.get(key, self._start_time)
+        if self._last_input_source is not None:
+            try:
+                extra = self._last_input_source(key)
+            except Exception:
+                extra = None
+            if extra is not None and extra > last:
+                last = extra
+        return last
+
+    def idle_seconds(self, key, now=None):
+        now = self._clock() if now is None else now
+        return max(0.0, now - self.last_input(key))
+
+    # --- Timers ---
+
+    def add_timer(self, key, timeout, on_idle, on_resume=None):
+        """Call ``on_idle(timer, idle)`` once ``key`` has been idle for ``timeout`` s.
+
+        After firing, ``on_resume(timer, idle)`` is called on the next input for
+        ``key`` and the timer re-arms itself.
+        """
+        timer = IdleTimer(key, timeout, on_idle, on_resume)
+        with self._cond:
+            self._arm(timer, self.last_input(key))
+            self._wake = True
+            self._cond.notify()
+        return timer
+
+    def remove_timer(self, timer):
+        with self._cond:
+            timer.cancelled = True
+            if timer.fired:
+                self._unfire(timer)
+
+    def timers(self):
+        with self._cond:
+            live = [t for _, _, t in self._heap if not t.cancelled]
+            return live + list(self._fired)
+
+    def _arm(self, timer, last):
+        timer.fired = False
+        timer.deadline = last + timer.timeout
+        heapq.heappush(self._heap, (timer.deadline, next(self._seq), timer))
+
+    def _unfire(self, timer):
+        timer.fired = False
+        try:
+            self._fired.remove(timer)
+        except ValueError:
+            return
+        count = self._fired_keys.get(timer.key, 0) - 1
+        if count > 0:
+            self._fired_keys[timer.key] = count
+        else:
+            self._fired_keys.pop(timer.key, None)
+
+    # --- Parking ---
+
+    @property
+    def parked(self):
+        return self._parked
+
+    def park(self):
+        """Sleep without deadlines until unpark(); input is still recorded."""
+        with self._cond:
+            self._parked = True
+            self._cond.notify()
+
+    def unpark(self, when=None):
+        """Leave the parked state with every key last active at ``when`` (default now).
+
+        Fired timers are reset and all deadlines re-armed from ``when``.
+        """
+        with self._cond:
+            when = self._clock() if when is None else when
+            for key in list(self._last_input):
+                self._last_input[key] = when
+            self._start_time = when
+            timers = [t for _, _, t in self._heap if not t.cancelled and not t.fired] + self._fired
+            self._heap = []
+            self._fired = []
+            self._fired_keys = {}
+            for timer in timers:
+                self._arm(timer, when)
+            self._parked = False
+            self._wake = True
+            self._cond.notify()
+
+    # --- Engine thread ---
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="IdleDeadlineEngine", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def _collect(self, now):
+        """Return due callbacks; re-arm deadlines that passed while active."""
+        calls = []
+        # Resumes first so a timer that resumes can be re-armed below
+        for timer in list(self._fired):
+            last = self.last_input(timer.key)
+            if last > timer.idle_since + RESUME_TOLERANCE:
+                self._unfire(timer)
+                self._arm(timer, last)
+                if timer.on_resume:
+                    calls.append((timer.on_resume, timer, max(0.0, now - last)))
+        while self._heap and self._heap[0][0] <= now:
+            _, _, timer = heapq.heappop(self._heap)
+            if timer.cancelled or timer.fired:
+                continue
+            last = self.last_input(timer.key)
+            idle = now - last
+            if idle + 0.001 >= timer.timeout:
+                timer.fired = True
+                timer.idle_since = last
+                self._fired.append(timer)
+                self._fired_keys[timer.key] = self._fired_keys.get(timer.key, 0) + 1
+                calls.append((timer.on_idle, timer, idle))
+            else:
+                self._arm(timer, last)
+        return calls
+
+    def _next_wait(self, now):
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        wait = max(0.0, self._heap[0][0] - now) if self._heap else None
+        if self._fired and self.resume_poll:
+            wait = self.resume_poll if wait is None else min(wait, self.resume_poll)
+        return wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                if self._parked:
+                    self._cond.wait()
+                    continue
+                calls = self._collect(self._clock())
+                if not calls:
+                    if not self._wake:
+                        self._cond.wait(self._next_wait(self._clock()))
+                        self.wakeups += 1
+                    self._wake = False
+                    continue
+            for callback, timer, idle in calls:
+                try:
+                    callback(timer, idle)
+                except Exception as e:
+                    logging.error(f"Idle callback failed for {timer}: {e}")
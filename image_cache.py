@@ -0,0 +1,250 @@
+"""
+On-disk cache of display-ready overlay images for Display Control+
+Scaling a camera original to a monitor takes hundreds of milliseconds and a
+large transient allocation, so each (source path, mtime, size, target size,
+fit mode) is scaled once and kept as a raw frame of exactly the monitor's
+size in AppData (see framebuffer). Overlays then only map a monitor-sized
+file. The cache is filled in the background when settings are applied and
+bounded by total size, evicting the least recently used entries.
+"""
+import hashlib
+import logging
+import os
+import threading
+
+from framebuffer import map_frame, write_frame
+from log_config import get_appdata_dir
+
+FIT_MODES = ("stretch", "fit", "fill")
+REDUCING_GAP = 2.0  # resolution kept over the target for the final resample after reduce()
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024  # about 60 frames at 4K
+
+
+def _lanczos():
+    from PIL import Image
+    try:
+        return Image.Resampling.LANCZOS
+    except AttributeError:
+        return getattr(Image, 'LANCZOS', 1)
+
+
+def open_image(path):
+    """Decode an image file; the pixels are loaded before the file is closed."""
+    from PIL import Image
+    with Image.open(path) as img:
+        img.load()
+        return img.copy()
+
+
+def _target_size(size, width, height, fit):
+    """Size the source is resampled to by scale_image before any crop or letterbox."""
+    if fit == "stretch":
+        return width, height
+    src_w, src_h = size
+    scale = (min if fit == "fit" else max)(width / src_w, height / src_h)
+    return max(1, round(src_w * scale)), max(1, round(src_h * scale))
+
+
+def decode_image(path, width, height, fit="stretch"):
+    """Decode ``path`` only as far as a ``width`` x ``height`` result needs.
+
+    JPEGs are decoded at the smallest DCT scale (1/2 to 1/8, draft mode)
+    that still covers the target, so the decoded image holds at most about
+    4 times the output's pixels (1/64 of the source for tiny outputs such
+    as thumbnails). Any source is then shrunk by an integer ``reduce()``
+    down to REDUCING_GAP times the target for the final resample in
+    scale_image. Other formats are still decoded in full first.
+    """
+    from PIL import Image
+    with Image.open(path) as img:
+        need_w, need_h = _target_size(img.size, width, height, fit)
+        # DCT scaling filters like an area average, so no gap is needed here
+        img.draft(None, (need_w, need_h))
+        img.load()
+        if img.mode not in ("RGB", "RGBA", "L", "LA"):
+            # reduce() averages raw values, which is wrong for palettes
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode == "PA" else "RGB")
+        factor_x = max(1, int(img.width // (need_w * REDUCING_GAP)))
+        factor_y = max(1, int(img.height // (need_h * REDUCING_GAP)))
+        if fit != "stretch":
+            factor_x = factor_y = min(factor_x, factor_y)
+        return img.reduce((factor_x, factor_y))
+
+
+def load_thumbnail(path, size):
+    """A thumbnail of ``path`` fitting a ``size`` x ``size`` box (aspect kept, no padding)."""
+    img = decode_image(path, size, size, "fit")
+    img.thumbnail((size, size), _lanczos())
+    return img
+
+
+def scale_image(img, width, height, fit="stretch"):
+    """An RGB image of exactly ``width`` x ``height``.
+
+    ``stretch`` ignores the aspect ratio (as the overlays always have),
+    ``fit`` letterboxes on black and ``fill`` crops the overflow.
+    """
+    from PIL import Image
+    if img.mode in ("RGBA", "LA", "P"):
+        # Transparent areas show the overlay's black background
+        rgba = img.convert("RGBA")
+        img = Image.new("RGB", rgba.size, "black")
+        img.paste(rgba, mask=rgba.getchannel("A"))
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    if img.size == (width, height):
+        return img
+    if fit == "stretch":
+        return img.resize((width, height), _lanczos())
+    src_w, src_h = img.size
+    scale = (min if fit == "fit" else max)(width / src_w, height / src_h)
+    size = (max(1, round(src_w * scale)), max(1, round(src_h * scale)))
+    scaled = img.resize(size, _lanczos())
+    if fit == "fill":
+        left = (size[0] - width) // 2
+        top = (size[1] - height) // 2
+        return scaled.crop((left, top, left + width, top + height))
+    canvas = Image.new("RGB", (width, height), "black")
+    canvas.paste(scaled, ((width - size[0]) // 2, (height - size[1]) // 2))
+    return canvas
+
+
+class ScaledImageCache:
+    """Monitor-sized copies of source images, stored as files in ``directory``.
+
+    Entry names hash the source's absolute path, mtime and size with the
+    target size and fit mode, so an edited source or another monitor simply
+    misses. A hit refreshes the entry's mtime; once the directory holds more
+    than ``max_bytes``, the entries with the oldest mtime are deleted.
+    Writes go through a temporary file and ``os.replace``, so several
+    processes (service, overlay host) can share the directory.
+    """
+    SUFFIX = ".dcfb"
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, decode=decode_image):
+        self.directory = directory or os.path.join(get_appdata_dir(), "image_cache")
+        self.max_bytes = max_bytes
+        self._decode = decode
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def entry_path(self, path, width, height, fit="stretch"):
+        st = os.stat(path)
+        ident = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{width}x{height}|{fit}"
+        name = hashlib.sha1(ident.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name + self.SUFFIX)
+
+    def lookup(self, path, width, height, fit="stretch"):
+        """The cached file for these parameters, or None."""
+        entry = self.entry_path(path, width, height, fit)
+        try:
+            os.utime(entry)  # mark as recently used
+        except OSError:
+            return None
+        return entry
+
+    def load(self, path, width, height, fit="stretch"):
+        """The scaled image: a mapped cache entry, or rendered and stored."""
+        entry = self.lookup(path, width, height, fit)
+        if entry is not None:
+            try:
+                img = map_frame(entry)
+                self.hits += 1
+                return img
+            except Exception as e:
+                logging.warning(f"Discarding unreadable cache entry {entry}: {e}")
+        return self._render(path, width, height, fit)
+
+    def ensure(self, path, width, height, fit="stretch"):
+        """Render the entry unless it is cached; returns True if it was rendered."""
+        if self.lookup(path, width, height, fit) is not None:
+            return False
+        self._render(path, width, height, fit)
+        return True
+
+    def _render(self, path, width, height, fit):
+        self.misses += 1
+        scaled = scale_image(self._decode(path, width, height, fit), width, height, fit)
+        self._store(self.entry_path(path, width, height, fit), scaled)
+        return scaled
+
+    def warm(self, jobs):
+        """Render ``(path, width, height, fit)`` jobs on a background thread; returns it."""
+        jobs = list(jobs)
+
+        def run():
+            rendered = 0
+            for path, width, height, fit in jobs:
+                try:
+                    rendered += self.ensure(path, width, height, fit)
+                except Exception as e:
+                    logging.warning(f"Could not pre-scale {path} for {width}x{height}: {e}")
+            if rendered:
+                logging.info(f"Pre-scaled {rendered} of {len(jobs)} overlay images")
+
+        thread = threading.Thread(target=run, name="ImageCacheWarm", daemon=True)
+        thread.start()
+        return thread
+
+    def _store(self, entry, img):
+        tmp = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            write_frame(tmp, img)
+            os.replace(tmp, entry)
+        except Exception as e:
+            logging.warning(f"Could not write image cache entry: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def entries(self):
+        """``(mtime, size, path)`` of every entry, least recently used first."""
+        found = []
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.endswith(self.SUFFIX):
+                    try:
+                        st = item.stat()
+                    except OSError:
+                        continue
+                    found.append((st.st_mtime, st.st_size, item.path))
+        return sorted(found)
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits ``max_bytes``."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        return total
+
+
+_default_cache = None
+
+
+def default_cache():
+    """The process-wide ScaledImageCache in AppData."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ScaledImageCache()
+    return _default_cache
+
+
+def load_scaled(path, width, height, fit="stretch"):
+    """A monitor-sized image through the default cache (scaled directly if it is unusable)."""
+    try:
+        cache = default_cache()
+    except OSError as e:
+        logging.warning(f"Image cache unavailable: {e}")
+        return scale_image(decode_image(path, width, height, fit), width, height, fit)
+    return cache.load(path, width, height, fit)
@@ -0,0 +1,681 @@
+"""
+Input backends for Display Control+
+Each backend reports input from one source and declares what it costs, so the
+detector can pick the cheapest set of backends that covers the configured scope.
+"""
+import ctypes
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+# Capabilities a backend can cover
+KEYBOARD = "keyboard"
+MOUSE = "mouse"
+POINTER_POSITION = "pointer_position"  # absolute cursor position, needed for per-monitor scope
+CONTROLLER = "controller"  # XInput-class gamepads
+HID = "hid"  # other HID game controllers (DirectInput-style)
+
+
+class BackendCost(namedtuple("BackendCost", "kind wakeups_per_sec threads per_event")):
+    """What a backend costs while running.
+
+    ``kind`` is ``"event"`` (woken by input), ``"poll"`` (woken by a timer) or
+    ``"pull"`` (no thread; read on demand at idle deadlines). ``per_event`` is
+    True if Python code runs for every input event on the machine.
+    """
+    __slots__ = ()
+
+    @property
+    def score(self):
+        # Periodic wakeups dominate idle cost; Python work in the input path
+        # is weighted as a steady 10 wakeups/s, each thread as half a wakeup.
+        return self.wakeups_per_sec + 0.5 * self.threads + (10.0 if self.per_event else 0.0)
+
+
+class InputBackend:
+    """Base class: report input through ``detector._mark_input(x, y)`` (push)
+    or through ``last_input()`` (pull, a ``time.monotonic()`` timestamp)."""
+    name = ""
+    provides = frozenset()
+    cost = BackendCost("event", 0, 0, False)
+    platforms = ()
+    auto_select = True  # False for backends that must be asked for by name
+
+    def __init__(self, detector, **options):
+        self.detector = detector
+        self.options = options
+
+    @classmethod
+    def available(cls):
+        return not cls.platforms or sys.platform.startswith(cls.platforms)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def last_input(self, key="system"):
+        return None
+
+    def device_changed(self):
+        """Called when another backend sees an input device arrive or leave."""
+
+    def set_monitors(self, monitors):
+        """Called after the detector's monitor topology changed."""
+
+    def health(self):
+        """Runtime health as a dict, or None if the backend does not track it."""
+        return None
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
+
+_BACKENDS = {}
+
+
+def register_backend(cls):
+    """Class decorator: make a backend selectable by name."""
+    _BACKENDS[cls.name] = cls
+    return cls
+
+
+def get_backend_class(name):
+    return _BACKENDS.get(name)
+
+
+def registered_backends():
+    return dict(_BACKENDS)
+
+
+def required_capabilities(scope="system", controller=True, rawinput=False):
+    required = {KEYBOARD, MOUSE}
+    if scope == "per-monitor":
+        required.add(POINTER_POSITION)
+    if controller:
+        required.add(CONTROLLER)
+        if rawinput:
+            required.add(HID)
+    return required
+
+
+def select_backends(scope="system", controller=True, rawinput=False, prefer="auto", candidates=None):
+    """Return the cheapest list of backend classes covering the scope.
+
+    ``prefer`` is ``"auto"`` or a comma-separated list of backend names that
+    must be included (e.g. ``"hooks"``). Capabilities that no available
+    backend provides are dropped with a log message rather than failing,
+    matching the detector's graceful-degradation behaviour.
+    """
+    if candidates is None:
+        candidates = [cls for cls in _BACKENDS.values() if cls.available()]
+    pinned = []
+    if prefer and prefer != "auto":
+        for name in str(prefer).split(","):
+            cls = _BACKENDS.get(name.strip())
+            if cls is None or cls not in candidates:
+                logging.warning(f"Input backend '{name.strip()}' not available, choosing automatically")
+                continue
+            pinned.append(cls)
+    optional = [cls for cls in candidates if cls.auto_select and cls not in pinned]
+
+    required = required_capabilities(scope, controller, rawinput)
+    coverable = set().union(*(cls.provides for cls in pinned + optional)) if pinned or optional else set()
+    missing = required - coverable
+    if missing:
+        logging.info(f"No input backend provides {sorted(missing)} on this system")
+        required -= missing
+
+    best = None
+    for count in range(len(optional) + 1):
+        for combo in itertools.combinations(optional, count):
+            chosen = pinned + list(combo)
+            covered = set().union(*(cls.provides for cls in chosen)) if chosen else set()
+            if not required <= covered:
+                continue
+            cost = sum(cls.cost.score for cls in chosen)
+            if best is None or (cost, len(chosen)) < best[0]:
+                best = ((cost, len(chosen)), chosen)
+    return best[1] if best else pinned
+
+
+# --- Windows backends ---
+
+@register_backend
+class HooksBackend(InputBackend):
+    """pynput low-level mouse and keyboard hooks (Windows, X11, macOS).
+
+    Every callback is timed against ``LATENCY_BUDGET_MS``; Windows silently
+    removes low-level hooks whose callbacks are slow. A watchdog compares the
+    last callback with the system last-input tick every ``WATCHDOG_INTERVAL``
+    seconds and re-installs the listeners if their threads died or the OS
+    saw input that the hooks did not, on two checks in a row.
+    """
+    name = "hooks"
+    provides = frozenset({KEYBOARD, MOUSE, POINTER_POSITION})
+    cost = BackendCost("event", 0.2, 3, True)
+    LATENCY_BUDGET_MS = 1.0
+    WATCHDOG_INTERVAL = 5.0
+    DEAD_AFTER = 2.0  # system tick ahead of the hooks by this much counts as a miss
+
+    @classmethod
+    def available(cls):
+        try:
+            from pynput import mouse, keyboard  # noqa: F401
+            return True
+        except Exception:
+            return False
+
+    def __init__(self, detector, **options):
+        super().__init__(detector, **options)
+        from perf_stats import LatencyStats
+        self._mouse_listener = None
+        self._keyboard_listener = None
+        self._last_mouse_pos = (0, 0)
+        self._tick = None
+        self._watchdog = None
+        self._wake = threading.Event()
+        self._running = False
+        self._misses = 0
+        self._last_over_budget_log = 0.0
+        self.latency = LatencyStats(self.LATENCY_BUDGET_MS)
+        self.last_callback = time.monotonic()
+        self.reinstalls = 0
+        self.dead_detections = 0
+
+    def _callbacks(self):
+        """The four hook callbacks, each timed against the latency budget."""
+        push = self.detector._mark_input
+        stats = self.latency
+        clock = time.monotonic
+        perf = time.perf_counter_ns
+
+        def finish(t0):
+            if stats.record(perf() - t0):
+                now = clock()
+                if now - self._last_over_budget_log > 60:
+                    self._last_over_budget_log = now
+                    logging.warning(f"Input hook callback over its {self.LATENCY_BUDGET_MS} ms budget "
+                                    f"({stats.over_budget} times so far)")
+
+        # Track last mouse position to filter synthetic/background events
+        def on_mouse_move(x, y):
+            t0 = perf()
+            self.last_callback = clock()
+            # Only reset idle if mouse position changes by at least 2 pixels
+            last_x, last_y = self._last_mouse_pos
+            if abs(x - last_x) >= 2 or abs(y - last_y) >= 2:
+                self._last_mouse_pos = (x, y)
+                push(x, y, MOUSE)
+            finish(t0)
+
+        def on_mouse_click(x, y, button, pressed):
+            on_mouse_move(x, y)
+
+        def on_mouse_scroll(x, y, dx, dy):
+            on_mouse_move(x, y)
+
+        def on_keyboard_event(*args, **kwargs):
+            t0 = perf()
+            self.last_callback = clock()
+            push(kind=KEYBOARD)
+            finish(t0)
+
+        return on_mouse_move, on_mouse_click, on_mouse_scroll, on_keyboard_event
+
+    def _make_listeners(self):
+        from pynput import mouse, keyboard
+        on_move, on_click, on_scroll, on_key = self._callbacks()
+        return (
+            mouse.Listener(on_move=on_move, on_click=on_click, on_scroll=on_scroll),
+            keyboard.Listener(on_press=on_key, on_release=on_key),
+        )
+
+    def _install(self):
+        self._mouse_listener, self._keyboard_listener = self._make_listeners()
+        self._mouse_listener.start()
+        self._keyboard_listener.start()
+
+    def _uninstall(self):
+        for listener in (self._mouse_listener, self._keyboard_listener):
+            if listener is not None:
+                try:
+                    listener.stop()
+                except Exception:
+                    pass
+        self._mouse_listener = self._keyboard_listener = None
+
+    def start(self):
+        self._install()
+        self._running = True
+        # The system last-input tick is the reference for missed input
+        for cls in (LastInputInfoBackend, X11IdleBackend):
+            if cls.available():
+                try:
+                    tick = cls(self.detector)
+                    tick.start()
+                    self._tick = tick
+                except Exception:
+                    pass
+                break
+        self._watchdog = threading.Thread(target=self._watch, daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        self._uninstall()
+        if self._tick is not None:
+            self._tick.stop()
+
+    def _watch(self):
+        while not self._wake.wait(self.WATCHDOG_INTERVAL):
+            try:
+                system_last = self._tick.last_input() if self._tick is not None else None
+                self.check_health(system_last)
+            except Exception as e:
+                logging.debug(f"Hook watchdog check failed: {e}")
+
+    def listeners_alive(self):
+        return all(l is not None and l.is_alive() for l in (self._mouse_listener, self._keyboard_listener))
+
+    def check_health(self, system_last=None):
+        """One watchdog check; re-installs the hooks and returns True if they are dead."""
+        if not self._running:
+            return False
+        dead = not self.listeners_alive()
+        if not dead and system_last is not None and system_last - self.last_callback > self.DEAD_AFTER:
+            # The OS saw input the hooks did not; one miss can be a race
+            self._misses += 1
+            dead = self._misses >= 2
+        else:
+            self._misses = 0
+        if dead:
+            self.dead_detections += 1
+            self._misses = 0
+            logging.warning("Input hooks stopped receiving events; re-installing them")
+            self._uninstall()
+            self._install()
+            self.reinstalls += 1
+            self.last_callback = time.monotonic()
+        return dead
+
+    def health(self):
+        return {
+            "alive": self.listeners_alive(),
+            "last_callback_age": time.monotonic() - self.last_callback,
+            "reinstalls": self.reinstalls,
+            "dead_detections": self.dead_detections,
+            "latency": self.latency.summary(),
+        }
+
+
+@register_backend
+class LastInputInfoBackend(InputBackend):
+    """GetLastInputInfo: system-wide last input tick, read only at deadlines."""
+    name = "lastinput"
+    provides = frozenset({KEYBOARD, MOUSE})
+    cost = BackendCost("pull", 0, 0, False)
+    platforms = ("win32",)
+
+    def last_input(self, key="system"):
+        from monitor_activity import _get_system_idle_seconds
+        sys_idle = _get_system_idle_seconds()
+        if sys_idle:
+            return time.monotonic() - sys_idle
+        return None
+
+
+@register_backend
+class XInputBackend(InputBackend):
+    """XInput controller polling (GamepadWatcher).
+
+    Declared at the idle rate: with no controller attached the four empty
+    slots back off to one poll every few seconds.
+    """
+    name = "xinput"
+    provides = frozenset({CONTROLLER})
+    cost = BackendCost("poll", 1, 1, False)
+    platforms = ("win32",)
+
+    def __init__(self, detector, **options):
+        super().__init__(detector, **options)
+        self._watcher = None
+
+    def start(self):
+        from monitor_activity import GamepadWatcher
+        self._watcher = GamepadWatcher(
+            lambda: self.detector._mark_input(kind=CONTROLLER),
+            self.options.get("stick_deadzone", 7849),
+            self.options.get("trigger_threshold", 30))
+        self._watcher.start()
+        logging.info("Gamepad watcher started")
+
+    def stop(self):
+        if self._watcher:
+            self._watcher.stop()
+
+    def device_changed(self):
+        if self._watcher:
+            self._watcher.notify_device_change()
+
+    def slot_stats(self):
+        return self._watcher.get_slot_stats() if self._watcher else []
+
+
+@register_backend
+class RawInputBackend(InputBackend):
+    """Raw Input HID watcher for non-XInput controllers (RawInputWatcher)."""
+    name = "rawinput"
+    provides = frozenset({HID})
+    cost = BackendCost("event", 0, 1, False)
+    platforms = ("win32",)
+
+    def __init__(self, detector, **options):
+        super().__init__(detector, **options)
+        self._watcher = None
+
+    def start(self):
+        from monitor_activity import RawInputWatcher
+        self._watcher = RawInputWatcher(
+            lambda: self.detector._mark_input(kind=HID),
+            on_device_change=self.detector._notify_device_change,
+            stick_deadzone=self.options.get("stick_deadzone", 7849),
+            trigger_threshold=self.options.get("trigger_threshold", 30))
+        self._watcher.start()
+        logging.info("Raw Input watcher started")
+
+    def stop(self):
+        if self._watcher:
+            self._watcher.stop()
+
+
+# --- Capture process ---
+
+@register_backend
+class CaptureProcessBackend(InputBackend):
+    """Reads input captured by a dedicated child process (input_capture.py).
+
+    The push backends named in the ``capture_backends`` option (default: the
+    usual automatic choice) run in the child; this side only reads a shared
+    memory block when the idle engine asks, so it costs no thread and no
+    work per input event in the service.
+    """
+    name = "process"
+    provides = frozenset({KEYBOARD, MOUSE, POINTER_POSITION, CONTROLLER, HID})
+    cost = BackendCost("pull", 0, 0, False)
+    auto_select = False
+
+    @classmethod
+    def available(cls):
+        try:
+            from multiprocessing import shared_memory  # noqa: F401
+            return True
+        except Exception:
+            return False
+
+    def __init__(self, detector, **options):
+        super().__init__(detector, **options)
+        self._capture = None
+
+    def start(self):
+        from input_capture import InputCaptureProcess
+        d = self.detector
+        self._capture = InputCaptureProcess(d.monitors, {
+            "scope": d.scope,
+            "controller": d.controller,
+            "controller_rawinput": d.controller_rawinput,
+            "stick_deadzone": self.options.get("stick_deadzone", 7849),
+            "trigger_threshold": self.options.get("trigger_threshold", 30),
+            "backend": self.options.get("capture_backends", "auto"),
+        })
+        self._capture.start()
+        logging.info("Input capture process started")
+
+    def stop(self):
+        if self._capture:
+            self._capture.stop()
+
+    def set_monitors(self, monitors):
+        if self._capture:
+            self._capture.set_monitors(monitors)
+
+    def last_input(self, key="system"):
+        return self._capture.last_input(key) if self._capture else None
+
+    def last_input_by_class(self):
+        """``{device class: timestamp}`` as published by the child."""
+        snap = self._capture.read() if self._capture else None
+        if snap is None:
+            return {}
+        from input_capture import DEVICE_CLASSES
+        return {c: snap.times[c] for c in DEVICE_CLASSES if c in snap.times}
+
+    def health(self):
+        snap = self._capture.read() if self._capture else None
+        if snap is None:
+            return {"alive": False, "restarts": self._capture.restarts if self._capture else 0}
+        return {
+            "alive": self._capture.alive(),
+            "pid": snap.pid,
+            "heartbeat_age": time.monotonic() - snap.heartbeat,
+            "restarts": self._capture.restarts,
+            "hooks": snap.hooks,
+        }
+
+
+# --- Linux backends ---
+
+@register_backend
+class EvdevBackend(InputBackend):
+    """Linux evdev devices (/dev/input/event*): keyboards, mice and gamepads.
+
+    Needs the optional ``evdev`` package and read access to the device nodes
+    (usually membership of the ``input`` group). One thread blocks in
+    ``select()``; each readable batch produces at most one activity event.
+    """
+    name = "evdev"
+    provides = frozenset({KEYBOARD, MOUSE, CONTROLLER, HID})
+    cost = BackendCost("event", 0, 1, True)
+    platforms = ("linux",)
+
+    @classmethod
+    def available(cls):
+        if not super().available():
+            return False
+        try:
+            import evdev
+            return any(os.access(path, os.R_OK) for path in evdev.list_devices())
+        except Exception:
+            return False
+
+    def __init__(self, detector, **options):
+        super().__init__(detector, **options)
+        self._devices = []
+        self._thread = None
+        self._wake_r = self._wake_w = None
+        self._running = False
+        self._abs_last = {}
+
+    def start(self):
+        import evdev
+        from evdev import ecodes
+        for path in evdev.list_devices():
+            try:
+                dev = evdev.InputDevice(path)
+            except Exception:
+                continue
+            caps = dev.capabilities()
+            if ecodes.EV_KEY in caps or ecodes.EV_REL in caps or ecodes.EV_ABS in caps:
+                self._devices.append(dev)
+            else:
+                dev.close()
+        self._wake_r, self._wake_w = os.pipe()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="EvdevBackend", daemon=True)
+        self._thread.start()
+        logging.info(f"evdev backend watching {len(self._devices)} devices")
+
+    def stop(self):
+        self._running = False
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b"x")
+            except OSError:
+                pass
+
+    def _abs_moved(self, dev, event):
+        """Apply stick deadzone / trigger threshold to absolute axes."""
+        try:
+            info = dev.absinfo(event.code)
+        except Exception:
+            return True
+        span = max(1, info.max - info.min)
+        if info.min < 0 or span > 255:
+            # Stick-like axis: same 16-bit deadzone semantics as GamepadWatcher
+            threshold = span * self.options.get("stick_deadzone", 7849) / 65535.0
+        else:
+            threshold = span * self.options.get("trigger_threshold", 30) / 255.0
+        key = (dev.path, event.code)
+        last = self._abs_last.get(key)
+        self._abs_last[key] = event.value
+        return last is not None and abs(event.value - last) > threshold
+
+    def _run(self):
+        import select
+        from evdev import ecodes
+        fds = {dev.fd: dev for dev in self._devices}
+        try:
+            while self._running:
+                readable, _, _ = select.select(list(fds) + [self._wake_r], [], [])
+                activity = None
+                for fd in readable:
+                    if fd == self._wake_r:
+                        continue
+                    dev = fds[fd]
+                    try:
+                        for event in dev.read():
+                            if event.type == ecodes.EV_KEY:
+                                activity = KEYBOARD
+                            elif event.type == ecodes.EV_REL:
+                                activity = MOUSE
+                            elif event.type == ecodes.EV_ABS and self._abs_moved(dev, event):
+                                activity = CONTROLLER
+                    except OSError:
+                        # Device unplugged
+                        fds.pop(fd, None)
+                if activity:
+                    self.detector._mark_input(kind=activity)
+        finally:
+            for dev in self._devices:
+                try:
+                    dev.close()
+                except Exception:
+                    pass
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+
+
+class XScreenSaverInfo(ctypes.Structure):
+    _fields_ = [
+        ("window", ctypes.c_ulong),
+        ("state", ctypes.c_int),
+        ("kind", ctypes.c_int),
+        ("til_or_since", ctypes.c_ulong),
+        ("idle", ctypes.c_ulong),
+        ("eventMask", ctypes.c_ulong),
+    ]
+
+
+@register_backend
+class X11IdleBackend(InputBackend):
+    """X11 MIT-SCREEN-SAVER idle time: the Linux analogue of GetLastInputInfo."""
+    name = "x11idle"
+    provides = frozenset({KEYBOARD, MOUSE})
+    cost = BackendCost("pull", 0, 0, False)
+    platforms = ("linux",)
+
+    @classmethod
+    def available(cls):
+        if not super().available() or not os.environ.get("DISPLAY"):
+            return False
+        try:
+            import ctypes.util
+            return bool(ctypes.util.find_library("Xss") and ctypes.util.find_library("X11"))
+        except Exception:
+            return False
+
+    def __init__(self, detector, **options):
+        super().__init__(detector, **options)
+        self._lock = threading.Lock()
+        self._xlib = self._xss = self._display = self._info = None
+
+    def start(self):
+        import ctypes.util
+        self._xlib = ctypes.cdll.LoadLibrary(ctypes.util.find_library("X11"))
+        self._xss = ctypes.cdll.LoadLibrary(ctypes.util.find_library("Xss"))
+        self._xlib.XOpenDisplay.restype = ctypes.c_void_p
+        self._xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        self._xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        self._xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self._xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self._xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(XScreenSaverInfo)
+        self._xss.XScreenSaverQueryInfo.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(XScreenSaverInfo)]
+        self._display = self._xlib.XOpenDisplay(None)
+        if self._display:
+            self._info = self._xss.XScreenSaverAllocInfo()
+
+    def stop(self):
+        with self._lock:
+            if self._display:
+                self._xlib.XCloseDisplay(self._display)
+                self._display = None
+
+    def last_input(self, key="system"):
+        with self._lock:
+            if not self._display or not self._info:
+                return None
+            root = self._xlib.XDefaultRootWindow(self._display)
+            if not self._xss.XScreenSaverQueryInfo(self._display, root, self._info):
+                return None
+            return time.monotonic() - self._info.contents.idle / 1000.0
+
+
+# --- Tests and benchmarks ---
+
+@register_backend
+class SyntheticBackend(InputBackend):
+    """Scriptable backend for tests and benchmarks; never chosen automatically.
+
+    ``emit()`` pushes an event like a hook would; ``set_idle()`` sets the
+    value reported through ``last_input()`` like an OS idle tick.
+    """
+    name = "synthetic"
+    provides = frozenset({KEYBOARD, MOUSE, POINTER_POSITION, CONTROLLER, HID})
+    cost = BackendCost("event", 0, 0, False)
+    auto_select = False
+
+    def __init__(self, detector, **options):
+        super().__init__(detector, **options)
+        self._last = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def emit(self, x=None, y=None, kind=None):
+        self.detector._mark_input(x, y, kind)
+
+    def set_idle(self, seconds):
+        self._last = None if seconds is None else time.monotonic() - seconds
+
+    def last_input(self, key="system"):
+        return self._last
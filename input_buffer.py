@@ -0,0 +1,119 @@
+"""
+Coalescing input buffer for Display Control+
+Hook callbacks write the latest timestamp/position into a preallocated ring
+without taking a lock; a consumer thread drains it in batches at a bounded rate.
+"""
+import itertools
+import logging
+import threading
+import time
+
+
+class CoalescingInputBuffer:
+    """Single-consumer ring buffer fed by any number of hook threads.
+
+    ``push()`` is the only method called from hook callbacks. It claims a
+    sequence number (``next()`` on an itertools counter is atomic under the
+    GIL), writes the slot and publishes it by stamping the sequence number
+    last. The consumer reads slots whose stamp matches the sequence it
+    expects, so a half-written slot is simply picked up on the next drain.
+    If producers lap the consumer, the oldest events are dropped: only the
+    most recent input matters for idle detection.
+
+    ``on_batch(events)`` receives a list of ``(when, x, y)`` tuples (``x`` and
+    ``y`` are None for keyboard/controller input) at most once per
+    ``min_interval`` seconds, and only while input is arriving.
+    """
+
+    def __init__(self, on_batch, capacity=256, min_interval=0.05, clock=time.monotonic):
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._mask = size - 1
+        self._times = [0.0] * size
+        self._xs = [None] * size
+        self._ys = [None] * size
+        self._stamps = [-1] * size
+        self._seq = itertools.count()
+        self._read = 0
+        self._pending = threading.Event()
+        self._drain_lock = threading.Lock()  # consumer side only, never taken by push()
+        self._clock = clock
+        self.on_batch = on_batch
+        self.min_interval = min_interval
+        self._running = False
+        self._thread = None
+        self.batches = 0
+        self.dropped = 0
+
+    @property
+    def capacity(self):
+        return self._mask + 1
+
+    def push(self, x=None, y=None, when=None):
+        """Record one input event. Lock-free; safe from any hook thread."""
+        seq = next(self._seq)
+        slot = seq & self._mask
+        self._times[slot] = self._clock() if when is None else when
+        self._xs[slot] = x
+        self._ys[slot] = y
+        self._stamps[slot] = seq
+        if not self._pending.is_set():
+            self._pending.set()
+
+    def drain(self):
+        """Return all published events since the last drain (consumer only)."""
+        events = []
+        seq = self._read
+        mask = self._mask
+        stamps = self._stamps
+        while True:
+            slot = seq & mask
+            stamp = stamps[slot]
+            if stamp < seq:
+                break
+            if stamp > seq:
+                # Lapped by producers: skip to the oldest surviving event
+                self.dropped += stamp - seq
+                seq = stamp
+                continue
+            events.append((self._times[slot], self._xs[slot], self._ys[slot]))
+            # A producer may have re-stamped the slot while we read it
+            if stamps[slot] != seq:
+                events.pop()
+                continue
+            seq += 1
+        self._read = seq
+        return events
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="CoalescingInputBuffer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._pending.set()
+
+    def flush(self):
+        """Drain and deliver pending events on the calling thread."""
+        with self._drain_lock:
+            events = self.drain()
+            if events:
+                self.batches += 1
+                self.on_batch(events)
+
+    def _run(self):
+        while self._running:
+            self._pending.wait()
+            if not self._running:
+                return
+            self._pending.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Input batch handler failed: {e}")
+            # Bound the drain rate; events arriving meanwhile coalesce in the ring
+            time.sleep(self.min_interval)
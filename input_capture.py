@@ -0,0 +1,227 @@
+"""
+Input capture subprocess for Display Control+
+Runs the hook, XInput and Raw Input backends in a small dedicated process, so
+GIL contention from Tk/PIL work in the service never delays a low-level hook
+callback. The child publishes last-input timestamps (system, per device class
+and per monitor) into a SeqlockBlock that the service reads without locks.
+
+Timestamps are ``time.monotonic()`` values, which are system-wide on Windows
+and Linux and so comparable across processes.
+"""
+import logging
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+
+from monitor_index import monitor_key
+from shared_block import SeqlockBlock
+
+MAGIC = b"DCIC"
+VERSION = 2
+MAX_MONITORS = 16
+DEVICE_CLASSES = ("keyboard", "mouse", "controller", "hid")
+HEARTBEAT_INTERVAL = 1.0
+STALE_AFTER = 5.0
+RESTART_BACKOFF = 10.0
+
+# magic, version, writer pid, monitor count, heartbeat, system,
+# one timestamp per device class, monitor geometries, per-monitor timestamps,
+# then hook health: installed, alive, reinstalls, callbacks, over budget and
+# callback latency p50/p99/p99.9/max in microseconds
+LAYOUT = (
+    "<4sIII" + "d" + "d" + "d" * len(DEVICE_CLASSES)
+    + "i" * (4 * MAX_MONITORS) + "d" * MAX_MONITORS
+    + "BBIQQ" + "dddd"
+)
+
+CaptureSnapshot = namedtuple("CaptureSnapshot", "pid heartbeat times hooks")
+
+
+def pack_snapshot(snapshot, geometries, pid=None, heartbeat=None, hooks=None):
+    """Flatten a detector snapshot (and HooksBackend.health()) into LAYOUT field order."""
+    geometries = list(geometries)[:MAX_MONITORS]
+    flat = []
+    times = []
+    for g in geometries:
+        flat.extend(int(v) for v in g)
+        times.append(snapshot.get(monitor_key(g), 0.0) or 0.0)
+    flat.extend([0] * (4 * MAX_MONITORS - len(flat)))
+    times.extend([0.0] * (MAX_MONITORS - len(times)))
+    if hooks:
+        lat = hooks["latency"]
+        health = (1, int(bool(hooks["alive"])), hooks["reinstalls"], lat["count"], lat["over_budget"],
+                  lat["p50_us"], lat["p99_us"], lat["p999_us"], lat["max_us"])
+    else:
+        health = (0, 0, 0, 0, 0, 0.0, 0.0, 0.0, 0.0)
+    return (
+        MAGIC, VERSION, os.getpid() if pid is None else pid, len(geometries),
+        time.monotonic() if heartbeat is None else heartbeat,
+        snapshot.get("system", 0.0) or 0.0,
+        *[snapshot.get(c, 0.0) or 0.0 for c in DEVICE_CLASSES],
+        *flat, *times, *health,
+    )
+
+
+def unpack_snapshot(record):
+    """Inverse of pack_snapshot: a CaptureSnapshot, or None.
+
+    ``times`` maps ``"system"``, the device class names and monitor keys to
+    timestamps; 0.0 means no input seen yet and is left out. ``hooks`` is
+    the child's hook health, or None if it runs no hooks.
+    """
+    if record is None or record[0] != MAGIC or record[1] != VERSION:
+        return None
+    pid, count, heartbeat, system = record[2], record[3], record[4], record[5]
+    pos = 6
+    times = {"system": system}
+    for cls in DEVICE_CLASSES:
+        times[cls] = record[pos]
+        pos += 1
+    geoms = record[pos:pos + 4 * MAX_MONITORS]
+    pos += 4 * MAX_MONITORS
+    for i in range(min(count, MAX_MONITORS)):
+        times[monitor_key(geoms[4 * i:4 * i + 4])] = record[pos + i]
+    pos += MAX_MONITORS
+    installed, alive, reinstalls, callbacks, over_budget, p50, p99, p999, worst = record[pos:pos + 9]
+    hooks = None
+    if installed:
+        hooks = {
+            "alive": bool(alive), "reinstalls": reinstalls,
+            "latency": {"count": callbacks, "over_budget": over_budget,
+                        "p50_us": p50, "p99_us": p99, "p999_us": p999, "max_us": worst},
+        }
+    return CaptureSnapshot(pid, heartbeat, {k: v for k, v in times.items() if v}, hooks)
+
+
+def capture_main(block_name, monitors, settings, conn):
+    """Child process entry point (top-level so it can be spawned)."""
+    from monitor_activity import MonitorActivityDetector
+    block = SeqlockBlock(LAYOUT, name=block_name)
+    detector = MonitorActivityDetector(
+        monitors,
+        scope=settings.get("scope", "system"),
+        controller=settings.get("controller", True),
+        controller_rawinput=settings.get("controller_rawinput", False),
+        controller_stick_deadzone=settings.get("stick_deadzone", 7849),
+        controller_trigger_threshold=settings.get("trigger_threshold", 30),
+        backend=settings.get("backend", "auto"),
+    )
+
+    def publish():
+        hooks = detector.get_backend("hooks")
+        block.write(*pack_snapshot(
+            detector._last_input_snapshot(), detector._index.geometries,
+            hooks=hooks.health() if hooks is not None else None))
+
+    detector.on_activity = publish
+    detector.start()
+    logging.info(f"Input capture process {os.getpid()} running backends {[b.name for b in detector._backends]}")
+    try:
+        publish()
+        while True:
+            if conn.poll(HEARTBEAT_INTERVAL):
+                msg = conn.recv()
+                if msg[0] == "stop":
+                    break
+                if msg[0] == "monitors":
+                    detector.set_monitors(msg[1])
+            # Heartbeat, and picks up pull backends that never push
+            publish()
+    except (EOFError, OSError):
+        # Service went away
+        pass
+    finally:
+        detector.stop()
+        block.close()
+
+
+class InputCaptureProcess:
+    """Service side: owns the shared block and the capture child.
+
+    ``last_input(key)`` only reads shared memory. A child whose heartbeat
+    stops is restarted (at most once per ``RESTART_BACKOFF`` seconds).
+    """
+
+    def __init__(self, monitors, settings):
+        self.monitors = monitors
+        self.settings = dict(settings)
+        self._block = None
+        self._process = None
+        self._conn = None
+        self._last_start = 0.0
+        self.restarts = 0
+
+    def start(self):
+        self._block = SeqlockBlock(LAYOUT, create=True)
+        self._spawn()
+
+    def _spawn(self):
+        parent, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=capture_main,
+            args=(self._block.name, self.monitors, self.settings, child),
+            daemon=True,
+        )
+        self._process.start()
+        child.close()
+        self._conn = parent
+        self._last_start = time.monotonic()
+
+    def read(self):
+        """The latest CaptureSnapshot from the block, or None."""
+        if self._block is None:
+            return None
+        return unpack_snapshot(self._block.read())
+
+    def alive(self, now=None):
+        snap = self.read()
+        now = time.monotonic() if now is None else now
+        return snap is not None and now - snap.heartbeat < STALE_AFTER
+
+    def last_input(self, key="system"):
+        snap = self.read()
+        now = time.monotonic()
+        if snap is None or now - snap.heartbeat >= STALE_AFTER:
+            self._check_child(now)
+            if snap is None:
+                return None
+        return snap.times.get(key)
+
+    def _check_child(self, now):
+        if now - self._last_start < RESTART_BACKOFF:
+            return
+        logging.warning("Input capture process not responding; restarting it")
+        self._stop_child()
+        self.restarts += 1
+        self._spawn()
+
+    def set_monitors(self, monitors):
+        self.monitors = monitors
+        try:
+            self._conn.send(("monitors", monitors))
+        except Exception:
+            pass
+
+    def _stop_child(self):
+        if self._conn is not None:
+            try:
+                self._conn.send(("stop",))
+            except Exception:
+                pass
+        if self._process is not None:
+            self._process.join(2)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(1)
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+        self._process = None
+
+    def stop(self):
+        self._stop_child()
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
@@ -1,4 +1,6 @@
+import multiprocessing
 import overlay_bg
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     overlay_bg.run_background_overlay()
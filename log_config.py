@@ -12,7 +12,7 @@ APP_DIR_NAME = "DisplayControlPlus"
 def get_appdata_dir():
     """Return the %LOCALAPPDATA% directory for this app, ensure it exists."""
     # Prefer LOCALAPPDATA env var; fall back to user profile expansion
-    base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
     app_dir = os.path.join(base, APP_DIR_NAME)
     os.makedirs(app_dir, exist_ok=True)
     return app_dir
@@ -1,18 +1,35 @@
 import logging
 import time
 import threading
-from pynput import mouse, keyboard
 from log_config import setup_logging
+from idle_engine import IdleDeadlineEngine
+from input_buffer import CoalescingInputBuffer
+from monitor_index import MonitorIndex
+from hid_reports import HidReportFilter
+import input_backends
 import ctypes
 from ctypes import wintypes
 
 # Win32 constants for Raw Input and message loop
 RIDEV_INPUTSINK = 0x00000100
+RIDEV_DEVNOTIFY = 0x00002000
 RIM_TYPEMOUSE = 0
 RIM_TYPEKEYBOARD = 1
 RIM_TYPEHID = 2
 WM_INPUT = 0x00FF
+WM_INPUT_DEVICE_CHANGE = 0x00FE
 PM_REMOVE = 0x0001
+QS_ALLINPUT = 0x04FF
+MWMO_INPUTAVAILABLE = 0x0004
+INFINITE = 0xFFFFFFFF
+WAIT_OBJECT_0 = 0x00000000
+WAIT_FAILED = 0xFFFFFFFF
+RID_INPUT = 0x10000003
+RIDI_DEVICEINFO = 0x2000000B
+GIDC_REMOVAL = 2
+# Resume re-check interval for pull-only input, only while an idle timer has
+# fired (an overlay is up): keeps input-to-hide well under 50 ms
+PULL_RESUME_POLL = 0.02
 
 class RAWINPUTDEVICE(ctypes.Structure):
     _fields_ = [
@@ -22,6 +39,33 @@ class RAWINPUTDEVICE(ctypes.Structure):
         ("hwndTarget", wintypes.HWND),
     ]
 
+class RAWINPUTHEADER(ctypes.Structure):
+    _fields_ = [
+        ("dwType", wintypes.DWORD),
+        ("dwSize", wintypes.DWORD),
+        ("hDevice", wintypes.HANDLE),
+        ("wParam", wintypes.WPARAM),
+    ]
+
+class RAWHID(ctypes.Structure):
+    _fields_ = [("dwSizeHid", wintypes.DWORD), ("dwCount", wintypes.DWORD)]
+
+class RID_DEVICE_INFO_HID(ctypes.Structure):
+    _fields_ = [
+        ("dwVendorId", wintypes.DWORD),
+        ("dwProductId", wintypes.DWORD),
+        ("dwVersionNumber", wintypes.DWORD),
+        ("usUsagePage", wintypes.USHORT),
+        ("usUsage", wintypes.USHORT),
+    ]
+
+class _RID_DEVICE_INFO_UNION(ctypes.Union):
+    # The keyboard member (6 DWORDs) is the largest
+    _fields_ = [("hid", RID_DEVICE_INFO_HID), ("_size", wintypes.DWORD * 6)]
+
+class RID_DEVICE_INFO(ctypes.Structure):
+    _fields_ = [("cbSize", wintypes.DWORD), ("dwType", wintypes.DWORD), ("u", _RID_DEVICE_INFO_UNION)]
+
 class MSG(ctypes.Structure):
     _fields_ = [
         ("hwnd", wintypes.HWND),
@@ -32,7 +76,8 @@ class MSG(ctypes.Structure):
         ("pt", wintypes.POINT),
     ]
 
-WNDPROCTYPE = ctypes.WINFUNCTYPE(ctypes.c_long, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+# WINFUNCTYPE only exists on Windows; the structures stay importable elsewhere
+WNDPROCTYPE = getattr(ctypes, "WINFUNCTYPE", ctypes.CFUNCTYPE)(ctypes.c_long, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
 
 class WNDCLASS(ctypes.Structure):
     _fields_ = [
@@ -48,36 +93,156 @@ class WNDCLASS(ctypes.Structure):
         ("lpszClassName", wintypes.LPCWSTR),
     ]
 
+def _iter_hid_reports(address, header):
+    """Yield each HID report (bytes) of the RAWINPUT record at ``address``."""
+    hid = RAWHID.from_address(address + ctypes.sizeof(RAWINPUTHEADER))
+    size = hid.dwSizeHid
+    count = hid.dwCount
+    if not size or size * count + ctypes.sizeof(RAWINPUTHEADER) + ctypes.sizeof(RAWHID) > header.dwSize:
+        return
+    data = ctypes.string_at(address + ctypes.sizeof(RAWINPUTHEADER) + ctypes.sizeof(RAWHID), size * count)
+    for i in range(count):
+        yield data[i * size:(i + 1) * size]
+
+
+def _iter_raw_input_records(buf, nbytes, count):
+    """Yield ``(offset, RAWINPUTHEADER)`` for ``count`` records read by GetRawInputBuffer.
+
+    Records are pointer-size aligned, as NEXTRAWINPUTBLOCK does in C.
+    """
+    align = ctypes.sizeof(ctypes.c_void_p)
+    base = ctypes.addressof(buf)
+    offset = 0
+    for _ in range(count):
+        if offset + ctypes.sizeof(RAWINPUTHEADER) > nbytes:
+            return
+        header = RAWINPUTHEADER.from_address(base + offset)
+        yield offset, header
+        offset += (header.dwSize + align - 1) & ~(align - 1)
+
+
 class RawInputWatcher:
-    """Minimal Raw Input watcher to treat any HID input as activity (DInput fallback)."""
-    def __init__(self, on_input):
+    """Raw Input watcher to treat HID input as activity (DInput fallback).
+
+    The message pump blocks in MsgWaitForMultipleObjectsEx on the thread's
+    queue and a stop event, so it never wakes without input. Pending
+    WM_INPUT reports are drained in batches with GetRawInputBuffer and each
+    batch produces one ``on_input()`` call. After a batch the pump holds off
+    for ``batch_interval`` seconds so high-rate HID devices coalesce.
+    Device arrival and removal are reported through ``on_device_change()``.
+
+    HID reports go through a HidReportFilter, so controllers that stream
+    gyro/accelerometer reports only count as activity when buttons, sticks
+    (past ``stick_deadzone``) or triggers (past ``trigger_threshold``) change.
+    """
+    BUFFER_BYTES = 16384
+
+    def __init__(self, on_input, batch_interval=0.01, on_device_change=None, stick_deadzone=7849, trigger_threshold=30):
         self.on_input = on_input
+        self.on_device_change = on_device_change
+        self.filter = HidReportFilter(stick_deadzone, trigger_threshold)
+        self.batch_interval = batch_interval
         self._running = False
         self._thread = None
         self._hwnd = None
         self._proc = None
+        self._stop_event = None
+        self._wm_input_seen = False
+        self._msg_buf = None
+        self.wakeups = 0
+        self.batches = 0
+        self.reports = 0
 
     def start(self):
+        kernel32 = ctypes.windll.kernel32
+        kernel32.CreateEventW.restype = wintypes.HANDLE
+        # Manual-reset event: stop() wakes the pump from any thread
+        self._stop_event = kernel32.CreateEventW(None, True, False, None)
         self._running = True
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
 
     def stop(self):
         self._running = False
+        if self._stop_event:
+            ctypes.windll.kernel32.SetEvent(self._stop_event)
 
     def _wnd_proc(self, hWnd, msg, wParam, lParam):
         if msg == WM_INPUT:
+            # Reports not taken by GetRawInputBuffer; counted into the current batch
             try:
-                self.on_input()
+                if self._read_wm_input(lParam):
+                    self._wm_input_seen = True
             except Exception:
-                pass
+                self._wm_input_seen = True
+        elif msg == WM_INPUT_DEVICE_CHANGE:
+            if wParam == GIDC_REMOVAL:
+                self.filter.remove_device(lParam)
+            if self.on_device_change:
+                try:
+                    self.on_device_change()
+                except Exception:
+                    pass
         return ctypes.windll.user32.DefWindowProcW(hWnd, msg, wParam, lParam)
 
+    def _is_activity(self, address, header):
+        """Keyboards always count; HID reports only if the filter says so."""
+        if header.dwType != RIM_TYPEHID:
+            return True
+        device = header.hDevice or 0
+        if not self.filter.has_device(device):
+            vendor, product = self._device_ids(device)
+            self.filter.add_device(device, vendor, product)
+        active = False
+        for report in _iter_hid_reports(address, header):
+            # Keep feeding so every report updates the per-device baseline
+            active = self.filter.feed(device, report) or active
+        return active
+
+    @staticmethod
+    def _device_ids(device):
+        info = RID_DEVICE_INFO()
+        info.cbSize = ctypes.sizeof(RID_DEVICE_INFO)
+        size = wintypes.UINT(info.cbSize)
+        res = ctypes.windll.user32.GetRawInputDeviceInfoW(wintypes.HANDLE(device), RIDI_DEVICEINFO, ctypes.byref(info), ctypes.byref(size))
+        if res in (0, 0xFFFFFFFF, -1) or info.dwType != RIM_TYPEHID:
+            return 0, 0
+        return info.u.hid.dwVendorId, info.u.hid.dwProductId
+
+    def _read_wm_input(self, lParam):
+        if self._msg_buf is None:
+            self._msg_buf = (ctypes.c_uint64 * (self.BUFFER_BYTES // 8))()
+        size = wintypes.UINT(ctypes.sizeof(self._msg_buf))
+        res = ctypes.windll.user32.GetRawInputData(
+            wintypes.HANDLE(lParam), RID_INPUT, ctypes.byref(self._msg_buf), ctypes.byref(size), ctypes.sizeof(RAWINPUTHEADER))
+        if res in (0, 0xFFFFFFFF, -1):
+            return False
+        address = ctypes.addressof(self._msg_buf)
+        return self._is_activity(address, RAWINPUTHEADER.from_address(address))
+
+    def _drain_raw_input(self, user32, buf):
+        """Read all queued raw input reports; return ``(reports read, any activity)``."""
+        header_size = ctypes.sizeof(RAWINPUTHEADER)
+        base = ctypes.addressof(buf)
+        total = 0
+        active = False
+        while True:
+            cb = wintypes.UINT(ctypes.sizeof(buf))
+            count = user32.GetRawInputBuffer(ctypes.byref(buf), ctypes.byref(cb), header_size)
+            if count == 0 or count == 0xFFFFFFFF or count < 0:
+                return total, active
+            for offset, header in _iter_raw_input_records(buf, ctypes.sizeof(buf), count):
+                total += 1
+                if self._is_activity(base + offset, header):
+                    active = True
+
     def _run(self):
         try:
             user32 = ctypes.windll.user32
             kernel32 = ctypes.windll.kernel32
             hInstance = kernel32.GetModuleHandleW(None)
+            user32.GetRawInputBuffer.restype = wintypes.UINT
+            user32.MsgWaitForMultipleObjectsEx.restype = wintypes.DWORD
 
             self._proc = WNDPROCTYPE(self._wnd_proc)
             class_name = "DCPlusRawInputCls"
@@ -114,26 +279,45 @@ class RawInputWatcher:
             # Generic Desktop / Gamepad
             rid[0].usUsagePage = 0x01
             rid[0].usUsage = 0x05
-            rid[0].dwFlags = RIDEV_INPUTSINK
+            rid[0].dwFlags = RIDEV_INPUTSINK | RIDEV_DEVNOTIFY
             rid[0].hwndTarget = self._hwnd
             # Generic Desktop / Joystick
             rid[1].usUsagePage = 0x01
             rid[1].usUsage = 0x04
-            rid[1].dwFlags = RIDEV_INPUTSINK
+            rid[1].dwFlags = RIDEV_INPUTSINK | RIDEV_DEVNOTIFY
             rid[1].hwndTarget = self._hwnd
             # Generic Desktop / Keyboard (extra signal)
             rid[2].usUsagePage = 0x01
             rid[2].usUsage = 0x06
-            rid[2].dwFlags = RIDEV_INPUTSINK
+            rid[2].dwFlags = RIDEV_INPUTSINK | RIDEV_DEVNOTIFY
             rid[2].hwndTarget = self._hwnd
             user32.RegisterRawInputDevices(ctypes.byref(rid), 3, ctypes.sizeof(RAWINPUTDEVICE))
 
+            # 8-byte aligned buffer as GetRawInputBuffer requires on 64-bit
+            buf = (ctypes.c_uint64 * (self.BUFFER_BYTES // 8))()
+            handles = (wintypes.HANDLE * 1)(self._stop_event)
             msg = MSG()
             while self._running:
+                res = user32.MsgWaitForMultipleObjectsEx(1, handles, INFINITE, QS_ALLINPUT, MWMO_INPUTAVAILABLE)
+                self.wakeups += 1
+                if res == WAIT_OBJECT_0 or res == WAIT_FAILED or not self._running:
+                    break
+                reports, active = self._drain_raw_input(user32, buf)
+                self._wm_input_seen = False
+                # Everything else (and any WM_INPUT left over) goes through the window proc
                 while user32.PeekMessageW(ctypes.byref(msg), None, 0, 0, PM_REMOVE):
                     user32.TranslateMessage(ctypes.byref(msg))
                     user32.DispatchMessageW(ctypes.byref(msg))
-                time.sleep(0.05)
+                self.reports += reports
+                if active or self._wm_input_seen:
+                    self.batches += 1
+                    try:
+                        self.on_input()
+                    except Exception:
+                        pass
+                if reports or self._wm_input_seen:
+                    # Let the next reports (noise included) pile up; returns at once if stop() is called
+                    kernel32.WaitForSingleObject(self._stop_event, int(self.batch_interval * 1000))
         except Exception:
             # Silent fallback
             pass
@@ -141,6 +325,9 @@ class RawInputWatcher:
             try:
                 if self._hwnd:
                     ctypes.windll.user32.DestroyWindow(self._hwnd)
+                if self._stop_event:
+                    ctypes.windll.kernel32.CloseHandle(self._stop_event)
+                    self._stop_event = None
             except Exception:
                 pass
 
@@ -168,22 +355,67 @@ def get_system_idle_seconds():
     return _get_system_idle_seconds()
 
 
+ERROR_SUCCESS = 0
+ERROR_DEVICE_NOT_CONNECTED = 1167
+XUSER_MAX_COUNT = 4
+
+class XINPUT_GAMEPAD(ctypes.Structure):
+    _fields_ = [
+        ("wButtons", wintypes.WORD),
+        ("bLeftTrigger", ctypes.c_ubyte),
+        ("bRightTrigger", ctypes.c_ubyte),
+        ("sThumbLX", ctypes.c_short),
+        ("sThumbLY", ctypes.c_short),
+        ("sThumbRX", ctypes.c_short),
+        ("sThumbRY", ctypes.c_short),
+    ]
+
+class XINPUT_STATE(ctypes.Structure):
+    _fields_ = [("dwPacketNumber", wintypes.DWORD), ("Gamepad", XINPUT_GAMEPAD)]
+
+
 class GamepadWatcher:
-    """Poll XInput controllers; call on_input() when any change detected."""
-    def __init__(self, on_input, stick_deadzone=7849, trigger_threshold=30):
+    """Poll XInput controllers; call on_input() when any change detected.
+
+    Each slot has its own schedule. A connected slot is polled every
+    ``CONNECTED_INTERVAL`` seconds, and every ``ACTIVE_INTERVAL`` while its
+    sticks or buttons are in use. XInputGetState on an empty slot is slow,
+    so empty slots back off from ``EMPTY_MIN_INTERVAL`` to
+    ``EMPTY_MAX_INTERVAL``; ``notify_device_change()`` rescans them at once.
+    """
+    ACTIVE_INTERVAL = 0.016
+    ACTIVE_HOLD = 1.0
+    CONNECTED_INTERVAL = 0.1
+    EMPTY_MIN_INTERVAL = 1.0
+    EMPTY_MAX_INTERVAL = 8.0
+
+    def __init__(self, on_input, stick_deadzone=7849, trigger_threshold=30, xinput=None, clock=time.monotonic):
         self.on_input = on_input
         self._running = False
         self._thread = None
-        self._xinput = None
-        self._stick_deadzone = int(stick_deadzone)
-        self._trigger_threshold = int(trigger_threshold)
-        for dll in ("xinput1_4.dll", "xinput1_3.dll", "xinput9_1_0.dll"):
-            try:
-                self._xinput = ctypes.windll.LoadLibrary(dll)
-                break
-            except Exception:
-                continue
-        self._last_packets = [0] * 4
+        self._xinput = xinput
+        self._clock = clock
+        self._wake = threading.Event()
+        self._stick_deadzone = max(0, int(stick_deadzone))
+        self._trigger_threshold = max(0, int(trigger_threshold))
+        if self._xinput is None:
+            for dll in ("xinput1_4.dll", "xinput1_3.dll", "xinput9_1_0.dll"):
+                try:
+                    self._xinput = ctypes.windll.LoadLibrary(dll)
+                    break
+                except Exception:
+                    continue
+        self._last_packets = [0] * XUSER_MAX_COUNT
+        # Reused by every poll; XInputGetState fills them in place
+        self._states = [XINPUT_STATE() for _ in range(XUSER_MAX_COUNT)]
+        self._state_refs = [ctypes.byref(s) for s in self._states]
+        self._connected = [False] * XUSER_MAX_COUNT
+        self._interval = [self.EMPTY_MIN_INTERVAL] * XUSER_MAX_COUNT
+        self._next_poll = [0.0] * XUSER_MAX_COUNT
+        self._active_until = [0.0] * XUSER_MAX_COUNT
+        self._polls = [0] * XUSER_MAX_COUNT
+        self._poll_ns = [0] * XUSER_MAX_COUNT
+        self.wakeups = 0
 
     def start(self):
         if not self._xinput:
@@ -194,52 +426,115 @@ class GamepadWatcher:
 
     def stop(self):
         self._running = False
+        self._wake.set()
+
+    def notify_device_change(self):
+        """A device arrived or left: poll every empty slot on the next pass."""
+        now = self._clock()
+        for i in range(XUSER_MAX_COUNT):
+            if not self._connected[i]:
+                self._interval[i] = self.EMPTY_MIN_INTERVAL
+                self._next_poll[i] = now
+        self._wake.set()
+
+    def get_slot_stats(self):
+        """Per-slot polling cost: polls, total/mean time in XInputGetState, current interval."""
+        stats = []
+        for i in range(XUSER_MAX_COUNT):
+            polls = self._polls[i]
+            total_ms = self._poll_ns[i] / 1e6
+            stats.append({
+                "slot": i,
+                "connected": self._connected[i],
+                "polls": polls,
+                "total_ms": total_ms,
+                "mean_us": total_ms * 1000 / polls if polls else 0.0,
+                "interval": self._interval[i],
+            })
+        return stats
+
+    def _moved(self, gp):
+        dz = self._stick_deadzone
+        trig = self._trigger_threshold
+        return (
+            gp.wButtons != 0 or
+            gp.bLeftTrigger > trig or
+            gp.bRightTrigger > trig or
+            abs(gp.sThumbLX) > dz or
+            abs(gp.sThumbLY) > dz or
+            abs(gp.sThumbRX) > dz or
+            abs(gp.sThumbRY) > dz
+        )
+
+    def _poll_slot(self, i, now):
+        """Poll one slot, update its schedule; return True if it saw input."""
+        t0 = time.perf_counter_ns()
+        res = self._xinput.XInputGetState(i, self._state_refs[i])
+        self._poll_ns[i] += time.perf_counter_ns() - t0
+        self._polls[i] += 1
+        moved = False
+        if res == ERROR_SUCCESS:
+            state = self._states[i]
+            if not self._connected[i]:
+                self._connected[i] = True
+                self._last_packets[i] = int(state.dwPacketNumber)
+                logging.info(f"XInput controller connected in slot {i}")
+            elif state.dwPacketNumber != self._last_packets[i]:
+                self._last_packets[i] = int(state.dwPacketNumber)
+                if self._moved(state.Gamepad):
+                    moved = True
+                    self._active_until[i] = now + self.ACTIVE_HOLD
+            self._interval[i] = self.ACTIVE_INTERVAL if now < self._active_until[i] else self.CONNECTED_INTERVAL
+        else:
+            if self._connected[i]:
+                self._connected[i] = False
+                self._interval[i] = self.EMPTY_MIN_INTERVAL
+                logging.info(f"XInput controller disconnected from slot {i}")
+            else:
+                self._interval[i] = min(self._interval[i] * 2, self.EMPTY_MAX_INTERVAL)
+        self._next_poll[i] = now + self._interval[i]
+        return moved
+
+    def _poll_due(self):
+        """Poll every slot that is due; return seconds until the next one."""
+        now = self._clock()
+        moved = False
+        for i in range(XUSER_MAX_COUNT):
+            if self._next_poll[i] <= now:
+                moved = self._poll_slot(i, now) or moved
+        if moved:
+            self.on_input()
+        return max(0.0, min(self._next_poll) - self._clock())
 
     def _run(self):
         if not self._xinput:
             return
-        dz = max(0, self._stick_deadzone)
-        trig = max(0, self._trigger_threshold)
-        class XINPUT_GAMEPAD(ctypes.Structure):
-            _fields_ = [
-                ("wButtons", wintypes.WORD),
-                ("bLeftTrigger", ctypes.c_ubyte),
-                ("bRightTrigger", ctypes.c_ubyte),
-                ("sThumbLX", ctypes.c_short),
-                ("sThumbLY", ctypes.c_short),
-                ("sThumbRX", ctypes.c_short),
-                ("sThumbRY", ctypes.c_short),
-            ]
-        class XINPUT_STATE(ctypes.Structure):
-            _fields_ = [("dwPacketNumber", wintypes.DWORD), ("Gamepad", XINPUT_GAMEPAD)]
         while self._running:
             try:
-                for i in range(4):
-                    state = XINPUT_STATE()
-                    res = self._xinput.XInputGetState(i, ctypes.byref(state))
-                    if res == 0:  # ERROR_SUCCESS
-                        if state.dwPacketNumber != self._last_packets[i]:
-                            gp = state.Gamepad
-                            moved = (
-                                gp.wButtons != 0 or
-                                gp.bLeftTrigger > trig or
-                                gp.bRightTrigger > trig or
-                                abs(gp.sThumbLX) > dz or
-                                abs(gp.sThumbLY) > dz or
-                                abs(gp.sThumbRX) > dz or
-                                abs(gp.sThumbRY) > dz
-                            )
-                            if moved:
-                                self.on_input()
-                            self._last_packets[i] = int(state.dwPacketNumber)
-                time.sleep(0.1)
+                wait = self._poll_due()
             except Exception:
-                time.sleep(0.2)
+                wait = 0.2
+            self._wake.wait(wait)
+            self._wake.clear()
+            self.wakeups += 1
+        self._log_stats()
+
+    def _log_stats(self):
+        for s in self.get_slot_stats():
+            if s["polls"]:
+                logging.info(
+                    f"XInput slot {s['slot']}: {s['polls']} polls, {s['total_ms']:.1f} ms total, "
+                    f"{s['mean_us']:.1f} us/poll, connected={s['connected']}")
 
 
 class MonitorActivityDetector:
-    def __init__(self, monitors, mode="input", scope="system", monitor_modes=None, controller=True, controller_rawinput=False, controller_stick_deadzone=7849, controller_trigger_threshold=30):
+    def __init__(self, monitors, mode="input", scope="system", monitor_modes=None, controller=True, controller_rawinput=False, controller_stick_deadzone=7849, controller_trigger_threshold=30, backend="auto", capture_process=False):
         self.monitors = monitors
+        # "auto" picks the cheapest input backends for the scope; a name such
+        # as "hooks" or "lastinput" (or a comma-separated list) pins them
+        self.backend = backend
+        # Run the push backends (hooks, XInput, Raw Input) in a child process
+        self.capture_process = capture_process
         self.mode = mode
         self.scope = scope
         self.monitor_modes = monitor_modes or {}
@@ -247,140 +542,303 @@ class MonitorActivityDetector:
         self.controller_rawinput = controller_rawinput
         self.controller_stick_deadzone = int(controller_stick_deadzone)
         self.controller_trigger_threshold = int(controller_trigger_threshold)
-        self._idle_times = {"system": 0.0}
-        for i, m in enumerate(monitors):
-            self._idle_times[str(tuple(m['geometry']))] = 0.0
-        self._last_input_time = time.time()
-        self._last_activity_time = time.time()
+        self._last_input_time = time.monotonic()
+        self._last_activity_time = self._last_input_time
+        # Per-monitor state is indexed by slot (position in self.monitors)
+        self._index = MonitorIndex(monitors)
+        self._monitor_last_input = [self._last_input_time] * len(self._index)
+        # Idle deadlines are kept by the engine; pull backends back up the push ones
+        self._engine = IdleDeadlineEngine(last_input_source=self._system_last_input, resume_poll=0.5)
+        # Backends only push into this ring; batches are applied off the input thread
+        self._input_buffer = CoalescingInputBuffer(self._apply_input_batch)
         self._running = False
+        self.parked = False
         self._lock = threading.Lock()
-        self._last_mouse_pos = (0, 0)
         self._last_mouse_log = 0.0
         self._last_kb_log = 0.0
-        self._mouse_listener = None
-        self._keyboard_listener = None
-        self._gamepad = None
-        self._rawinput = None
+        self._backends = []
+        self._pull_backends = []
+        self._hooks_active = False
+        # Last input per device class ("keyboard", "mouse", ...), written lock-free
+        self._class_last_input = {}
+        # Called after each applied input batch (the capture process publishes here)
+        self.on_activity = None
 
     def start(self):
         self._running = True
-        threading.Thread(target=self._run, daemon=True).start()
-        self._start_listeners()
+        self._start_backends()
+        if not self._hooks_active:
+            # Desktop input is pull-only: nothing pushes the resume, so
+            # re-check quickly while a timer has fired
+            self._engine.resume_poll = PULL_RESUME_POLL
+        self._engine.start()
+        self._input_buffer.start()
+
+    def _start_backends(self):
+        if self.scope == "per-monitor" and self.backend == "lastinput":
+            logging.warning("lastinput backend cannot tell monitors apart; choosing backends for per-monitor scope")
+            self.backend = "auto"
+        chosen = input_backends.select_backends(
+            scope=self.scope,
+            controller=self.controller,
+            rawinput=self.controller_rawinput,
+            prefer=self.backend,
+        )
+        options = {
+            "stick_deadzone": self.controller_stick_deadzone,
+            "trigger_threshold": self.controller_trigger_threshold,
+        }
+        pushed = [cls for cls in chosen if cls.cost.kind != "pull"]
+        if self.capture_process and pushed and input_backends.CaptureProcessBackend.available():
+            chosen = [cls for cls in chosen if cls.cost.kind == "pull"] + [input_backends.CaptureProcessBackend]
+            options["capture_backends"] = ",".join(cls.name for cls in pushed)
+        queue = list(chosen)
+        while queue:
+            cls = queue.pop(0)
+            backend = cls(self, **options)
+            try:
+                backend.start()
+            except Exception as e:
+                logging.info(f"Input backend {cls.name} unavailable: {e}")
+                if cls is input_backends.CaptureProcessBackend:
+                    # Capture in this process instead
+                    queue.extend(pushed)
+                continue
+            self._backends.append(backend)
+            if backend.cost.kind == "pull":
+                self._pull_backends.append(backend)
+            elif input_backends.MOUSE in backend.provides:
+                self._hooks_active = True
+        logging.info(f"Input backends: {[b.name for b in self._backends]}")
+
+    def park(self):
+        """Stop the input backends and idle deadlines (session locked, asleep, displays off).
+
+        Nothing in the detector wakes periodically until unpark().
+        """
+        if self.parked:
+            return
+        self.parked = True
+        self._engine.park()
+        backends, self._backends, self._pull_backends = self._backends, [], []
+        self._hooks_active = False
+        for backend in backends:
+            try:
+                backend.stop()
+            except Exception as e:
+                logging.debug(f"{backend.name} failed to stop: {e}")
+        logging.info("Idle detector parked")
 
-    def _mark_input(self, x=None, y=None):
-        now = time.time()
+    def unpark(self):
+        """Restart the backends with every idle baseline re-seeded to now,
+        so no idle timeout counts the time spent parked."""
+        if not self.parked:
+            return
+        self._start_backends()
+        self._engine.resume_poll = 0.5 if self._hooks_active else PULL_RESUME_POLL
+        now = time.monotonic()
         with self._lock:
             self._last_input_time = now
             self._last_activity_time = now
-            if x is not None and y is not None and self.scope == "per-monitor":
-                for m in self.monitors:
-                    left, top, right, bottom = m['geometry']
-                    if left <= x < right and top <= y < bottom:
-                        self._idle_times[str(tuple(m['geometry']))] = 0.0
-                        m['last_input_time'] = now
-                        break
-            else:
-                for m in self.monitors:
-                    self._idle_times[str(tuple(m['geometry']))] = 0.0
-                    m['last_input_time'] = now
-
-    def _start_listeners(self):
-        # Track last mouse position to filter synthetic/background events
-        def on_mouse_move(x, y):
-            # Only reset idle if mouse position changes by at least 2 pixels
-            if self._last_mouse_pos:
-                last_x, last_y = self._last_mouse_pos
-                if abs(x - last_x) < 2 and abs(y - last_y) < 2:
-                    return
-            self._last_mouse_pos = (x, y)
-            self._mark_input(x, y)
-            # Only log occasionally to avoid spam
-            if time.time() - self._last_mouse_log > 5:
-                logging.info(f"Mouse activity detected at ({x},{y})")
-                self._last_mouse_log = time.time()
-
-        def on_mouse_click(x, y, button, pressed):
-            on_mouse_move(x, y)
-
-        def on_mouse_scroll(x, y, dx, dy):
-            on_mouse_move(x, y)
-
-        def on_keyboard_event(*args, **kwargs):
-            self._mark_input()
-            if time.time() - self._last_kb_log > 5:
-                logging.info("Keyboard activity detected")
-                self._last_kb_log = time.time()
-
-        self._mouse_listener = mouse.Listener(
-            on_move=on_mouse_move,
-            on_click=on_mouse_click,
-            on_scroll=on_mouse_scroll)
-        self._keyboard_listener = keyboard.Listener(
-            on_press=on_keyboard_event,
-            on_release=on_keyboard_event)
-        self._mouse_listener.start()
-        self._keyboard_listener.start()
-
-        if self.controller:
+            self._monitor_last_input = [now] * len(self._index)
+        self._engine.unpark(now)
+        self.parked = False
+        logging.info("Idle detector resumed")
+
+    def get_backend(self, name):
+        for backend in self._backends:
+            if backend.name == name:
+                return backend
+        return None
+
+    def get_backend_costs(self):
+        """Declared cost of each running backend, keyed by name."""
+        return {b.name: b.cost._asdict() for b in self._backends}
+
+    def get_backend_health(self):
+        """Health of each running backend that tracks it (hook latency, restarts...)."""
+        health = {}
+        for backend in self._backends:
             try:
-                self._gamepad = GamepadWatcher(lambda: self._mark_input(), self.controller_stick_deadzone, self.controller_trigger_threshold)
-                self._gamepad.start()
-                logging.info("Gamepad watcher started")
+                h = backend.health()
             except Exception as e:
-                logging.info(f"Gamepad watcher unavailable: {e}")
-            if self.controller_rawinput:
-                try:
-                    self._rawinput = RawInputWatcher(lambda: self._mark_input())
-                    self._rawinput.start()
-                    logging.info("Raw Input watcher started")
-                except Exception as e:
-                    logging.info(f"Raw Input watcher unavailable: {e}")
+                h = {"error": str(e)}
+            if h is not None:
+                health[backend.name] = h
+        return health
+
+    def uses_hooks(self):
+        """True if desktop input is pushed per event rather than read from a system tick."""
+        return self._hooks_active
+
+    def _system_last_input(self, key):
+        """Engine last-input source: the pull backends (GetLastInputInfo, X11 idle).
+
+        They back up the hooks for the system key; without hooks they are the
+        only desktop source and apply to every key.
+        """
+        if key != "system" and self._hooks_active:
+            return None
+        latest = None
+        for backend in self._pull_backends:
+            last = backend.last_input(key)
+            if last is not None and (latest is None or last > latest):
+                latest = last
+        return latest
+
+    def _mark_input(self, x=None, y=None, kind=None):
+        """Record input from a hook or watcher thread (lock-free).
+
+        ``kind`` is the device class (input_backends.KEYBOARD, MOUSE, ...).
+        """
+        if kind is None:
+            self._input_buffer.push(x, y)
+            return
+        when = time.monotonic()
+        self._class_last_input[kind] = when
+        self._input_buffer.push(x, y, when)
 
-    def _run(self):
-        # Initialize last_input_time for each monitor
-        for m in self.monitors:
-            m['last_input_time'] = time.time()
-        event_count = 0
-        while self._running:
-            now = time.time()
-            with self._lock:
-                input_idle = now - self._last_input_time
-                # Fallback to system idle if hooks failed
-                sys_idle = _get_system_idle_seconds()
-                if sys_idle:
-                    input_idle = min(input_idle, sys_idle)
-                activity_idle = now - self._last_activity_time
-                # System-wide idle
-                if self.mode == "input":
-                    self._idle_times["system"] = input_idle
-                elif self.mode == "activity":
-                    self._idle_times["system"] = activity_idle
-                elif self.mode == "both":
-                    self._idle_times["system"] = min(input_idle, activity_idle)
-                # Per-monitor idle: calculate for each monitor
-                for m in self.monitors:
-                    geom = str(tuple(m['geometry']))  # Convert to string key
-                    self._idle_times[geom] = now - m.get('last_input_time', self._last_input_time)
-                # Log every 30 seconds for debugging (not every second!)
-                event_count += 1
-                if event_count % 30 == 0:
-                    logging.info(f"Idle check: system={self._idle_times['system']:.1f}s")
-            time.sleep(1)
+    def _notify_device_change(self):
+        """A backend saw an input device arrive or leave; tell the others."""
+        for b in list(self._backends):
+            try:
+                b.device_changed()
+            except Exception as e:
+                logging.debug(f"{b.name} device change handling failed: {e}")
+
+    def _apply_input_batch(self, events):
+        """Apply a drained batch of ``(when, x, y)`` events to the idle state."""
+        touched = {}
+        mouse_seen = keyboard_seen = False
+        with self._lock:
+            keys = self._index.keys
+            last_inputs = self._monitor_last_input
+            all_slots = range(len(keys))
+            for when, x, y in events:
+                if when > self._last_input_time:
+                    self._last_input_time = when
+                    self._last_activity_time = when
+                touched["system"] = max(when, touched.get("system", 0.0))
+                if x is not None and y is not None:
+                    mouse_seen = True
+                else:
+                    keyboard_seen = True
+                if x is not None and y is not None and self.scope == "per-monitor":
+                    slots = (self._index.slot_at(x, y),)
+                else:
+                    slots = all_slots
+                for slot in slots:
+                    if slot < 0:
+                        continue
+                    if when > last_inputs[slot]:
+                        last_inputs[slot] = when
+                    key = keys[slot]
+                    if when > touched.get(key, 0.0):
+                        touched[key] = when
+        for key, when in touched.items():
+            self._engine.touch(key, when)
+        if self.on_activity is not None:
+            try:
+                self.on_activity()
+            except Exception as e:
+                logging.debug(f"on_activity failed: {e}")
+        # Only log occasionally to avoid spam
+        now = time.time()
+        if mouse_seen and now - self._last_mouse_log > 5:
+            logging.info("Mouse activity detected")
+            self._last_mouse_log = now
+        if keyboard_seen and now - self._last_kb_log > 5:
+            logging.info("Keyboard activity detected")
+            self._last_kb_log = now
+
+    def set_monitors(self, monitors):
+        """Rebuild the monitor index after a topology change.
+
+        Idle state is kept for monitors whose geometry did not change.
+        Returns True if the topology changed.
+        """
+        with self._lock:
+            if self._index.same_topology(monitors):
+                return False
+            previous = dict(zip(self._index.keys, self._monitor_last_input))
+            index = MonitorIndex(monitors)
+            self._monitor_last_input = [previous.get(key, self._last_input_time) for key in index.keys]
+            self._index = index
+            self.monitors = monitors
+        for backend in self._backends:
+            backend.set_monitors(monitors)
+        logging.info(f"Monitor topology changed, index rebuilt for {len(index)} monitors")
+        return True
+
+    def monitor_keys(self):
+        """Keys of the monitors currently tracked, as used by add_idle_callback()."""
+        return list(self._index.keys)
+
+    def add_idle_callback(self, timeout, on_idle, on_resume=None, key="system"):
+        """Call ``on_idle(timer, idle)`` as soon as ``key`` has been idle ``timeout`` seconds.
+
+        ``key`` is ``"system"`` or a monitor geometry key as returned by
+        ``get_idle_times()``. Returns a handle for ``remove_idle_callback``.
+        """
+        return self._engine.add_timer(key, timeout, on_idle, on_resume)
+
+    def remove_idle_callback(self, timer):
+        self._engine.remove_timer(timer)
 
     def get_idle_times(self):
+        """Idle seconds for ``"system"`` and each monitor, computed on demand."""
+        self._input_buffer.flush()
+        now = time.monotonic()
         with self._lock:
-            return self._idle_times.copy()
+            input_idle = self._engine.idle_seconds("system", now)
+            activity_idle = now - self._last_activity_time
+            if not self.uses_hooks():
+                # Pull sources only: the system tick stands for every monitor
+                # unless a source (the capture process) knows them apart
+                idle_times = {"system": input_idle}
+                for key in self._index.keys:
+                    idle_times[key] = self._engine.idle_seconds(key, now)
+                return idle_times
+            idle_times = {"system": 0.0}
+            if self.mode == "input":
+                idle_times["system"] = input_idle
+            elif self.mode == "activity":
+                idle_times["system"] = activity_idle
+            elif self.mode == "both":
+                idle_times["system"] = min(input_idle, activity_idle)
+            for key, last in zip(self._index.keys, self._monitor_last_input):
+                idle_times[key] = now - last
+            return idle_times
+
+    def _last_input_snapshot(self):
+        """Monotonic last-input times for "system", each device class and each monitor."""
+        with self._lock:
+            snapshot = dict(self._class_last_input)
+            snapshot.update(zip(self._index.keys, self._monitor_last_input))
+        for backend in self._pull_backends:
+            by_class = getattr(backend, "last_input_by_class", None)
+            if by_class is not None:
+                for kind, when in by_class().items():
+                    if when > snapshot.get(kind, 0.0):
+                        snapshot[kind] = when
+        snapshot["system"] = self._engine.last_input("system")
+        if not self._hooks_active:
+            for key in self._index.keys:
+                snapshot[key] = self._engine.last_input(key)
+        return snapshot
+
+    def get_last_input_times(self):
+        """Like get_idle_times(), but as ``time.monotonic()`` timestamps and
+        with an entry per device class that has seen input."""
+        self._input_buffer.flush()
+        return self._last_input_snapshot()
 
     def stop(self):
         self._running = False
-        try:
-            if self._mouse_listener:
-                self._mouse_listener.stop()
-            if self._keyboard_listener:
-                self._keyboard_listener.stop()
-            if self._gamepad:
-                self._gamepad.stop()
-            if self._rawinput:
-                self._rawinput.stop()
-        except Exception:
-            pass
+        self._engine.stop()
+        self._input_buffer.stop()
+        for backend in self._backends:
+            try:
+                backend.stop()
+            except Exception:
+                pass
@@ -0,0 +1,76 @@
+"""
+Spatial index for per-monitor hit-testing in Display Control+
+Maps a virtual-desktop point to a monitor slot with two table lookups.
+"""
+from array import array
+from bisect import bisect_right
+
+# Beyond this many pixels per axis fall back to bisecting the edge list
+MAX_AXIS_TABLE = 1 << 20
+
+
+def monitor_key(geometry):
+    """The string key used for a monitor in get_idle_times() and idle callbacks."""
+    return str(tuple(geometry))
+
+
+class MonitorIndex:
+    """Compressed-coordinate grid over the virtual desktop.
+
+    Every monitor edge becomes a grid line, so each grid cell lies entirely
+    inside one monitor (or in a gap). Per-axis lookup tables map a pixel
+    coordinate straight to its column/row, and a cell table maps that to the
+    monitor slot (its position in ``monitors``) or -1.
+    """
+
+    def __init__(self, monitors):
+        self.geometries = [tuple(int(v) for v in m['geometry']) for m in monitors]
+        self.keys = [monitor_key(g) for g in self.geometries]
+        xs = sorted({g[0] for g in self.geometries} | {g[2] for g in self.geometries})
+        ys = sorted({g[1] for g in self.geometries} | {g[3] for g in self.geometries})
+        self._xs = xs
+        self._ys = ys
+        ncols = max(0, len(xs) - 1)
+        nrows = max(0, len(ys) - 1)
+        self._ncols = ncols
+        cells = array('h', [-1]) * (ncols * nrows)
+        # Earlier monitors win where geometries overlap (mirrored displays)
+        for slot in range(len(self.geometries) - 1, -1, -1):
+            left, top, right, bottom = self.geometries[slot]
+            for col in range(xs.index(left), xs.index(right)):
+                for row in range(ys.index(top), ys.index(bottom)):
+                    cells[row * ncols + col] = slot
+        self._cells = cells
+        self._xmap = self._axis_table(xs)
+        self._ymap = self._axis_table(ys)
+
+    def __len__(self):
+        return len(self.geometries)
+
+    @staticmethod
+    def _axis_table(edges):
+        if len(edges) < 2 or edges[-1] - edges[0] > MAX_AXIS_TABLE:
+            return None
+        table = array('h')
+        for i in range(len(edges) - 1):
+            table.extend([i] * (edges[i + 1] - edges[i]))
+        return table
+
+    def slot_at(self, x, y):
+        """Return the slot of the monitor containing (x, y), or -1."""
+        xs = self._xs
+        ys = self._ys
+        if not self._cells or x < xs[0] or x >= xs[-1] or y < ys[0] or y >= ys[-1]:
+            return -1
+        if self._xmap is not None:
+            col = self._xmap[int(x) - xs[0]]
+        else:
+            col = bisect_right(xs, x) - 1
+        if self._ymap is not None:
+            row = self._ymap[int(y) - ys[0]]
+        else:
+            row = bisect_right(ys, y) - 1
+        return self._cells[row * self._ncols + col]
+
+    def same_topology(self, monitors):
+        return [tuple(int(v) for v in m['geometry']) for m in monitors] == self.geometries
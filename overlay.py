@@ -10,8 +10,14 @@ import ctypes
 import subprocess
 import time
 import threading
-from PIL import Image, ImageTk
+from PIL import ImageTk
 from monitor_activity import MonitorActivityDetector
+from config_store import ConfigStore
+from animation import ANIMATION_BUDGET_MB, Animation, AnimationPlayer
+from image_cache import load_scaled, load_thumbnail
+from prefetch import PREFETCH_RETRY, PREFETCH_WAIT, Prefetcher
+from service_control import ServiceUnavailable, send_command
+from service_status import read_status
 
 # Professional Edition Information
 VERSION = "1.0.0"
@@ -38,7 +44,10 @@ def _default_config(monitors: list | None = None):
         "enabled": True,
         "scope": "system",
         "detection_mode": "input",
+        "detection_backend": "auto",
+        "input_capture_process": True,
         "monitor_modes": {},
+        "animation_budget_mb": ANIMATION_BUDGET_MB,
         "auto_update_enabled": False
     }
 
@@ -120,15 +129,23 @@ def show_black_overlay(geometry, demo=False):
 # --- Idle Detection Top-Level Function ---
 # This function provides system-wide idle time for background overlay logic
 _idle_detector = None
+_idle_detector_generation = None
 
-def get_idle_duration():
-    global _idle_detector
-    try:
-        cfg = load_config() or {}
-    except Exception:
-        cfg = {}
+def get_idle_detector():
+    """Return the shared MonitorActivityDetector, creating it on first use.
+
+    Settings are re-applied only when the config store has a new snapshot.
+    Returns None if the detector could not be started.
+    """
+    global _idle_detector, _idle_detector_generation
+    cfg = get_config_store().get() or {}
+    generation = getattr(cfg, "generation", None)
+    if _idle_detector is not None and generation == _idle_detector_generation:
+        return _idle_detector
     mode = cfg.get("detection_mode", "input")
     scope = cfg.get("scope", "system")
+    backend = cfg.get("detection_backend", "auto")
+    capture_process = bool(cfg.get("input_capture_process", True))
     controller_cfg = cfg.get("controller", {})
     ctrl_raw = bool(controller_cfg.get("rawinput", True))
     ctrl_dz = int(controller_cfg.get("stick_deadzone", 9000))  # slightly higher to reduce drift
@@ -146,22 +163,34 @@ def get_idle_duration():
                 controller_rawinput=ctrl_raw,
                 controller_stick_deadzone=ctrl_dz,
                 controller_trigger_threshold=ctrl_trig,
+                backend=backend,
+                capture_process=capture_process,
             )
             _idle_detector.start()
-            time.sleep(1)
+            _idle_detector_generation = generation
         except Exception as e:
             logging.error(f"[DIAG] Failed to initialize MonitorActivityDetector: {e}")
-            return 0
+            _idle_detector = None
+            return None
     else:
         try:
             _idle_detector.mode = mode
             _idle_detector.scope = scope
             _idle_detector.controller_stick_deadzone = ctrl_dz
             _idle_detector.controller_trigger_threshold = ctrl_trig
+            if backend != _idle_detector.backend:
+                logging.info(f"detection_backend changed to {backend}; takes effect after a service restart")
+            _idle_detector_generation = generation
         except Exception:
             pass
+    return _idle_detector
+
 
-    idle_times = _idle_detector.get_idle_times()
+def get_idle_duration():
+    detector = get_idle_detector()
+    if detector is None:
+        return 0
+    idle_times = detector.get_idle_times()
     return idle_times.get("system", 0)
 
 
@@ -198,14 +227,8 @@ def show_image_overlay(geometry, img_path, demo=False):
     
     try:
         logging.info(f"Attempting to open image: {img_path}")
-        img = Image.open(img_path)
-        logging.info(f"Image opened: {img.size}, mode={img.mode}")
-        # Use modern Pillow resampling constant
-        try:
-            resample = Image.Resampling.LANCZOS
-        except AttributeError:
-            resample = getattr(Image, 'LANCZOS', 1)  # fallback with safer default
-        img = img.resize((width, height), resample)
+        # Pre-scaled to this monitor by the image cache after the first use
+        img = load_scaled(img_path, width, height)
         photo = ImageTk.PhotoImage(img)
         label = tk.Label(root, image=photo, bg='black')
         setattr(label, 'image_ref', photo)  # Keep reference to prevent garbage collection
@@ -230,7 +253,6 @@ def show_image_overlay(geometry, img_path, demo=False):
 
 
 def show_slideshow_overlay(geometry, img_paths, interval=30, demo=False):
-    import itertools
     logging.info(f"[SLIDESHOW] Starting slideshow overlay: geometry={geometry}, interval={interval}, demo={demo}, img_paths={img_paths}")
     left, top, right, bottom = geometry
     width = right - left
@@ -251,15 +273,13 @@ def show_slideshow_overlay(geometry, img_paths, interval=30, demo=False):
     label = tk.Label(root, bg='black')
     label.pack(fill=tk.BOTH, expand=True)
 
-    def update_image(img_path):
+    def update_image(img_path, img=None, error=None):
         logging.info(f"[SLIDESHOW] Attempting to load image: {img_path}")
         try:
-            img = Image.open(img_path)
-            try:
-                resample = Image.Resampling.LANCZOS
-            except AttributeError:
-                resample = getattr(Image, 'LANCZOS', 1)
-            img = img.resize((width, height), resample)
+            if error is not None:
+                raise error
+            if img is None:
+                img = load_scaled(img_path, width, height)
             photo = ImageTk.PhotoImage(img)
             label.config(image=photo)
             setattr(label, 'image_ref', photo)  # Keep reference to prevent garbage collection
@@ -268,14 +288,36 @@ def show_slideshow_overlay(geometry, img_paths, interval=30, demo=False):
             logging.error(f"[SLIDESHOW] Slideshow image load error: {e}")
             label.config(text=f"Error loading: {img_path}", fg="red", bg="black")
 
+    # The next images are decoded and scaled on a worker thread, so a step
+    # only swaps in a prepared frame; steps follow fixed deadlines
+    prefetcher = None
+
     def slideshow_loop():
-        paths = itertools.cycle(img_paths)
+        nonlocal prefetcher
+        if not img_paths:
+            return
+        update_image(img_paths[0])
+        if len(img_paths) < 2:
+            return
+        prefetcher = Prefetcher(img_paths, lambda path: load_scaled(path, width, height), start=1).start()
+        due = time.monotonic() + interval
+
         def advance():
-            next_img = next(paths)
+            nonlocal due
+            item = prefetcher.take(PREFETCH_WAIT)
+            if item is None:
+                # Still loading: keep the current image and look again shortly
+                root.after(int(PREFETCH_RETRY * 1000), advance)
+                return
+            next_img, img, error = item
             logging.info(f"[SLIDESHOW] Advancing to next image: {next_img}")
-            update_image(next_img)
-            root.after(interval * 1000, advance)
-        advance()
+            update_image(next_img, img, error)
+            now = time.monotonic()
+            due += interval
+            if due <= now:
+                due = now + interval
+            root.after(int((due - now) * 1000), advance)
+        root.after(interval * 1000, advance)
 
     slideshow_loop()
     
@@ -291,11 +333,48 @@ def show_slideshow_overlay(geometry, img_paths, interval=30, demo=False):
         logging.info("[SLIDESHOW] Demo mode: overlay will close after 3 seconds.")
         root.after(3000, root.destroy)
     root.mainloop()
+    if prefetcher is not None:
+        prefetcher.stop()
 
 
-def show_gif_overlay(geometry, gif_path, demo=False):
-    # For now, show black overlay - GIF support can be added later
-    show_black_overlay(geometry, demo)
+def show_gif_overlay(geometry, gif_path, demo=False, animation_budget=ANIMATION_BUDGET_MB * 1024 * 1024):
+    # Play an animated GIF, APNG or WebP; frames are decoded on a worker thread
+    logging.info(f"show_gif_overlay called: geometry={geometry}, gif_path={gif_path}, demo={demo}")
+    left, top, right, bottom = geometry
+    width = right - left
+    height = bottom - top
+    root = tk.Tk()
+    root.overrideredirect(True)
+    root.geometry(f"{width}x{height}+{left}+{top}")
+    root.configure(bg='black')
+    root.attributes('-topmost', True)
+    root.config(cursor="none")
+    label = tk.Label(root, bg='black')
+    label.pack(fill=tk.BOTH, expand=True)
+
+    def show_frame(photo):
+        label.config(image=photo)
+        setattr(label, 'image_ref', photo)  # Keep reference to prevent garbage collection
+
+    def dismiss_overlay(event=None):
+        if not demo:
+            logging.info("User input detected, dismissing animation overlay")
+            root.destroy()
+
+    animation = Animation(gif_path, width, height, budget_bytes=animation_budget)
+    player = AnimationPlayer(root, animation, show_frame)
+    player.play()
+    if not demo:
+        root.bind('<Key>', dismiss_overlay)
+        root.bind('<Button-1>', dismiss_overlay)
+        root.bind('<Button-2>', dismiss_overlay)
+        root.bind('<Button-3>', dismiss_overlay)
+        root.bind('<Motion>', dismiss_overlay)
+        root.focus_set()  # Ensure the window can receive keyboard events
+    if demo:
+        root.after(3000, root.destroy)
+    root.mainloop()
+    player.close()
 
 # --- Config Functions ---
 
@@ -315,9 +394,13 @@ def save_config(monitors, selected, mode, file_paths, timeout, interval, enabled
     }
     try:
         cfg_path = _get_config_path()
+        # Keep settings the GUI does not edit (detection backend, animation budget, ...)
+        config = {**(load_config() or {}), **config}
         with open(cfg_path, "w", encoding="utf-8") as f:
             json.dump(config, f, indent=2)
         logging.info(f"Config saved: {config}")
+        if _config_store is not None:
+            _config_store.reload()
     except Exception as e:
         logging.error(f"Failed to save config: {e}")
 
@@ -357,9 +440,42 @@ def load_config():
         logging.error(f"Failed to load config: {e}")
         return None
 
+_config_store = None
+
+
+def get_config_store():
+    """The process-wide ConfigStore for the AppData config.json."""
+    global _config_store
+    if _config_store is None:
+        _config_store = ConfigStore(_get_config_path(), load_config)
+    return _config_store
+
+
+def start_background_service():
+    """Launch the background service process (bundled exe or overlay_bg.py)."""
+    if getattr(sys, 'frozen', False):
+        # We're running as a bundled executable
+        exe_path = sys.executable
+        logging.info(f"Starting background service: {exe_path} --background")
+        subprocess.Popen([exe_path, "--background"],
+                         creationflags=subprocess.CREATE_NO_WINDOW)
+        return
+    # We're running as a Python script
+    bg_script = os.path.abspath("overlay_bg.py")
+    if not os.path.exists(bg_script):
+        logging.error(f"Background service script not found: {bg_script}")
+        raise FileNotFoundError("Background service script not found")
+    logging.info(f"Starting background service: {bg_script}")
+    subprocess.Popen([sys.executable, bg_script],
+                     creationflags=subprocess.CREATE_NO_WINDOW)
+
 # --- Single Instance Enforcement ---
 
 def is_background_running():
+    # A service with a fresh heartbeat on its status page is running
+    status = read_status()
+    if status is not None and status.alive():
+        return True
     lock_path = os.path.join(APPDATA_DIR, "overlay_bg.lock")
     if not os.path.exists(lock_path):
         return False
@@ -670,15 +786,8 @@ def launch_gui():
         inner_thumb_frame.pack(anchor=tk.CENTER)
         for i, path in enumerate(file_paths):
             try:
-                img = Image.open(path)
-                # Use modern Pillow resampling constant for thumbnail
-                try:
-                    from PIL.Image import Resampling
-                    resample_filter = Resampling.LANCZOS
-                except (ImportError, AttributeError):
-                    # Fallback for older Pillow versions
-                    resample_filter = getattr(Image, 'LANCZOS', 1)
-                img.thumbnail((max_thumb_size, max_thumb_size), resample_filter)  # type: ignore
+                # Decoded at a reduced scale: camera originals never load in full
+                img = load_thumbnail(path, max_thumb_size)
                 thumb = ImageTk.PhotoImage(img)
                 thumbnail_imgs.append(thumb)  # Keep reference
                 lbl = tk.Label(inner_thumb_frame, image=thumb, bg="#23272f")
@@ -777,44 +886,20 @@ def launch_gui():
         save_config(monitors, selected, mode, file_paths, timeout, interval, enabled_var.get(), scope, detection_mode, {})
         logging.info("Settings applied from GUI.")
         
-        # Start background service immediately
+        # Apply to the running service in place; start one only if none answers
         try:
-            # First, stop any existing background service
-            if is_background_running():
-                logging.info("Stopping existing background service...")
-                # Kill any existing overlay_bg processes
-                subprocess.run(["taskkill", "/f", "/im", "python.exe", "/fi", "WINDOWTITLE eq overlay_bg*"], 
-                             capture_output=True)
-                time.sleep(1)
-            
-            # Start the background service
-            if getattr(sys, 'frozen', False):
-                # We're running as a bundled executable
-                exe_path = sys.executable
-                logging.info(f"Starting background service: {exe_path} --background")
-                subprocess.Popen([exe_path, "--background"], 
-                               creationflags=subprocess.CREATE_NO_WINDOW)
-            else:
-                # We're running as a Python script
-                bg_script = os.path.abspath("overlay_bg.py")
-                if os.path.exists(bg_script):
-                    logging.info(f"Starting background service: {bg_script}")
-                    subprocess.Popen([sys.executable, bg_script], 
-                                   creationflags=subprocess.CREATE_NO_WINDOW)
+            try:
+                generation = send_command("reload-config")
+                logging.info(f"Background service reloaded config generation {generation}")
+                status_msg = "Settings applied. Background protection is up to date."
+            except ServiceUnavailable as e:
+                logging.info(f"No background service on the control channel ({e})")
+                if is_background_running():
+                    # Older service without the control channel: its config watcher picks the change up
+                    status_msg = "Settings saved. The running background service will pick them up."
                 else:
-                    logging.error(f"Background service script not found: {bg_script}")
-                    status_msg = "Settings saved, but background service script not found."
-                    raise FileNotFoundError("Background service script not found")
-            
-            time.sleep(2)  # Give it time to start
-                
-            if is_background_running():
-                logging.info("Background service started successfully")
-                status_msg = "Settings applied successfully. Background protection is now active."
-            else:
-                logging.error("Background service failed to start")
-                status_msg = "Settings saved, but background service failed to start. Please restart the application."
-                
+                    start_background_service()
+                    status_msg = "Settings saved. Background protection is starting."
         except Exception as e:
             logging.error(f"Error starting background service: {e}")
             status_msg = f"Settings saved, but error starting background service: {e}"
@@ -909,7 +994,7 @@ def launch_gui():
                 file_paths.extend(paths)
                 upload_label.config(text=f"Selected: {len(paths)} images")
         elif mode == "gif":
-            paths = filedialog.askopenfilename(title="Select GIF", filetypes=[("GIF Files", "*.gif")])
+            paths = filedialog.askopenfilename(title="Select Animation", filetypes=[("Animations", "*.gif;*.png;*.apng;*.webp")])
             if paths:
                 file_paths.clear()
                 file_paths.append(paths)
@@ -1,24 +1,629 @@
+import datetime
 import os
 import sys
 import time
 import logging
 import multiprocessing
+import threading
 from overlay import (
+    get_idle_detector,
     get_idle_duration,
     show_image_overlay,
     show_gif_overlay,
     show_slideshow_overlay,
     show_black_overlay,
-    load_config,
+    get_config_store,
     set_background_lock,
     is_background_running
 )
+from animation import budget_bytes
+from display_plan import plan_displays
+from image_cache import default_cache
 from log_config import setup_logging
+from overlay_host import OverlayHost
+from perf_stats import LatencyStats
+from schedule import apply_rules, compile_schedule
+from service_control import ControlServer
+from session_events import (
+    DISPLAY_CHANGE, DISPLAY_OFF, DISPLAY_ON, LOCK, RESUME as SYSTEM_RESUME, SUSPEND, UNLOCK,
+    create_session_source,
+)
+from service_status import (
+    ERROR_CONTROL_CHANNEL, ERROR_HOST_FALLBACK, ERROR_NAMES, ERROR_NONE, ERROR_PREPARE_FAILED,
+    ERROR_SHOW_FAILED, HEARTBEAT_INTERVAL, StatusPublisher,
+)
+from service_state import (
+    ARMED, COOLDOWN, DISABLED, PREPARING, SHOWING, SUSPENDED,
+    CONFIG_CHANGED, DISMISS, DISPLAY_CHANGED, IDLE_DEADLINE, INPUT_RESUMED, PAUSE, RESUME,
+    SCHEDULE, SESSION_LOCKED, SESSION_UNLOCKED, SHOWN, SHOW_FAILED, TIMER, TRIGGER, ServiceStateMachine,
+)
 
 # Ensure logging is configured for background process
 setup_logging()
 
 
+def _spawn_overlay(plan, animation_budget):
+    """Fallback: a separate overlay process for one display."""
+    logging.info(f'Launching {plan.mode} overlay for monitor: {plan.geometry}')
+    if plan.mode == 'single':
+        p = multiprocessing.Process(target=show_image_overlay, args=(plan.geometry, plan.file_paths[0]))
+    elif plan.mode == 'slideshow':
+        p = multiprocessing.Process(target=show_slideshow_overlay, args=(plan.geometry, list(plan.file_paths), plan.interval))
+    elif plan.mode == 'gif':
+        p = multiprocessing.Process(target=show_gif_overlay, args=(plan.geometry, plan.file_paths[0], False, animation_budget))
+    else:
+        p = multiprocessing.Process(target=show_black_overlay, args=(plan.geometry,))
+    p.start()
+    return p
+
+
+def _log_hide_latency(stats):
+    summary = stats.summary()
+    logging.info(
+        f"Input-to-hide latency over {summary['count']} dismissals: "
+        f"p50 {summary['p50_us'] / 1000:.1f} ms, p90 {summary['p90_us'] / 1000:.1f} ms, "
+        f"p99 {summary['p99_us'] / 1000:.1f} ms, max {summary['max_us'] / 1000:.1f} ms "
+        f"({summary['over_budget']} over {summary['budget_us'] / 1000:.0f} ms)")
+
+
+class OverlayService:
+    """The background service: per-display idle timers, the overlay host and the state machine.
+
+    Each protected display (see display_plan) has its own timeout, mode and
+    idle timer on its monitor key; the idle engine keeps all deadlines in
+    one heap, so a single wake serves every display due at that moment.
+    Displays are shown and hidden independently: the service is SHOWING
+    while any display is, and cools down once the last one is dismissed.
+
+    Event sources (the config store, the idle engine's deadline and resume
+    callbacks, session and display notifications via ``post()``) only queue
+    events; all work happens on the thread that calls ``run()``, which sleeps
+    until the next event. Without an idle detector the ARMED and SHOWING
+    states fall back to polling get_idle_duration().
+
+    The GUI talks to the running service over the control channel (see
+    service_control and ``handle_command()``): settings are reloaded in
+    place, and overlays can be triggered, dismissed or paused. A status page
+    (see service_status) is refreshed on every transition and at least once
+    per HEARTBEAT_INTERVAL.
+
+    While the session is locked, the system asleep or the displays off (see
+    session_events), the service is SUSPENDED and parks everything: the idle
+    detector's backends and deadlines, the config watcher and the status
+    heartbeat, so nothing wakes periodically. Leaving SUSPENDED re-seeds the
+    idle baselines, so an overlay never fires the moment the user unlocks.
+
+    A "schedule" in the config (see schedule) is compiled once per config
+    generation. Arming applies the rules active now and sets one timer for
+    the next transition, which re-arms the service; nothing is evaluated in
+    between.
+    """
+    COOLDOWN = 1.0
+    FAILURE_BACKOFF = 30.0
+    POLL_ARMED = 1.0
+    POLL_SHOWING = 0.5
+    TRIGGER_GRACE = 0.25  # input this soon after a triggered show does not dismiss it
+
+    def __init__(self, store, host=None, detector_factory=get_idle_detector, monitors_source=None,
+                 control_address=None, status_name=None, session_source_factory=create_session_source):
+        self.store = store
+        self.host = host if host is not None else OverlayHost()
+        self._detector_factory = detector_factory
+        self._monitors_source = monitors_source
+        self.config = None
+        self.detector = None
+        self.plans = {}
+        self.hide_latency = LatencyStats(budget_ms=50)
+        self._timers = []
+        self._due = []
+        self._shown = {}
+        self._overlay_procs = {}
+        self._shown_at = 0.0
+        self.paused = False
+        self._pause_for = None
+        self.control = ControlServer(self.handle_command, control_address)
+        self.status_page = StatusPublisher(status_name)
+        self.heartbeat_interval = HEARTBEAT_INTERVAL
+        self._session_source_factory = session_source_factory
+        self.session_source = None
+        self._park_reasons = set()
+        self._park_lock = threading.Lock()
+        self._parked_detector = None
+        self._resumed_at = 0.0
+        self.now = datetime.datetime.now  # local wall clock for schedules
+        self.active_rules = []
+        self._schedule = None
+        self._schedule_generation = None
+        self._schedule_timer = None
+        self.image_cache = None  # ScaledImageCache, opened on first use
+        self._warmed = set()
+        self.last_error = (ERROR_NONE, 0.0)
+        self._status_wake = threading.Event()
+        self._status_thread = None
+        arm = self._arm_target
+        pause = self._on_pause
+        self.machine = ServiceStateMachine({
+            (DISABLED, CONFIG_CHANGED): arm,
+            (DISABLED, SESSION_LOCKED): SUSPENDED,
+            (ARMED, CONFIG_CHANGED): arm,
+            (ARMED, DISPLAY_CHANGED): arm,
+            (ARMED, IDLE_DEADLINE): self._on_deadline,
+            (ARMED, TIMER): self._poll_idle,
+            (ARMED, SESSION_LOCKED): SUSPENDED,
+            (ARMED, TRIGGER): self._on_trigger,
+            (ARMED, PAUSE): pause,
+            (ARMED, SCHEDULE): arm,
+            (PREPARING, SHOWN): SHOWING,
+            (PREPARING, IDLE_DEADLINE): self._on_deadline,
+            (PREPARING, SHOW_FAILED): COOLDOWN,
+            (PREPARING, INPUT_RESUMED): self._on_resume,
+            (PREPARING, SESSION_LOCKED): SUSPENDED,
+            (PREPARING, DISMISS): COOLDOWN,
+            (PREPARING, PAUSE): pause,
+            (PREPARING, SCHEDULE): COOLDOWN,
+            (SHOWING, IDLE_DEADLINE): self._on_deadline,
+            (SHOWING, INPUT_RESUMED): self._on_resume,
+            (SHOWING, TIMER): self._poll_resumed,
+            (SHOWING, CONFIG_CHANGED): COOLDOWN,
+            (SHOWING, DISPLAY_CHANGED): COOLDOWN,
+            (SHOWING, SESSION_LOCKED): SUSPENDED,
+            (SHOWING, TRIGGER): self._on_trigger,
+            (SHOWING, DISMISS): COOLDOWN,
+            (SHOWING, PAUSE): pause,
+            (SHOWING, SCHEDULE): COOLDOWN,
+            (COOLDOWN, TIMER): arm,
+            (COOLDOWN, CONFIG_CHANGED): arm,
+            (COOLDOWN, SESSION_LOCKED): SUSPENDED,
+            (COOLDOWN, PAUSE): pause,
+            (SUSPENDED, SESSION_UNLOCKED): self._on_unlock,
+            (SUSPENDED, PAUSE): pause,
+            (SUSPENDED, RESUME): self._on_unpause,
+            (SUSPENDED, TIMER): self._on_unpause,
+        }, on_enter={
+            DISABLED: self._enter_disabled,
+            ARMED: self._enter_armed,
+            PREPARING: self._enter_preparing,
+            SHOWING: self._enter_showing,
+            COOLDOWN: self._enter_cooldown,
+            SUSPENDED: self._enter_suspended,
+        }, on_transition=lambda transition: self._status_wake.set())
+
+    @property
+    def state(self):
+        return self.machine.state
+
+    @property
+    def shown(self):
+        """Keys of the displays currently covered."""
+        return list(self._shown)
+
+    def post(self, event, cause=None):
+        """Queue an event (e.g. SESSION_LOCKED, DISPLAY_CHANGED) from any thread."""
+        self.machine.post(event, cause)
+
+    def handle_command(self, command, args):
+        """Control channel request (runs on the control server's thread)."""
+        if command == "status":
+            return self.status()
+        if command == "reload-config":
+            changed = self.store.reload()
+            return {"changed": changed, "generation": getattr(self.store.get(), 'generation', 0)}
+        if command == "pause":
+            seconds = float(args[0]) if args else None
+            self.machine.post(PAUSE, 'paused from the control channel' if seconds is None
+                              else f'paused for {seconds:g}s from the control channel', data=seconds)
+            return None
+        events = {"trigger": TRIGGER, "dismiss": DISMISS, "resume": RESUME}
+        if command not in events:
+            raise ValueError(f"Unknown command '{command}'")
+        self.machine.post(events[command], f'{command} from the control channel')
+        return None
+
+    def status(self):
+        plans = dict(self.plans)
+        return {
+            "state": self.machine.state,
+            "since": self.machine.since,
+            "paused": self.paused,
+            "config_generation": getattr(self.store.get(), 'generation', 0),
+            "displays": {key: {"geometry": plan.geometry, "mode": plan.mode, "timeout": plan.timeout}
+                         for key, plan in plans.items()},
+            "shown": list(self._shown),
+            "hide_latency": self.hide_latency.summary(),
+            "last_error": ERROR_NAMES.get(self.last_error[0], self.last_error[0]),
+            "schedule": [rule.name for rule in self.active_rules],
+        }
+
+    def _error(self, code):
+        self.last_error = (code, time.monotonic())
+        self._status_wake.set()
+
+    def _display_status(self):
+        """``(geometry, idle seconds, mode, shown)`` per protected display."""
+        plans = dict(self.plans)
+        shown = set(self._shown)
+        detector = self.detector
+        if detector is not None:
+            idle_times = detector.get_idle_times()
+            system_idle = idle_times.get("system", 0.0)
+        else:
+            idle_times, system_idle = {}, get_idle_duration()
+        return [(plan.geometry, idle_times.get(key, system_idle), plan.mode, key in shown)
+                for key, plan in plans.items()]
+
+    def _publish_status(self):
+        """Status page writer thread: on every transition, else every heartbeat_interval."""
+        while self._status_thread is not None:
+            # Parked: no heartbeat, only transitions (ServiceStatus.alive() allows for it)
+            self._status_wake.wait(None if self.machine.state == SUSPENDED else self.heartbeat_interval)
+            self._status_wake.clear()
+            try:
+                snapshot = self.store.get()
+                self.status_page.publish(self.machine.state, self.paused, getattr(snapshot, 'generation', 0),
+                                         *self.last_error, self._display_status())
+            except Exception as e:
+                logging.error(f'Failed to publish service status: {e}')
+
+    # Session events that park the service, and the ones that end them
+    PARK_EVENTS = {LOCK: "locked", SUSPEND: "asleep", DISPLAY_OFF: "displays off"}
+    UNPARK_EVENTS = {UNLOCK: "locked", SYSTEM_RESUME: "asleep", DISPLAY_ON: "displays off"}
+
+    def on_session_event(self, kind, cause):
+        """Session source callback: suspend while any park reason holds."""
+        if kind == DISPLAY_CHANGE:
+            self.machine.post(DISPLAY_CHANGED, cause)
+            return
+        with self._park_lock:
+            was_parked = bool(self._park_reasons)
+            if kind in self.PARK_EVENTS:
+                self._park_reasons.add(self.PARK_EVENTS[kind])
+            elif kind in self.UNPARK_EVENTS:
+                self._park_reasons.discard(self.UNPARK_EVENTS[kind])
+            parked = bool(self._park_reasons)
+            reasons = ", ".join(sorted(self._park_reasons))
+        if parked and not was_parked:
+            self.machine.post(SESSION_LOCKED, cause)
+        elif was_parked and not parked:
+            self.machine.post(SESSION_UNLOCKED, cause)
+        elif parked:
+            logging.info(f'{cause}; still parked ({reasons})')
+
+    def _on_config_change(self, old, new):
+        self.machine.post(CONFIG_CHANGED, f"config generation {new.generation}")
+
+    def _monitors(self):
+        if self._monitors_source is None:
+            from monitor_control import get_monitors
+            self._monitors_source = get_monitors
+        return self._monitors_source()
+
+    # --- Guards ---
+
+    def _arm_target(self, event):
+        self.config = self.store.get()
+        if self.config and self.config.get('enabled', False):
+            return ARMED
+        return None if self.machine.state == DISABLED else DISABLED
+
+    def _on_deadline(self, event):
+        """A display went idle: show it (entering PREPARING if nothing is shown yet)."""
+        key = event.data
+        if key not in self.plans or key in self._shown or key in self._due:
+            return None
+        self._due.append(key)
+        if self.machine.state == ARMED:
+            return PREPARING
+        self._show_due()
+        return None
+
+    def _on_resume(self, event):
+        """Input on a covered display: hide it; cool down once none is left."""
+        key, input_at = event.data
+        if key in self._due:
+            self._due.remove(key)
+        if key not in self._shown:
+            return None
+        self._hide([key])
+        self.hide_latency.record(int((time.monotonic() - input_at) * 1e9))
+        _log_hide_latency(self.hide_latency)
+        return None if self._shown or self._due else COOLDOWN
+
+    def _on_trigger(self, event):
+        """Cover every protected display now, without waiting for its deadline."""
+        keys = [key for key in self.plans if key not in self._shown and key not in self._due]
+        if not keys:
+            return None
+        self._due.extend(keys)
+        if self.detector is not None:
+            # The displays' own timers have not fired, so they would not report
+            # the input that should dismiss the overlay; a short timer does.
+            epoch = self.machine.epoch
+            for key in keys:
+                self._timers.append(self._watch_triggered(key, epoch))
+        if self.machine.state == ARMED:
+            return PREPARING
+        self._show_due()
+        return None
+
+    def _on_pause(self, event):
+        self.paused = True
+        self._pause_for = event.data
+        return SUSPENDED
+
+    def _on_unpause(self, event):
+        if not self.paused:
+            return None
+        self.paused = False
+        self._pause_for = None
+        if self._park_reasons:
+            # Still locked or asleep: stay parked until that ends too
+            return SUSPENDED
+        self._unpark()
+        return self._arm_target(event)
+
+    def _on_unlock(self, event):
+        # Stay suspended if protection was paused from the GUI
+        if self.paused:
+            return None
+        self._unpark()
+        return self._arm_target(event)
+
+    def _poll_idle(self, event):
+        # Idle time does not reach back past the last resume
+        idle = min(get_idle_duration(), time.monotonic() - self._resumed_at)
+        self._due = [key for key, plan in self.plans.items() if idle >= plan.timeout]
+        if self._due:
+            return PREPARING
+        self.machine.set_deadline(self.POLL_ARMED)
+        return None
+
+    def _poll_resumed(self, event):
+        idle = get_idle_duration()
+        input_at = time.monotonic() - idle
+        if idle < 1 and input_at > self._shown_at:
+            self._hide(list(self._shown))
+            self.hide_latency.record(int((time.monotonic() - input_at) * 1e9))
+            _log_hide_latency(self.hide_latency)
+            return COOLDOWN
+        self._due = [key for key, plan in self.plans.items() if idle >= plan.timeout and key not in self._shown]
+        self._show_due()
+        self.machine.set_deadline(self.POLL_SHOWING)
+        return None
+
+    # --- Showing and hiding displays ---
+
+    def _show_due(self):
+        """Show the displays whose deadline passed; raises if nothing could show them."""
+        keys, self._due = self._due, []
+        plans = [self.plans[key] for key in keys]
+        geometries = [plan.geometry for plan in plans]
+        if self.host.geometries and self.host.show(geometries):
+            logging.info(f'Showed {len(plans)} overlays in {self.host.last_show_latency * 1000:.1f} ms')
+        else:
+            if self.host.geometries:
+                logging.warning('Overlay host did not respond; spawning overlay processes')
+                self._error(ERROR_HOST_FALLBACK)
+                self.host.stop()
+            for plan in plans:
+                self._overlay_procs[plan.key] = _spawn_overlay(plan, budget_bytes(self.config))
+        for plan in plans:
+            self._shown[plan.key] = plan
+        self._shown_at = time.monotonic()
+        return plans
+
+    def _hide(self, keys):
+        keys = [key for key in keys if key in self._shown]
+        if not keys:
+            return
+        self.host.hide([self._shown[key].geometry for key in keys])
+        for key in keys:
+            del self._shown[key]
+            p = self._overlay_procs.pop(key, None)
+            if p is not None and p.is_alive():
+                p.terminate()
+        logging.info(f'Hid overlays on {len(keys)} displays, {len(self._shown)} still shown')
+
+    def _clear(self):
+        """Hide whatever is shown and drop the idle timers."""
+        self._due = []
+        if self._shown:
+            self._hide(list(self._shown))
+            logging.info('All overlays terminated')
+        for timer in self._timers:
+            self.detector.remove_idle_callback(timer)
+        self._timers = []
+        if self._schedule_timer is not None:
+            self._schedule_timer.cancel()
+            self._schedule_timer = None
+
+    # --- State entry ---
+
+    def _enter_disabled(self, cause):
+        self._clear()
+        # Nothing to prewarm until protection is enabled again
+        self.host.stop()
+        logging.info('Overlay disabled or no config. Waiting for a config change.')
+
+    def _enter_armed(self, cause):
+        self._clear()
+        epoch = self.machine.new_epoch()
+        monitors = self._monitors()
+        plans = self._scheduled(plan_displays(self.config, monitors), monitors, epoch)
+        self.plans = {plan.key: plan for plan in plans}
+        for plan in self.plans.values():
+            logging.info(f'Display {plan.geometry}: {plan.mode} overlay after {plan.timeout}s of inactivity')
+        # Prewarm the overlay windows while we wait
+        try:
+            self.host.prepare([(p.geometry, p.mode, p.file_paths, p.interval) for p in self.plans.values()],
+                              budget_bytes(self.config))
+        except Exception as e:
+            logging.error(f'Failed to prepare overlay hosts: {e}')
+            self._error(ERROR_PREPARE_FAILED)
+        self._warm_images()
+        self.detector = self._detector_factory()
+        if self.detector is None:
+            self.machine.set_deadline(self.POLL_ARMED)
+            return
+        # Pick up monitors added or rearranged since the last activation
+        self.detector.set_monitors(monitors)
+        tracked = set(self.detector.monitor_keys())
+        for plan in self.plans.values():
+            self._timers.append(self._watch(plan, plan.key in tracked, epoch))
+
+    def _warm_images(self):
+        """Pre-scale the overlay images for each display in the background."""
+        jobs = []
+        for plan in self.plans.values():
+            left, top, right, bottom = plan.geometry
+            jobs.extend((path, right - left, bottom - top, "stretch") for path in plan.file_paths)
+        jobs = [job for job in jobs if job not in self._warmed]
+        if not jobs:
+            return
+        try:
+            if self.image_cache is None:
+                self.image_cache = default_cache()
+            self.image_cache.warm(jobs)
+            self._warmed.update(jobs)
+        except Exception as e:
+            logging.warning(f'Could not pre-scale overlay images: {e}')
+
+    def _scheduled(self, plans, monitors, epoch):
+        """Apply the schedule rules active now and set a timer for the next change."""
+        generation = getattr(self.config, 'generation', None)
+        if self._schedule is None or generation != self._schedule_generation:
+            self._schedule = compile_schedule(self.config)
+            self._schedule_generation = generation
+        if self._schedule is None:
+            self.active_rules = []
+            return plans
+        now = self.now()
+        self.active_rules = list(self._schedule.active_at(now))
+        if self.active_rules:
+            logging.info(f'Schedule rules in effect: {", ".join(rule.name for rule in self.active_rules)}')
+        upcoming = self._schedule.next_transition(now)
+        if upcoming is not None:
+            logging.info(f'Next schedule change at {upcoming:%a %H:%M}')
+            self._schedule_timer = threading.Timer(
+                (upcoming - now).total_seconds(), self.machine.post,
+                (SCHEDULE, f'schedule change at {upcoming:%a %H:%M}', epoch))
+            self._schedule_timer.daemon = True
+            self._schedule_timer.start()
+        return apply_rules(plans, self.active_rules, monitors)
+
+    def _watch(self, plan, tracked, epoch):
+        """Idle timer for one display; untracked geometries follow system idle."""
+        key = plan.key
+        if not tracked:
+            logging.warning(f'Display {plan.geometry} is not a connected monitor; using system idle for it')
+
+        def on_idle(timer, idle):
+            self.machine.post(IDLE_DEADLINE, f'{key} idle {idle:.1f}s >= {plan.timeout}s', epoch, key)
+
+        def on_resume(timer, idle):
+            # Pushed by the detector on the first input after the display's deadline
+            self.machine.post(INPUT_RESUMED, f'input on {key}', epoch, (key, time.monotonic() - idle))
+
+        return self.detector.add_idle_callback(plan.timeout, on_idle, on_resume, key=key if tracked else "system")
+
+    def _watch_triggered(self, key, epoch):
+        tracked = key in set(self.detector.monitor_keys())
+
+        def on_resume(timer, idle):
+            self.machine.post(INPUT_RESUMED, f'input on {key}', epoch, (key, time.monotonic() - idle))
+
+        return self.detector.add_idle_callback(self.TRIGGER_GRACE, lambda timer, idle: None, on_resume,
+                                               key=key if tracked else "system")
+
+    def _enter_preparing(self, cause):
+        epoch = self.machine.epoch
+        try:
+            plans = self._show_due()
+        except Exception as e:
+            self._error(ERROR_SHOW_FAILED)
+            self.machine.post(SHOW_FAILED, f'showing overlays failed: {e}', epoch)
+            return
+        self.machine.post(SHOWN, f'{len(plans)} displays covered', epoch)
+
+    def _enter_showing(self, cause):
+        if self.detector is None:
+            self.machine.set_deadline(self.POLL_SHOWING)
+
+    def _enter_cooldown(self, cause):
+        self._clear()
+        failed = self.machine.history[-1].event == SHOW_FAILED
+        self.machine.set_deadline(self.FAILURE_BACKOFF if failed else self.COOLDOWN)
+
+    def _enter_suspended(self, cause):
+        self._clear()
+        self._park()
+        if self.paused and self._pause_for and not self._park_reasons:
+            self.machine.set_deadline(self._pause_for)
+
+    def _park(self):
+        """Stop every periodic wakeup until _unpark()."""
+        if self.detector is not None and self._parked_detector is None:
+            self.detector.park()
+            self._parked_detector = self.detector
+        self.store.stop()
+
+    def _unpark(self):
+        """Restart the config watcher and re-seed idle baselines to now."""
+        self._resumed_at = time.monotonic()
+        self.store.start()
+        detector, self._parked_detector = self._parked_detector, None
+        if detector is not None:
+            detector.unpark()
+
+    # --- Running ---
+
+    def run(self):
+        """Run the service on this thread until stop()."""
+        self.store.start()
+        self.store.subscribe(self._on_config_change)
+        self.machine.post(CONFIG_CHANGED, 'service started')
+        try:
+            self.control.start()
+        except Exception as e:
+            # The service still works; the GUI falls back to the config file watcher
+            logging.error(f'Failed to open the control channel: {e}')
+            self._error(ERROR_CONTROL_CHANNEL)
+        try:
+            self.status_page.start()
+            self._status_thread = threading.Thread(target=self._publish_status, name="StatusPage", daemon=True)
+            self._status_thread.start()
+        except Exception as e:
+            logging.error(f'Failed to create the status page: {e}')
+        try:
+            self.session_source = self._session_source_factory(self.on_session_event)
+            if self.session_source is not None:
+                self.session_source.start()
+        except Exception as e:
+            # Without it the service simply never parks
+            logging.error(f'Failed to watch session and power events: {e}')
+            self.session_source = None
+        try:
+            self.machine.run()
+        finally:
+            if self.session_source is not None:
+                self.session_source.stop()
+            self.control.stop()
+            if self._status_thread is not None:
+                thread, self._status_thread = self._status_thread, None
+                self._status_wake.set()
+                thread.join(2)
+            self.status_page.stop()
+            try:
+                self._clear()
+            except Exception as e:
+                logging.error(f'Failed to hide overlays on exit: {e}')
+            self.host.stop()
+            self.store.unsubscribe(self._on_config_change)
+            self.store.stop()
+
+    def stop(self):
+        self.machine.stop()
+
+
 def run_background_overlay():
     logging.debug('run_background_overlay called')
     # Single instance enforcement
@@ -27,81 +632,11 @@ def run_background_overlay():
         return
     set_background_lock(True)
     try:
-        while True:
-            config = load_config()
-            logging.debug(f'[DIAG] Loaded config: {config}')
-            if not config or not config.get('enabled', False):
-                logging.info('[DIAG] Overlay disabled or no config. Sleeping 60s.')
-                time.sleep(60)
-                continue
-            raw_timeout = config.get('timeout', 5)
-            # Timeout is expected to be in minutes, convert to seconds
-            try:
-                timeout = int(float(raw_timeout) * 60)
-            except Exception:
-                timeout = 300
-            logging.info(f'Waiting for {timeout} seconds ({raw_timeout} minutes) of user inactivity.')
-            # Wait for user idle
-            while True:
-                idle = get_idle_duration()
-                if idle >= timeout:
-                    logging.info(f'Idle timeout reached ({idle:.1f}s >= {timeout}s). Triggering overlay.')
-                    break
-                time.sleep(1)
-                # If config changes, restart
-                new_config = load_config()
-                if new_config != config:
-                    logging.info('Config changed during idle wait, restarting timer.')
-                    config = new_config
-                    raw_timeout = config.get('timeout', 5) if config else 5
-                    # Timeout is expected to be in minutes, convert to seconds
-                    try:
-                        timeout = int(float(raw_timeout) * 60)
-                    except Exception:
-                        timeout = 300
-                    break
-            # Show overlays for all selected monitors
-            # Ensure config is not None before accessing
-            if config is None:
-                config = {}
-            mode = config.get('mode', 'blank')
-            monitors = config.get('monitors', [])
-            file_paths = config.get('file_paths', [])
-            interval = config.get('interval', 30)
-            overlay_procs = []
-            for geometry in monitors:
-                logging.info(f'Launching {mode} overlay for monitor: {geometry}')
-                if mode == 'single' and file_paths:
-                    p = multiprocessing.Process(target=show_image_overlay, args=(geometry, file_paths[0]))
-                    overlay_procs.append(p)
-                elif mode == 'slideshow' and file_paths:
-                    p = multiprocessing.Process(target=show_slideshow_overlay, args=(geometry, file_paths, interval))
-                    overlay_procs.append(p)
-                elif mode == 'gif' and file_paths:
-                    p = multiprocessing.Process(target=show_gif_overlay, args=(geometry, file_paths[0]))
-                    overlay_procs.append(p)
-                elif mode == 'blank':
-                    p = multiprocessing.Process(target=show_black_overlay, args=(geometry,))
-                    overlay_procs.append(p)
-            for p in overlay_procs:
-                p.start()
-            logging.info(f'Started {len(overlay_procs)} overlay processes')
-            # Wait for user input to close overlays
-            while True:
-                idle = get_idle_duration()
-                if idle < 1:
-                    logging.info('User input detected. Closing overlays.')
-                    break
-                time.sleep(0.5)
-            # Terminate overlays
-            for p in overlay_procs:
-                if p.is_alive():
-                    p.terminate()
-            logging.info('All overlays terminated')
-            time.sleep(1)
+        OverlayService(get_config_store()).run()
     finally:
         set_background_lock(False)
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     run_background_overlay()
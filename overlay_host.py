@@ -0,0 +1,569 @@
+"""
+Persistent overlay host for Display Control+
+Keeps hidden, ready-to-show overlay windows for every protected monitor in
+one long-lived process, so an idle activation is a "show" command over a
+pipe instead of spawning processes that import tkinter/PIL and build windows.
+One Tk root (withdrawn) owns a Toplevel per monitor, and decoded images are
+shared between monitors of the same size.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from animation import ANIMATION_BUDGET_MB, Animation, AnimationPlayer
+from image_cache import default_cache, open_image
+from prefetch import PREFETCH_RETRY, PREFETCH_WAIT, Prefetcher
+
+READY_TIMEOUT = 20.0  # host start-up: imports and Tk initialisation
+ACK_TIMEOUT = 2.0
+INPUT_GRACE = 0.25  # ignore pointer events right after mapping the window
+
+
+def _make_photo(source, width, height):
+    """A PhotoImage of ``source`` at the monitor's size (resized only if needed)."""
+    from PIL import Image, ImageTk
+    if source.size != (width, height):
+        try:
+            resample = Image.Resampling.LANCZOS
+        except AttributeError:
+            resample = getattr(Image, 'LANCZOS', 1)
+        source = source.resize((width, height), resample)
+    return ImageTk.PhotoImage(source)
+
+
+class ImageCache:
+    """Monitor-sized images shared by every overlay window in the host.
+
+    Entries are keyed by ``(path, width, height)``, so monitors with the same
+    resolution display the same PhotoImage. Source files are decoded once and
+    kept only until ``release_sources()``; ``retain()`` drops entries no
+    window shows any more. With a ``scaled`` cache (image_cache) monitor-sized
+    images are loaded from disk instead, and sources are never decoded here.
+    Frames loaded ahead by a slideshow prefetcher are handed over with
+    ``add_prefetched()`` and used by the next ``get()`` for their key.
+    """
+
+    def __init__(self, open_image=open_image, make_photo=_make_photo, scaled=None):
+        self._open_image = open_image
+        self._make_photo = make_photo
+        self._scaled = scaled
+        self._entries = {}
+        self._sources = {}
+        self._prefetched = {}
+        self.decodes = 0
+
+    def load(self, path, width, height):
+        """An image to build the (path, width, height) entry from; safe off the Tk thread."""
+        if self._scaled is not None:
+            return self._scaled.load(path, width, height)
+        return self._open_image(path)
+
+    def add_prefetched(self, path, frames):
+        """``frames`` maps ``(width, height)`` to images from ``load()``."""
+        for (width, height), frame in frames.items():
+            self._prefetched[(path, width, height)] = frame
+
+    def get(self, path, width, height):
+        key = (path, width, height)
+        photo = self._entries.get(key)
+        if photo is None:
+            source = self._prefetched.pop(key, None)
+            if source is None and self._scaled is not None:
+                source = self._scaled.load(path, width, height)
+            elif source is None:
+                source = self._sources.get(path)
+                if source is None:
+                    source = self._sources[path] = self._open_image(path)
+                    self.decodes += 1
+            photo = self._entries[key] = self._make_photo(source, width, height)
+        return photo
+
+    def release_sources(self):
+        self._sources.clear()
+        self._prefetched.clear()
+
+    def retain(self, keys):
+        keys = set(keys)
+        for key in list(self._entries):
+            if key not in keys:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class OverlayWindow:
+    """One overlay window, built once and then only shown and hidden.
+
+    ``window`` is a Tk or Toplevel placed over ``geometry``; it starts
+    withdrawn. Content is set ahead of time with ``set_image()`` or
+    ``clear()`` so ``show()`` only has to map the window.
+    """
+
+    def __init__(self, window, geometry):
+        import tkinter as tk
+        left, top, right, bottom = geometry
+        self.geometry = tuple(geometry)
+        self.width = right - left
+        self.height = bottom - top
+        self.window = window
+        window.withdraw()
+        window.overrideredirect(True)
+        window.geometry(f"{self.width}x{self.height}+{left}+{top}")
+        window.configure(bg='black')
+        window.attributes('-topmost', True)
+        window.config(cursor="none")
+        self.label = tk.Label(window, bg='black')
+        self.label.pack(fill=tk.BOTH, expand=True)
+        self.image_key = None
+        self.visible = False
+        self._shown_at = 0.0
+        for sequence in ('<Key>', '<Button-1>', '<Button-2>', '<Button-3>', '<Motion>'):
+            window.bind(sequence, self._on_input)
+
+    def clear(self):
+        self.label.config(image='', text='')
+        self.label.image_ref = None
+        self.image_key = None
+
+    def set_image(self, cache, path):
+        try:
+            photo = cache.get(path, self.width, self.height)
+            self.label.config(image=photo, text='')
+            self.label.image_ref = photo  # Keep reference to prevent garbage collection
+            self.image_key = (path, self.width, self.height)
+        except Exception as e:
+            logging.error(f"Overlay host failed to load {path}: {e}")
+            self.label.config(image='', text=f"Error loading: {path}", fg="red", bg="black")
+            self.label.image_ref = None
+            self.image_key = None
+
+    def set_photo(self, photo):
+        """Display a PhotoImage from outside the cache (an animation frame)."""
+        if self.label.image_ref is not photo:
+            self.label.config(image=photo, text='')
+            self.label.image_ref = photo
+
+    def show(self):
+        window = self.window
+        window.deiconify()
+        window.lift()
+        window.attributes('-topmost', True)
+        window.focus_force()
+        window.update_idletasks()
+        self.visible = True
+        self._shown_at = time.monotonic()
+
+    def hide(self):
+        self.window.withdraw()
+        self.visible = False
+
+    def destroy(self):
+        self.window.destroy()
+
+    def _on_input(self, event=None):
+        if self.visible and time.monotonic() - self._shown_at > INPUT_GRACE:
+            logging.info(f"User input detected, hiding overlay on {self.geometry}")
+            self.hide()
+
+
+class _Content:
+    """Windows showing the same content; a slideshow advances them together."""
+    __slots__ = ("mode", "file_paths", "interval", "windows", "index", "after", "due", "prefetch")
+
+    def __init__(self, mode, file_paths, interval):
+        self.mode = mode
+        self.file_paths = list(file_paths)
+        self.interval = interval
+        self.windows = []
+        self.index = 0
+        self.after = None
+        self.due = 0.0
+        self.prefetch = None
+
+    @property
+    def slideshow(self):
+        return self.mode == 'slideshow' and len(self.file_paths) > 1
+
+
+class OverlayRenderer:
+    """Every overlay window of the host, driven from one Tk interpreter.
+
+    ``configure()`` creates or destroys a Toplevel per display and prepares
+    its content. Displays are shown and hidden independently; displays with
+    the same content share one slideshow timer, so each image is decoded
+    once per step whatever the monitor count. While a slideshow runs, a
+    Prefetcher loads its next images off the Tk thread; steps follow fixed
+    deadlines, so the interval does not drift by the time a step takes.
+
+    Animations ("gif" mode) show their first frame while hidden. One
+    AnimationPlayer per file and monitor size starts decoding the first
+    time the display is shown and keeps its frames across activations, so
+    each frame of an animation within ``animation_budget`` bytes is decoded
+    and scaled once.
+    """
+
+    def __init__(self, root, cache=None, make_window=None, make_player=None,
+                 animation_budget=ANIMATION_BUDGET_MB * 1024 * 1024):
+        self.root = root
+        self.cache = cache if cache is not None else ImageCache()
+        self._make_window = make_window or self._toplevel
+        self._make_player = make_player or self._player
+        self.animation_budget = animation_budget
+        self.windows = {}
+        self._contents = []
+        self._players = {}
+
+    def _toplevel(self, geometry):
+        import tkinter as tk
+        return OverlayWindow(tk.Toplevel(self.root), geometry)
+
+    def configure(self, displays, animation_budget=None):
+        """``displays`` is a list of ``(geometry, mode, file_paths, interval)``."""
+        if animation_budget is not None and animation_budget != self.animation_budget:
+            # Players decide between memory and streaming when they start
+            self.animation_budget = animation_budget
+            for player in self._players.values():
+                player.close()
+            self._players.clear()
+        for content in self._contents:
+            self._cancel(content)
+        wanted = [tuple(d[0]) for d in displays]
+        for geometry in list(self.windows):
+            if geometry not in wanted:
+                self.windows.pop(geometry).destroy()
+        contents = {}
+        for geometry, mode, file_paths, interval in displays:
+            geometry = tuple(geometry)
+            window = self.windows.get(geometry)
+            if window is None:
+                window = self.windows[geometry] = self._make_window(geometry)
+            spec = (mode, tuple(file_paths or ()), max(1, int(interval or 30)))
+            content = contents.get(spec)
+            if content is None:
+                content = contents[spec] = _Content(*spec)
+            content.windows.append(window)
+        self._contents = list(contents.values())
+        for content in self._contents:
+            self._render(content, content.windows)
+        self._retain()
+        wanted = {key for content in self._contents for key in self._animation_keys(content)}
+        for key in list(self._players):
+            if key not in wanted:
+                self._players.pop(key).close()
+        for key in wanted:
+            if key not in self._players:
+                self._players[key] = self._make_player(key)
+
+    def _player(self, key):
+        path, width, height = key
+        animation = Animation(path, width, height, budget_bytes=self.animation_budget)
+        return AnimationPlayer(self.root, animation, lambda photo: self._show_frame(key, photo))
+
+    def _animation_keys(self, content, windows=None):
+        if content.mode != 'gif' or not content.file_paths:
+            return set()
+        windows = content.windows if windows is None else windows
+        return {(content.file_paths[0], w.width, w.height) for w in windows}
+
+    def _show_frame(self, key, photo):
+        path, width, height = key
+        for content in self._contents:
+            if key in self._animation_keys(content):
+                for window in content.windows:
+                    if (window.width, window.height) == (width, height):
+                        window.set_photo(photo)
+
+    def _render(self, content, windows):
+        """Put the content's current image (or black) on ``windows``."""
+        if content.mode in ('single', 'slideshow', 'gif') and content.file_paths:
+            path = content.file_paths[content.index]
+            for window in windows:
+                window.set_image(self.cache, path)
+        else:
+            for window in windows:
+                window.clear()
+
+    def _retain(self):
+        """Drop decoded sources and any image no window shows."""
+        self.cache.release_sources()
+        self.cache.retain(w.image_key for w in self.windows.values() if w.image_key)
+
+    def _targets(self, geometries):
+        if geometries is None:
+            return set(self.windows.values())
+        return {self.windows[tuple(g)] for g in geometries if tuple(g) in self.windows}
+
+    def show(self, geometries=None):
+        """Map the windows for ``geometries`` (all displays if None)."""
+        targets = self._targets(geometries)
+        for content in self._contents:
+            shown = [w for w in content.windows if w in targets and not w.visible]
+            if not shown:
+                continue
+            if content.slideshow and content.after is not None:
+                # Join a slideshow already running on other displays
+                self._render(content, shown)
+                self._retain()
+            for window in shown:
+                window.show()
+            if content.slideshow and content.after is None:
+                self._start_slideshow(content)
+            for key in self._animation_keys(content, [w for w in content.windows if w.visible]):
+                player = self._players.get(key)
+                if player is not None and not player.playing:
+                    player.play()
+
+    def hide(self, geometries=None):
+        """Withdraw the windows for ``geometries`` (all displays if None)."""
+        targets = self._targets(geometries)
+        for window in targets:
+            window.hide()
+        rewound = False
+        for content in self._contents:
+            visible = [w for w in content.windows if w.visible]
+            if visible:
+                # Sizes no longer on screen stop playing
+                playing = self._animation_keys(content, visible)
+                for key in self._animation_keys(content) - playing:
+                    player = self._players.get(key)
+                    if player is not None:
+                        player.pause()
+                continue
+            self._cancel(content)
+            if content.index or self._animation_keys(content):
+                # Next activation starts from the first image again, already decoded
+                content.index = 0
+                self._render(content, content.windows)
+                rewound = True
+        if rewound:
+            self._retain()
+
+    def _start_slideshow(self, content):
+        sizes = {(w.width, w.height) for w in content.windows}
+        content.prefetch = Prefetcher(
+            content.file_paths, lambda path: {size: self.cache.load(path, *size) for size in sizes},
+            start=content.index + 1).start()
+        content.due = time.monotonic() + content.interval
+        content.after = self.root.after(content.interval * 1000, self._advance, content)
+
+    def _cancel(self, content):
+        if content.after is not None:
+            self.root.after_cancel(content.after)
+            content.after = None
+        if content.prefetch is not None:
+            content.prefetch.stop()
+            content.prefetch = None
+        for key in self._animation_keys(content):
+            player = self._players.get(key)
+            if player is not None:
+                player.pause()
+
+    def _advance(self, content):
+        content.after = None
+        visible = [w for w in content.windows if w.visible]
+        if not visible:
+            return
+        item = content.prefetch.take(PREFETCH_WAIT) if content.prefetch is not None else None
+        if item is None:
+            # Still loading: keep the current image and look again shortly
+            content.after = self.root.after(int(PREFETCH_RETRY * 1000), self._advance, content)
+            return
+        path, frames, _ = item
+        if frames:
+            self.cache.add_prefetched(path, frames)
+        content.index = (content.index + 1) % len(content.file_paths)
+        self._render(content, visible)
+        self._retain()
+        now = time.monotonic()
+        content.due += content.interval
+        if content.due <= now:
+            # Far behind (e.g. the machine was busy): skip ahead rather than catch up
+            content.due = now + content.interval
+        content.after = self.root.after(int((content.due - now) * 1000), self._advance, content)
+
+    def destroy(self):
+        self.hide()
+        for player in self._players.values():
+            player.close()
+        self._players.clear()
+        for window in self.windows.values():
+            window.destroy()
+        self.windows.clear()
+        self._contents = []
+
+
+def host_main(conn):
+    """Host process entry point: every overlay window, driven over ``conn``.
+
+    Commands are ``("configure", displays, animation_budget)``, ``("show", geometries)``,
+    ``("hide", geometries)`` (None for every display) and ``("quit",)``; each
+    is answered with ``(name, pid)`` once done. A reader thread forwards them into the Tk loop
+    with a virtual event, so the host sleeps until a command arrives.
+    """
+    import tkinter as tk
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        cache = ImageCache(scaled=default_cache())
+    except OSError as e:
+        logging.warning(f"Image cache unavailable, scaling in the host: {e}")
+        cache = ImageCache()
+    renderer = OverlayRenderer(root, cache)
+    commands = queue.SimpleQueue()
+    pid = os.getpid()
+
+    def handle(event=None):
+        while True:
+            try:
+                msg = commands.get_nowait()
+            except queue.Empty:
+                return
+            name = msg[0]
+            try:
+                if name == "configure":
+                    renderer.configure(*msg[1:])
+                elif name == "show":
+                    renderer.show(msg[1])
+                elif name == "hide":
+                    renderer.hide(msg[1])
+                elif name == "quit":
+                    renderer.destroy()
+                    root.destroy()
+                    return
+                conn.send((name, pid))
+            except Exception as e:
+                logging.error(f"Overlay host command {name} failed: {e}")
+                try:
+                    conn.send(("error", pid, str(e)))
+                except Exception:
+                    pass
+
+    def reader():
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                # Service went away
+                msg = ("quit",)
+            commands.put(msg)
+            try:
+                root.event_generate("<<HostCommand>>", when="tail")
+            except Exception:
+                return
+            if msg[0] == "quit":
+                return
+
+    root.bind("<<HostCommand>>", handle)
+    # Start reading once the loop runs, so event_generate has a loop to post to
+    root.after(0, lambda: threading.Thread(target=reader, daemon=True).start())
+    conn.send(("ready", pid))
+    root.mainloop()
+
+
+class OverlayHost:
+    """Service side: one persistent, prewarmed host process for all monitors.
+
+    ``prepare()`` while waiting for idle starts the host if needed (again if
+    it died) and pushes display and content changes, so ``show()`` at a
+    display's deadline is a single pipe message.
+    """
+
+    def __init__(self, target=host_main):
+        self._target = target
+        self.process = None
+        self._conn = None
+        self._ready = False
+        self._config = None
+        self._animation_budget = None
+        self.last_show_latency = None
+
+    def _spawn(self):
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=self._target, args=(child,), daemon=True)
+        process.start()
+        child.close()
+        logging.info(f"Overlay host {process.pid} started")
+        self.process, self._conn, self._ready, self._config = process, parent, False, None
+
+    def prepare(self, displays, animation_budget=None):
+        """Make sure the host runs with a window per display showing its content.
+
+        ``displays`` is a list of ``(geometry, mode, file_paths, interval)``;
+        ``animation_budget`` is the bytes an animation may keep in memory.
+        """
+        displays = [(tuple(g), mode, list(files or []), interval) for g, mode, files, interval in displays]
+        if not displays:
+            self.stop()
+            return
+        if self.process is not None and not self.process.is_alive():
+            logging.warning(f"Overlay host {self.process.pid} died; restarting")
+            self.stop()
+        if self.process is None:
+            self._spawn()
+        changed = (displays, animation_budget) != (self._config, self._animation_budget)
+        if changed and self._send(("configure", displays, animation_budget)):
+            self._config, self._animation_budget = displays, animation_budget
+
+    @property
+    def geometries(self):
+        return [d[0] for d in self._config] if self.process is not None and self._config else []
+
+    def _send(self, msg):
+        try:
+            self._conn.send(msg)
+            return True
+        except Exception as e:
+            logging.error(f"Overlay host unreachable: {e}")
+            return False
+
+    def _wait_for(self, name, timeout):
+        """Read replies until ``name`` arrives; False on timeout or a dead host."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                if not self._conn.poll(remaining):
+                    return False
+                reply = self._conn.recv()
+            except (EOFError, OSError):
+                return False
+            if reply[0] == "ready":
+                self._ready = True
+            elif reply[0] == "error":
+                logging.error(f"Overlay host: {reply[2]}")
+            if reply[0] == name:
+                return True
+
+    def _command(self, name, geometries=None):
+        if geometries is not None:
+            geometries = [tuple(g) for g in geometries]
+        if self.process is None or not self._send((name, geometries)):
+            return False
+        return self._wait_for(name, ACK_TIMEOUT if self._ready else READY_TIMEOUT)
+
+    def show(self, geometries=None):
+        """Map the prepared windows (all, or those for ``geometries``); True once the host confirmed."""
+        start = time.perf_counter()
+        ok = self._command("show", geometries)
+        self.last_show_latency = time.perf_counter() - start
+        return ok
+
+    def hide(self, geometries=None):
+        return self._command("hide", geometries)
+
+    def stop(self):
+        if self.process is None:
+            return
+        self._send(("quit",))
+        self.process.join(2)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1)
+        self._conn.close()
+        self.process, self._conn, self._config = None, None, None
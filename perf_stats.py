@@ -0,0 +1,75 @@
+"""
+Latency statistics for Display Control+
+Records durations into a fixed-size sample ring from any thread without a lock,
+and reports percentiles on demand.
+"""
+import itertools
+import time
+
+
+class LatencyStats:
+    """Recent-sample latency recorder with a budget.
+
+    ``record()`` is cheap enough for hook callbacks: it claims a slot with an
+    atomic counter and stores one integer. Percentiles are computed from the
+    last ``capacity`` samples when asked for; totals and the maximum cover
+    the whole lifetime.
+    """
+
+    def __init__(self, budget_ms=None, capacity=4096):
+        self.budget_ns = None if budget_ms is None else int(budget_ms * 1e6)
+        self._samples = [0] * capacity
+        self._seq = itertools.count()
+        self._capacity = capacity
+        self.count = 0
+        self.over_budget = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        """Add one duration in nanoseconds; return True if it broke the budget."""
+        i = next(self._seq)
+        self._samples[i % self._capacity] = ns
+        self.count = i + 1
+        if ns > self.max_ns:
+            self.max_ns = ns
+        if self.budget_ns is not None and ns > self.budget_ns:
+            self.over_budget += 1
+            return True
+        return False
+
+    def time(self, fn, *args, **kwargs):
+        """Call ``fn`` and record how long it took."""
+        t0 = time.perf_counter_ns()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.record(time.perf_counter_ns() - t0)
+
+    def percentiles(self, points=(50, 90, 99, 99.9)):
+        """``{point: microseconds}`` over the recent samples (empty if none)."""
+        n = min(self.count, self._capacity)
+        if not n:
+            return {}
+        samples = sorted(self._samples[:n])
+        return {p: samples[min(n - 1, int(n * p / 100.0))] / 1000.0 for p in points}
+
+    def summary(self):
+        """Counts, budget breaches and percentiles (microseconds) as a dict."""
+        pct = self.percentiles()
+        return {
+            "count": self.count,
+            "over_budget": self.over_budget,
+            "budget_us": None if self.budget_ns is None else self.budget_ns / 1000.0,
+            "max_us": self.max_ns / 1000.0,
+            "p50_us": pct.get(50, 0.0),
+            "p90_us": pct.get(90, 0.0),
+            "p99_us": pct.get(99, 0.0),
+            "p999_us": pct.get(99.9, 0.0),
+        }
+
+    def reset(self):
+        self._samples = [0] * self._capacity
+        self._seq = itertools.count()
+        self.count = 0
+        self.over_budget = 0
+        self.max_ns = 0
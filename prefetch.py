@@ -0,0 +1,78 @@
+"""
+Slideshow prefetching for Display Control+
+A worker thread loads (decodes and scales) the images a slideshow will show
+next, up to ``depth`` ahead, so an image switch on the Tk thread only swaps
+in a frame that is already prepared. Pillow releases the GIL while decoding
+and resampling, so the Tk loop stays responsive meanwhile.
+"""
+import collections
+import logging
+import threading
+
+PREFETCH_DEPTH = 2
+PREFETCH_WAIT = 0.05   # longest the Tk thread waits for a frame that is late
+PREFETCH_RETRY = 0.05  # then it keeps the current image and looks again
+
+
+class Prefetcher:
+    """Loads ``paths`` in slideshow order (cycling, from ``start``) ahead of use.
+
+    ``load(path)`` runs on the worker thread; ``take()`` returns the next
+    ``(path, frame, error)`` in order, where exactly one of frame and error
+    is set. At most ``depth`` loaded frames are held; the worker sleeps
+    until one is taken.
+    """
+
+    def __init__(self, paths, load, depth=PREFETCH_DEPTH, start=0):
+        self.paths = list(paths)
+        self.depth = max(1, depth)
+        self._load = load
+        self._start = start
+        self._ready = collections.deque()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        self.loads = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="SlideshowPrefetch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._ready.clear()
+            self._cond.notify_all()
+
+    def take(self, timeout=0):
+        """The next loaded frame, waiting up to ``timeout`` seconds; None if it is not ready."""
+        with self._cond:
+            if not self._ready and timeout:
+                self._cond.wait_for(lambda: self._ready or self._stopped, timeout)
+            if not self._ready:
+                return None
+            item = self._ready.popleft()
+            self._cond.notify_all()
+            return item
+
+    def _run(self):
+        index = self._start
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._ready) < self.depth or self._stopped)
+                if self._stopped:
+                    return
+            path = self.paths[index % len(self.paths)]
+            try:
+                frame, error = self._load(path), None
+            except Exception as e:
+                logging.error(f"Slideshow could not prepare {path}: {e}")
+                frame, error = None, e
+            with self._cond:
+                if self._stopped:
+                    return
+                self.loads += 1
+                self._ready.append((path, frame, error))
+                self._cond.notify_all()
+            index += 1
@@ -0,0 +1,156 @@
+"""
+Weekly protection schedules for Display Control+
+The config's "schedule" section lists rules such as
+
+    {"name": "lobby overnight", "days": ["mon", "tue"], "start": "22:00", "end": "06:00",
+     "monitors": [1], "timeout_minutes": 1, "mode": "blank"}
+    {"name": "meetings", "days": ["wed"], "start": "10:00", "end": "11:30", "enabled": false}
+
+that override the timeout, mode or protection of some monitors (all when
+``monitors`` is omitted) at certain times; later rules win. The rules are
+compiled once into a sorted list of the minutes of the week where the set of
+active rules changes, so the service can bisect for the current set and
+sleep until the next transition instead of evaluating rules on a tick.
+"""
+import bisect
+import collections
+import datetime
+import logging
+
+from display_plan import with_overrides
+from monitor_index import monitor_key
+
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+
+ScheduleRule = collections.namedtuple("ScheduleRule", "name days start end timeout mode enabled monitors")
+
+
+def _minute_of_day(text):
+    hours, minutes = str(text).split(":")
+    value = int(hours) * 60 + int(minutes)
+    if not 0 <= value <= DAY_MINUTES or not 0 <= int(minutes) < 60:
+        raise ValueError(f"bad time '{text}'")
+    return value
+
+
+def _days(value):
+    if value is None:
+        return tuple(range(7))
+    days = []
+    for day in value:
+        day = str(day).lower()[:3]
+        if day not in DAYS:
+            raise ValueError(f"bad day '{day}'")
+        days.append(DAYS.index(day))
+    return tuple(sorted(set(days)))
+
+
+def parse_rules(config):
+    """ScheduleRules from the config's "schedule" list; invalid rules are skipped."""
+    rules = []
+    for i, raw in enumerate((config or {}).get("schedule") or ()):
+        name = raw.get("name") or f"rule {i + 1}"
+        try:
+            timeout = raw.get("timeout_minutes")
+            monitors = raw.get("monitors")
+            rule = ScheduleRule(
+                name, _days(raw.get("days")),
+                _minute_of_day(raw.get("start", "00:00")), _minute_of_day(raw.get("end", "24:00")),
+                None if timeout is None else float(timeout),
+                raw.get("mode"),
+                None if raw.get("enabled") is None else bool(raw.get("enabled")),
+                None if monitors is None else tuple(monitors),
+            )
+        except (AttributeError, TypeError, ValueError) as e:
+            logging.warning(f"Ignoring schedule rule '{name}': {e}")
+            continue
+        if rule.start == rule.end:
+            logging.warning(f"Ignoring schedule rule '{name}': it starts and ends at the same time")
+            continue
+        rules.append(rule)
+    return rules
+
+
+class CompiledSchedule:
+    """The rules active in each segment of the week, between sorted transition minutes.
+
+    ``points[i]`` is the minute of the week (Monday 00:00 = 0) where segment
+    ``i`` starts; ``active[i]`` its rules in config order. Adjacent segments
+    always differ, so every point is a real transition.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        spans = []  # (start, end, rule index) within one week
+        for index, rule in enumerate(self.rules):
+            for day in rule.days:
+                start = day * DAY_MINUTES + rule.start
+                # A rule ending at or before its start runs past midnight
+                end = day * DAY_MINUTES + rule.end + (DAY_MINUTES if rule.end <= rule.start else 0)
+                if end > WEEK_MINUTES:
+                    spans.append((start, WEEK_MINUTES, index))
+                    spans.append((0, end - WEEK_MINUTES, index))
+                else:
+                    spans.append((start, end, index))
+        bounds = sorted({0} | {s for s, _, _ in spans} | {e % WEEK_MINUTES for _, e, _ in spans})
+        self.points = []
+        self.active = []
+        for point in bounds:
+            active = tuple(self.rules[i] for i in sorted({i for s, e, i in spans if s <= point < e}))
+            if not self.active or active != self.active[-1]:
+                self.points.append(point)
+                self.active.append(active)
+        # The segment wrapping from Sunday night into Monday is one segment
+        if len(self.points) > 1 and self.active[0] == self.active[-1]:
+            self.points.pop(0)
+            self.active.pop(0)
+
+    @staticmethod
+    def _position(when):
+        return (when.weekday() * DAY_MINUTES + when.hour * 60 + when.minute
+                + (when.second + when.microsecond / 1e6) / 60)
+
+    def active_at(self, when):
+        """Rules in effect at the local datetime ``when``."""
+        # Before the first point we are still in the last segment (from last week)
+        return self.active[bisect.bisect_right(self.points, self._position(when)) - 1]
+
+    def next_transition(self, when):
+        """The first datetime after ``when`` at which the active rules change, or None."""
+        if len(self.points) < 2:
+            return None
+        position = self._position(when)
+        i = bisect.bisect_right(self.points, position)
+        target = self.points[i] if i < len(self.points) else self.points[0] + WEEK_MINUTES
+        return when + datetime.timedelta(minutes=target - position)
+
+
+def compile_schedule(config):
+    """CompiledSchedule for the config, or None if it has no valid rules."""
+    rules = parse_rules(config)
+    return CompiledSchedule(rules) if rules else None
+
+
+def apply_rules(plans, rules, monitors=None):
+    """Plans with the active rules applied in order; disabled displays are dropped.
+
+    A rule's ``monitors`` entries are indices into ``monitors`` or geometry keys.
+    """
+    index_keys = {i: monitor_key(m['geometry']) for i, m in enumerate(monitors or [])}
+    result = []
+    for plan in plans:
+        enabled = True
+        for rule in rules:
+            if rule.monitors is not None and not any(
+                    index_keys.get(m) == plan.key if isinstance(m, int) else str(m) == plan.key
+                    for m in rule.monitors):
+                continue
+            if rule.enabled is not None:
+                enabled = rule.enabled
+            if rule.timeout is not None or rule.mode is not None:
+                plan = with_overrides(plan, rule.timeout, rule.mode)
+        if enabled:
+            result.append(plan)
+    return result
@@ -0,0 +1,146 @@
+"""
+Local control channel for the Display Control+ background service
+The service listens on a per-user named pipe (Windows) or Unix socket so the
+GUI can reload settings, trigger or dismiss overlays, pause protection and
+query status in place, instead of killing and restarting the process.
+"""
+import logging
+import os
+import sys
+import threading
+from multiprocessing.connection import Client, Listener
+
+from log_config import get_appdata_dir
+
+REQUEST_TIMEOUT = 2.0
+
+
+class ServiceUnavailable(ConnectionError):
+    """No service answered on the control channel."""
+
+
+def control_address(suffix=""):
+    """The per-user endpoint; ``suffix`` gives a separate one (e.g. for tests)."""
+    if sys.platform == "win32":
+        user = os.environ.get("USERNAME", "user")
+        return rf"\\.\pipe\DisplayControlPlus-{user}{suffix}"
+    return os.path.join(get_appdata_dir(), f"control{suffix}.sock")
+
+
+def _authkey(create=False):
+    """Per-user secret shared by the service and its clients through AppData."""
+    path = os.path.join(get_appdata_dir(), "control.key")
+    try:
+        with open(path, "rb") as f:
+            key = f.read()
+        if key:
+            return key
+    except OSError:
+        if not create:
+            raise ServiceUnavailable("Service control key not found")
+    key = os.urandom(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+class ControlServer:
+    """Serves ``(command, args)`` requests with ``handler(command, args)``.
+
+    Replies are ``("ok", result)`` or ``("error", message)``. One thread
+    accepts connections; each connection may send several requests.
+    """
+
+    def __init__(self, handler, address=None, authkey=None):
+        self.handler = handler
+        self.address = address or control_address()
+        self._authkey = authkey
+        self._listener = None
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        if self._authkey is None:
+            self._authkey = _authkey(create=True)
+        if sys.platform != "win32" and os.path.exists(self.address):
+            # Left over from a service that did not shut down cleanly
+            os.remove(self.address)
+        self._listener = Listener(self.address, authkey=self._authkey)
+        self._stopping = False
+        self._thread = threading.Thread(target=self._serve, name="ControlServer", daemon=True)
+        self._thread.start()
+        logging.info(f"Control channel listening on {self.address}")
+
+    def stop(self):
+        if self._listener is None:
+            return
+        self._stopping = True
+        # accept() does not return on close(); a throwaway connection wakes it
+        try:
+            Client(self.address, authkey=self._authkey).close()
+        except Exception:
+            pass
+        self._thread.join(2)
+        self._listener.close()
+        self._listener = None
+
+    def _serve(self):
+        while not self._stopping:
+            try:
+                conn = self._listener.accept()
+            except Exception as e:
+                if self._stopping:
+                    return
+                logging.warning(f"Control channel rejected a connection: {e}")
+                continue
+            if self._stopping:
+                conn.close()
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    if not conn.poll(REQUEST_TIMEOUT):
+                        return
+                    command, args = conn.recv()
+                except (EOFError, OSError, ValueError, TypeError):
+                    return
+                try:
+                    reply = ("ok", self.handler(command, list(args)))
+                except Exception as e:
+                    reply = ("error", str(e))
+                try:
+                    conn.send(reply)
+                except (OSError, ValueError):
+                    return
+
+
+def send_command(command, *args, address=None, authkey=None, timeout=REQUEST_TIMEOUT):
+    """Send one command to the running service and return its result.
+
+    Raises ServiceUnavailable if no service answers, or RuntimeError with
+    the service's message if the command failed.
+    """
+    address = address or control_address()
+    if sys.platform != "win32" and not os.path.exists(address):
+        raise ServiceUnavailable("Background service is not running")
+    try:
+        conn = Client(address, authkey=authkey or _authkey())
+    except ServiceUnavailable:
+        raise
+    except Exception as e:
+        raise ServiceUnavailable(f"Background service is not reachable: {e}") from e
+    with conn:
+        try:
+            conn.send((command, args))
+            if not conn.poll(timeout):
+                raise ServiceUnavailable(f"Background service did not answer '{command}'")
+            status, result = conn.recv()
+        except (EOFError, OSError) as e:
+            raise ServiceUnavailable(f"Background service closed the control channel: {e}") from e
+    if status != "ok":
+        raise RuntimeError(result)
+    return result
@@ -0,0 +1,135 @@
+"""
+Service state machine for Display Control+
+The background service moves between explicit states on events (config
+change, idle deadline, input resumed, session lock, display change) instead
+of nested loops with fixed sleeps. The machine thread blocks on its event
+queue, or until the current state's deadline, and logs every transition with
+its time and cause.
+"""
+import collections
+import datetime
+import logging
+import queue
+import time
+
+# States
+DISABLED = "DISABLED"
+ARMED = "ARMED"
+PREPARING = "PREPARING"
+SHOWING = "SHOWING"
+COOLDOWN = "COOLDOWN"
+SUSPENDED = "SUSPENDED"
+STATES = (DISABLED, ARMED, PREPARING, SHOWING, COOLDOWN, SUSPENDED)
+
+# Events
+CONFIG_CHANGED = "config-changed"
+IDLE_DEADLINE = "idle-deadline"
+INPUT_RESUMED = "input-resumed"
+SESSION_LOCKED = "session-locked"
+SESSION_UNLOCKED = "session-unlocked"
+DISPLAY_CHANGED = "display-changed"
+SHOWN = "shown"
+SHOW_FAILED = "show-failed"
+TRIGGER = "trigger"  # control channel: cover every display now
+DISMISS = "dismiss"  # control channel: hide overlays
+PAUSE = "pause"
+RESUME = "resume"
+SCHEDULE = "schedule"  # the active schedule rules changed
+TIMER = "timer"  # the deadline set with set_deadline() passed
+STOP = "stop"
+
+Event = collections.namedtuple("Event", "name cause epoch data")
+Transition = collections.namedtuple("Transition", "when old new event cause")
+
+
+def _timestamp(when):
+    return datetime.datetime.fromtimestamp(when).isoformat(sep=" ", timespec="milliseconds")
+
+
+class ServiceStateMachine:
+    """Event-driven state machine run on one thread.
+
+    ``transitions`` maps ``(state, event)`` to a target state, or to a
+    callable ``guard(event)`` returning the target state or None (stay, event
+    ignored). Pairs not in the table are ignored. ``on_enter[state](cause)``
+    runs after each transition, re-entries included; it may ``post()`` events
+    or ``set_deadline()``. ``on_transition(transition)`` runs after that.
+
+    Events posted with an ``epoch`` are dropped if ``new_epoch()`` was called
+    since, so callbacks from timers that have been replaced cannot act on a
+    later cycle.
+    """
+
+    def __init__(self, transitions, on_enter=None, initial=DISABLED,
+                 clock=time.monotonic, wall_clock=time.time, history=64, on_transition=None):
+        self.transitions = transitions
+        self.on_enter = on_enter or {}
+        self.on_transition = on_transition
+        self.state = initial
+        self.epoch = 0
+        self.history = collections.deque(maxlen=history)
+        self._events = queue.SimpleQueue()
+        self._deadline = None
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self.since = wall_clock()
+
+    def post(self, event, cause=None, epoch=None, data=None):
+        """Queue an event; safe from any thread. ``data`` is passed on to guards."""
+        self._events.put(Event(event, cause or event, epoch, data))
+
+    def new_epoch(self):
+        self.epoch += 1
+        return self.epoch
+
+    def set_deadline(self, seconds):
+        """Deliver a TIMER event after ``seconds`` unless the state changes first (None clears)."""
+        self._deadline = None if seconds is None else self._clock() + seconds
+
+    def dispatch(self, event):
+        """Apply one event; returns True if it caused a transition."""
+        if event.epoch is not None and event.epoch != self.epoch:
+            logging.debug(f"Dropped stale {event.name} ({event.cause})")
+            return False
+        target = self.transitions.get((self.state, event.name))
+        if callable(target):
+            target = target(event)
+        if target is None:
+            logging.debug(f"{event.name} ignored in {self.state}")
+            return False
+        self.enter(target, event.name, event.cause)
+        return True
+
+    def enter(self, state, event, cause):
+        old = self.state
+        when = self._wall_clock()
+        self.state = state
+        self.since = when
+        self._deadline = None
+        transition = Transition(when, old, state, event, cause)
+        self.history.append(transition)
+        logging.info(f"Service {old} -> {state} at {_timestamp(when)}: {cause}")
+        action = self.on_enter.get(state)
+        if action is not None:
+            action(cause)
+        if self.on_transition is not None:
+            self.on_transition(transition)
+
+    def run(self):
+        """Handle events until STOP; sleeps between events (and until the deadline)."""
+        while True:
+            timeout = None if self._deadline is None else max(0.0, self._deadline - self._clock())
+            try:
+                event = self._events.get(timeout=timeout)
+            except queue.Empty:
+                self._deadline = None
+                event = Event(TIMER, "deadline passed", None, None)
+            if event.name == STOP:
+                return
+            try:
+                self.dispatch(event)
+            except Exception as e:
+                logging.error(f"Service failed handling {event.name} in {self.state}: {e}")
+
+    def stop(self):
+        self.post(STOP)
@@ -0,0 +1,159 @@
+"""
+Status page published by the Display Control+ background service
+A small fixed-layout SeqlockBlock under a well-known per-user name holds a
+heartbeat, the service state, the active overlay mode, the config generation,
+the last error and idle seconds per protected display. The GUI, a tray icon
+or a monitoring agent can read it at any rate without parsing files,
+querying processes or calling the service.
+"""
+import logging
+import os
+import time
+from collections import namedtuple
+
+from shared_block import SeqlockBlock
+from service_state import STATES, SUSPENDED
+
+MAGIC = b"DCST"
+VERSION = 1
+MAX_MONITORS = 16
+HEARTBEAT_INTERVAL = 1.0
+STALE_AFTER = 5.0
+MODES = ("", "blank", "single", "slideshow", "gif")
+
+# Last error codes
+ERROR_NONE = 0
+ERROR_SHOW_FAILED = 1       # no overlay could be shown
+ERROR_HOST_FALLBACK = 2     # overlay host did not respond; per-display processes used
+ERROR_PREPARE_FAILED = 3    # overlay host could not be prepared
+ERROR_CONTROL_CHANNEL = 4   # control channel could not be opened
+ERROR_NAMES = {
+    ERROR_NONE: "none", ERROR_SHOW_FAILED: "show failed", ERROR_HOST_FALLBACK: "host fallback",
+    ERROR_PREPARE_FAILED: "prepare failed", ERROR_CONTROL_CHANNEL: "control channel",
+}
+
+# magic, version, writer pid, heartbeat counter, heartbeat time, state, paused,
+# active mode, config generation, last error code and time, display count,
+# then per display: geometry, idle seconds, mode and shown flag
+LAYOUT = (
+    "<4sIIQdBB16sQid" + "I"
+    + "i" * (4 * MAX_MONITORS) + "d" * MAX_MONITORS + "B" * MAX_MONITORS + "B" * MAX_MONITORS
+)
+
+DisplayStatus = namedtuple("DisplayStatus", "geometry idle mode shown")
+
+
+class ServiceStatus(namedtuple("ServiceStatus", "pid heartbeat updated state paused mode "
+                                                "generation error error_at displays")):
+    """One read of the status page; times are ``time.monotonic()`` values."""
+    __slots__ = ()
+
+    def alive(self, now=None):
+        """True if the service wrote a heartbeat recently, or is parked.
+
+        A SUSPENDED service (session locked, asleep) skips heartbeats so it
+        never wakes; its page is removed when it exits.
+        """
+        if self.state == SUSPENDED:
+            return True
+        now = time.monotonic() if now is None else now
+        return now - self.updated < STALE_AFTER
+
+
+def status_name():
+    """Well-known per-user name of the status block."""
+    user = os.environ.get("USERNAME") or os.environ.get("USER") or "user"
+    return f"DisplayControlPlus-status-{user}"
+
+
+def _mode_code(mode):
+    return MODES.index(mode) if mode in MODES else 0
+
+
+def pack_status(heartbeat, state, paused, generation, error, error_at, displays, pid=None, updated=None):
+    """Flatten service status into LAYOUT field order.
+
+    ``displays`` is a list of ``(geometry, idle_seconds, mode, shown)``.
+    """
+    displays = list(displays)[:MAX_MONITORS]
+    shown_modes = {mode for _, _, mode, shown in displays if shown}
+    active = shown_modes.pop() if len(shown_modes) == 1 else ("mixed" if shown_modes else "")
+    flat, idle, modes, shown = [], [], [], []
+    for geometry, seconds, mode, is_shown in displays:
+        flat.extend(int(v) for v in geometry)
+        idle.append(float(seconds))
+        modes.append(_mode_code(mode))
+        shown.append(1 if is_shown else 0)
+    padding = MAX_MONITORS - len(displays)
+    flat.extend([0] * (4 * padding))
+    idle.extend([0.0] * padding)
+    modes.extend([0] * padding)
+    shown.extend([0] * padding)
+    return (
+        MAGIC, VERSION, os.getpid() if pid is None else pid, heartbeat,
+        time.monotonic() if updated is None else updated,
+        STATES.index(state) if state in STATES else 0xFF, 1 if paused else 0,
+        active.encode("ascii"), generation, error, error_at, len(displays),
+        *flat, *idle, *modes, *shown,
+    )
+
+
+def unpack_status(values):
+    """ServiceStatus from a LAYOUT record, or None if it is empty or foreign."""
+    if values is None or values[0] != MAGIC or values[1] != VERSION:
+        return None
+    pid, heartbeat, updated, state, paused, mode, generation, error, error_at, count = values[2:12]
+    rest = values[12:]
+    geometries = rest[:4 * MAX_MONITORS]
+    idle = rest[4 * MAX_MONITORS:5 * MAX_MONITORS]
+    modes = rest[5 * MAX_MONITORS:6 * MAX_MONITORS]
+    shown = rest[6 * MAX_MONITORS:]
+    displays = [
+        DisplayStatus(tuple(geometries[4 * i:4 * i + 4]), idle[i],
+                      MODES[modes[i]] if modes[i] < len(MODES) else "", bool(shown[i]))
+        for i in range(min(count, MAX_MONITORS))
+    ]
+    return ServiceStatus(pid, heartbeat, updated, STATES[state] if state < len(STATES) else "UNKNOWN",
+                         bool(paused), mode.rstrip(b"\0").decode("ascii", "replace"),
+                         generation, error, error_at, displays)
+
+
+class StatusPublisher:
+    """Writer side of the status page (the service process only)."""
+
+    def __init__(self, name=None):
+        self.name = name or status_name()
+        self.heartbeat = 0
+        self._block = None
+
+    def start(self):
+        try:
+            self._block = SeqlockBlock(LAYOUT, name=self.name, create=True)
+        except FileExistsError:
+            # Left behind by a service that did not shut down cleanly (POSIX)
+            logging.info(f"Reusing stale status block {self.name}")
+            self._block = SeqlockBlock(LAYOUT, name=self.name)
+
+    def publish(self, state, paused, generation, error, error_at, displays):
+        if self._block is None:
+            return
+        self.heartbeat += 1
+        self._block.write(*pack_status(self.heartbeat, state, paused, generation, error, error_at, displays))
+
+    def stop(self):
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+
+def read_status(name=None):
+    """The service's latest ServiceStatus, or None if no service published one."""
+    try:
+        block = SeqlockBlock(LAYOUT, name=name or status_name(), track=False)
+    except (FileNotFoundError, ValueError, OSError):
+        return None
+    try:
+        return unpack_status(block.read())
+    finally:
+        block.close()
@@ -0,0 +1,199 @@
+"""
+Session and power events for Display Control+
+Reports workstation lock/unlock, system suspend/resume, console display
+off/on and display configuration changes, so the service can park while
+nobody can see the screens. The Windows source blocks in GetMessageW on a
+hidden window and never wakes without an event.
+"""
+import ctypes
+import logging
+import sys
+import threading
+from ctypes import wintypes
+
+# Event kinds passed to on_event(kind, cause)
+LOCK = "lock"
+UNLOCK = "unlock"
+SUSPEND = "suspend"
+RESUME = "resume"
+DISPLAY_OFF = "display-off"
+DISPLAY_ON = "display-on"
+DISPLAY_CHANGE = "display-change"
+
+# Win32 messages and notification codes
+WM_QUIT = 0x0012
+WM_DISPLAYCHANGE = 0x007E
+WM_POWERBROADCAST = 0x0218
+WM_WTSSESSION_CHANGE = 0x02B1
+WTS_SESSION_LOCK = 0x7
+WTS_SESSION_UNLOCK = 0x8
+NOTIFY_FOR_THIS_SESSION = 0
+PBT_APMSUSPEND = 0x4
+PBT_APMRESUMESUSPEND = 0x7
+PBT_APMRESUMEAUTOMATIC = 0x12
+PBT_POWERSETTINGCHANGE = 0x8013
+DEVICE_NOTIFY_WINDOW_HANDLE = 0
+
+
+class GUID(ctypes.Structure):
+    _fields_ = [
+        ("Data1", wintypes.DWORD),
+        ("Data2", wintypes.WORD),
+        ("Data3", wintypes.WORD),
+        ("Data4", ctypes.c_ubyte * 8),
+    ]
+
+
+class POWERBROADCAST_SETTING(ctypes.Structure):
+    _fields_ = [
+        ("PowerSetting", GUID),
+        ("DataLength", wintypes.DWORD),
+        ("Data", ctypes.c_ubyte * 1),
+    ]
+
+
+# {6FE69556-704A-47A0-8F24-C28D936FDA47}: 0 off, 1 on, 2 dimmed
+GUID_CONSOLE_DISPLAY_STATE = GUID(0x6FE69556, 0x704A, 0x47A0,
+                                  (ctypes.c_ubyte * 8)(0x8F, 0x24, 0xC2, 0x8D, 0x93, 0x6F, 0xDA, 0x47))
+
+
+class SessionEventSource:
+    """Calls ``on_event(kind, cause)`` from its own thread; start()/stop()."""
+
+    def __init__(self, on_event):
+        self.on_event = on_event
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def _emit(self, kind, cause):
+        try:
+            self.on_event(kind, cause)
+        except Exception as e:
+            logging.error(f"Session event handler failed for {kind}: {e}")
+
+
+class SimulatedSessionSource(SessionEventSource):
+    """Scriptable source for tests: ``emit()`` delivers an event at once."""
+
+    def __init__(self, on_event):
+        super().__init__(on_event)
+        self.running = False
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def emit(self, kind, cause=None):
+        self._emit(kind, cause or kind)
+
+
+class WindowsSessionSource(SessionEventSource):
+    """WTS session notifications, power broadcasts and WM_DISPLAYCHANGE on a hidden window.
+
+    A top-level (not message-only) window is used, as message-only windows
+    do not receive broadcasts.
+    """
+
+    def __init__(self, on_event):
+        super().__init__(on_event)
+        self._thread = None
+        self._thread_id = None
+        self._hwnd = None
+        self._proc = None
+        self._ready = threading.Event()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="SessionEvents", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(2) or not self._hwnd:
+            raise OSError("Session notification window could not be created")
+
+    def stop(self):
+        if self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        if self._thread is not None:
+            self._thread.join(2)
+            self._thread = None
+
+    def _wnd_proc(self, hWnd, msg, wParam, lParam):
+        if msg == WM_WTSSESSION_CHANGE:
+            if wParam == WTS_SESSION_LOCK:
+                self._emit(LOCK, "workstation locked")
+            elif wParam == WTS_SESSION_UNLOCK:
+                self._emit(UNLOCK, "workstation unlocked")
+        elif msg == WM_POWERBROADCAST:
+            if wParam == PBT_APMSUSPEND:
+                self._emit(SUSPEND, "system suspending")
+            elif wParam in (PBT_APMRESUMEAUTOMATIC, PBT_APMRESUMESUSPEND):
+                self._emit(RESUME, "system resumed")
+            elif wParam == PBT_POWERSETTINGCHANGE and lParam:
+                setting = POWERBROADCAST_SETTING.from_address(lParam)
+                if bytes(setting.PowerSetting) == bytes(GUID_CONSOLE_DISPLAY_STATE):
+                    state = setting.Data[0]
+                    if state == 0:
+                        self._emit(DISPLAY_OFF, "displays powered off")
+                    elif state == 1:
+                        self._emit(DISPLAY_ON, "displays powered on")
+            return 1
+        elif msg == WM_DISPLAYCHANGE:
+            self._emit(DISPLAY_CHANGE, "display configuration changed")
+        return ctypes.windll.user32.DefWindowProcW(hWnd, msg, wParam, lParam)
+
+    def _run(self):
+        from monitor_activity import MSG, WNDCLASS, WNDPROCTYPE
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        wtsapi32 = ctypes.windll.wtsapi32
+        power_handle = None
+        try:
+            hInstance = kernel32.GetModuleHandleW(None)
+            self._thread_id = kernel32.GetCurrentThreadId()
+            self._proc = WNDPROCTYPE(self._wnd_proc)
+            class_name = "DCPlusSessionCls"
+            wc = WNDCLASS()
+            wc.lpfnWndProc = self._proc
+            wc.hInstance = hInstance
+            wc.lpszClassName = class_name
+            user32.RegisterClassW(ctypes.byref(wc))  # fails harmlessly if already registered
+            self._hwnd = user32.CreateWindowExW(0, class_name, "DCPlusSessionWnd", 0,
+                                                0, 0, 0, 0, None, None, hInstance, None)
+            if not self._hwnd:
+                return
+            if not wtsapi32.WTSRegisterSessionNotification(self._hwnd, NOTIFY_FOR_THIS_SESSION):
+                logging.warning("WTSRegisterSessionNotification failed; lock/unlock not reported")
+            user32.RegisterPowerSettingNotification.restype = wintypes.HANDLE
+            power_handle = user32.RegisterPowerSettingNotification(
+                self._hwnd, ctypes.byref(GUID_CONSOLE_DISPLAY_STATE), DEVICE_NOTIFY_WINDOW_HANDLE)
+            self._ready.set()
+            msg = MSG()
+            # Blocks until a message arrives; WM_QUIT from stop() ends the loop
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        except Exception as e:
+            logging.error(f"Session event source failed: {e}")
+        finally:
+            self._ready.set()
+            try:
+                if power_handle:
+                    user32.UnregisterPowerSettingNotification(power_handle)
+                if self._hwnd:
+                    wtsapi32.WTSUnRegisterSessionNotification(self._hwnd)
+                    user32.DestroyWindow(self._hwnd)
+            except Exception:
+                pass
+            self._hwnd = None
+
+
+def create_session_source(on_event):
+    """The platform's session event source, or None where none is available."""
+    if sys.platform == "win32":
+        return WindowsSessionSource(on_event)
+    logging.info("No session/power event source on this platform; lock and sleep are not detected")
+    return None
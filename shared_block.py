@@ -0,0 +1,90 @@
+"""
+Fixed-layout shared-memory blocks for Display Control+
+One process writes a struct-packed record; any number of processes read it
+without locks or IPC round-trips, using a sequence counter (seqlock).
+"""
+import os
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+_SEQ = struct.Struct("<Q")
+_created = set()  # blocks created by this process (the resource tracker owns them)
+
+
+class SeqlockBlock:
+    """A shared-memory record laid out by a ``struct`` format string.
+
+    The first 8 bytes are a sequence counter. The single writer makes it odd
+    before changing the payload and even again afterwards; a reader copies
+    the payload and retries if the counter was odd or moved meanwhile, so it
+    never sees a half-written record and never blocks the writer.
+    """
+
+    def __init__(self, fmt, name=None, create=False, track=True):
+        self._struct = struct.Struct(fmt)
+        size = _SEQ.size + self._struct.size
+        self._shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        if create:
+            _created.add(self._shm.name)
+        elif not track and os.name == "posix" and self._shm.name not in _created:
+            # A reader in an unrelated process: without this the resource
+            # tracker unlinks the writer's block when the reader exits
+            try:
+                resource_tracker.unregister(self._shm._name, "shared_memory")
+            except Exception:
+                pass
+        self._buf = self._shm.buf
+        if create:
+            self._buf[:size] = bytes(size)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def size(self):
+        return self._struct.size
+
+    def write(self, *values):
+        """Publish a new record (writer process only)."""
+        payload = self._struct.pack(*values)
+        buf = self._buf
+        seq = _SEQ.unpack_from(buf, 0)[0] | 1
+        _SEQ.pack_into(buf, 0, seq)
+        buf[_SEQ.size:_SEQ.size + len(payload)] = payload
+        _SEQ.pack_into(buf, 0, seq + 1)
+
+    def read(self, retries=1000):
+        """Return the latest complete record as a tuple, or None if the writer
+        kept it busy for ``retries`` attempts."""
+        buf = self._buf
+        start = _SEQ.size
+        end = start + self._struct.size
+        for attempt in range(retries):
+            before = _SEQ.unpack_from(buf, 0)[0]
+            if not before & 1:
+                payload = bytes(buf[start:end])
+                if _SEQ.unpack_from(buf, 0)[0] == before:
+                    return self._struct.unpack(payload)
+            if attempt & 0x3F == 0x3F:
+                time.sleep(0)
+        return None
+
+    def sequence(self):
+        """Current counter; it changes on every write."""
+        return _SEQ.unpack_from(self._buf, 0)[0]
+
+    def close(self):
+        self._buf = None
+        try:
+            self._shm.close()
+        except Exception:
+            pass
+
+    def unlink(self):
+        _created.discard(self._shm.name)
+        try:
+            self._shm.unlink()
+        except Exception:
+            pass
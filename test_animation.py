@@ -0,0 +1,185 @@
+"""
+Tests for animated overlays: decode-once frames, bounded streaming and drift-free timing
+Runs with pytest or directly: python test_animation.py
+"""
+import os
+import shutil
+import tempfile
+
+from PIL import Image
+
+from animation import (
+    ANIMATION_BUDGET_MB, FRAME_POLL, STREAM_AHEAD, Animation, AnimationPlayer, budget_bytes,
+)
+
+COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+
+
+def make_gif(directory, durations=(30, 60, 0)):
+    path = os.path.join(directory, "anim.gif")
+    frames = [Image.new("RGB", (40, 30), color) for color in COLORS]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=list(durations), loop=0)
+    return path
+
+
+class FakeAnimation:
+    """Decoded frames with given durations; ``decoded`` can be held back."""
+
+    def __init__(self, durations, decoded=None, in_memory=True):
+        self.durations = list(durations)
+        self.count = len(self.durations)
+        self.decoded = self.count if decoded is None else decoded
+        self.in_memory = in_memory
+        self.error = None
+        self.started = self.closed = False
+        self.rewinds = 0
+
+    def start(self):
+        self.started = True
+        return self
+
+    def rewind(self):
+        self.rewinds += 1
+
+    def ready(self, index):
+        return index < self.decoded
+
+    def frame(self, index):
+        return index
+
+    def release(self, index):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakePhoto:
+    def __init__(self, frame):
+        self.frame = frame
+
+    def paste(self, frame):
+        self.frame = frame
+
+
+class Clock:
+    """A manual clock with a root whose after() callbacks fire when run."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.pending = None
+
+    def __call__(self):
+        return self.now
+
+    def after(self, ms, fn):
+        self.pending = (ms, fn)
+        return object()
+
+    def after_cancel(self, handle):
+        self.pending = None
+
+    def run(self, late=0.0):
+        ms, fn = self.pending
+        self.pending = None
+        self.now += ms / 1000 + late
+        fn()
+
+
+def test_decodes_each_frame_once_in_memory():
+    tmp = tempfile.mkdtemp(prefix="dcplus-test-")
+    try:
+        animation = Animation(make_gif(tmp), 20, 10).start()
+        assert animation.wait_ready(2, timeout=5)
+        assert animation.count == 3 and animation.in_memory
+        assert animation.durations == [0.03, 0.06, 0.1]  # no duration: browser default
+        frame = animation.frame(1)
+        assert frame.size == (20, 10) and frame.getpixel((5, 5)) == COLORS[1]
+        animation.release(1)
+        assert animation.frame(1) is None and animation.frame(2) is not None
+        animation.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_streams_from_the_file_over_budget():
+    tmp = tempfile.mkdtemp(prefix="dcplus-test-")
+    try:
+        animation = Animation(make_gif(tmp), 20, 10, budget_bytes=1000).start()
+        assert animation.wait_ready(STREAM_AHEAD - 1, timeout=5)
+        assert not animation.in_memory and os.listdir(tmp) == ["anim.gif"]
+        # The worker stays STREAM_AHEAD frames ahead and waits
+        assert list(animation._ahead) == [0, 1, 2]
+        assert animation.frame(1).getpixel((0, 0))[:3] == COLORS[1]
+        # Releasing frame 1 drops the skipped frame 0; the worker loops over the file
+        animation.release(1)
+        assert animation.wait_ready(1, timeout=5) and list(animation._ahead) == [2, 0, 1]
+        assert animation.frame(0).getpixel((0, 0))[:3] == COLORS[0]
+        assert animation.decoded == 3 and animation.durations == [0.03, 0.06, 0.1]
+        animation.rewind()
+        assert animation.wait_ready(2, timeout=5) and list(animation._ahead) == [0, 1, 2]
+        animation.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_budget_setting():
+    assert budget_bytes({}) == ANIMATION_BUDGET_MB * 1024 * 1024
+    assert budget_bytes({"animation_budget_mb": 64}) == 64 * 1024 * 1024
+    assert budget_bytes({"animation_budget_mb": "lots"}) == ANIMATION_BUDGET_MB * 1024 * 1024
+    assert budget_bytes({"animation_budget_mb": -1}) == 0
+
+
+def test_player_keeps_time_without_drift():
+    clock = Clock()
+    shown = []
+    animation = FakeAnimation([0.05, 0.1, 0.05])
+    player = AnimationPlayer(clock, animation, lambda photo: shown.append(photo.frame),
+                             make_photo=FakePhoto, clock=clock)
+    start = clock.now
+    player.play()
+    # Every tick fires 3 ms late; the lateness must not accumulate
+    for _ in range(30):
+        clock.run(late=0.003)
+    assert shown[:6] == [0, 1, 2, 0, 1, 2] and len(shown) == 31
+    assert abs(player._due - (start + 10 * 0.2 + 0.05)) < 1e-9
+    assert clock.now - start < 10 * 0.2 + 0.004
+    # A long stall skips the frames it missed instead of replaying them
+    clock.now += 0.21
+    clock.run()
+    assert player.dropped > 0
+    elapsed = (clock.now - start) % 0.2
+    expected = 0 if elapsed < 0.05 else 1 if elapsed < 0.15 else 2
+    assert shown[-1] == expected
+    player.pause()
+    assert clock.pending is None and not player.playing
+
+
+def test_player_holds_while_decoding_and_streams():
+    clock = Clock()
+    shown = []
+    animation = FakeAnimation([0.05, 0.05], decoded=1, in_memory=False)
+    player = AnimationPlayer(clock, animation, lambda photo: shown.append(photo),
+                             make_photo=FakePhoto, clock=clock)
+    player.play()
+    assert animation.started and animation.rewinds == 0
+    clock.run()
+    # Frame 1 is not decoded yet: frame 0 stays and the player polls
+    assert clock.pending[0] == int(FRAME_POLL * 1000) and player.shown == 1
+    animation.decoded = 2
+    clock.run()
+    # Streaming reuses one photo and pastes each frame into it
+    assert player.shown == 2 and len(shown) == 1 and shown[0].frame == 1
+    # Playing again restarts the stream from the first frame
+    player.pause()
+    player.play()
+    assert animation.rewinds == 1
+    player.close()
+    assert animation.closed
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
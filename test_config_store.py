@@ -0,0 +1,139 @@
+"""
+Tests for the cached config store (snapshots, change detection, debounce, subscribers)
+Runs with pytest or directly: python test_config_store.py
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from config_store import ConfigSnapshot, ConfigStore
+
+
+class ConfigFile:
+    def __init__(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "config.json")
+        self.mtime = time.time() - 100
+
+    def write(self, data, raw=None):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(raw if raw is not None else json.dumps(data))
+        # Distinct mtimes even on coarse filesystem clocks
+        self.mtime += 1
+        os.utime(self.path, (self.mtime, self.mtime))
+
+    def load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def cleanup(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def test_snapshot_is_immutable_and_thaws():
+    snap = ConfigSnapshot({"monitors": [[0, 0, 10, 10]], "controller": {"rawinput": True}})
+    assert snap["monitors"] == ((0, 0, 10, 10),)
+    assert snap["controller"]["rawinput"] is True
+    try:
+        snap["mode"] = "blank"
+        assert False, "snapshot accepted an assignment"
+    except TypeError:
+        pass
+    thawed = snap.thaw()
+    thawed["controller"]["rawinput"] = False
+    assert snap["controller"]["rawinput"] is True
+    assert snap == {"monitors": [[0, 0, 10, 10]], "controller": {"rawinput": True}}
+
+
+def test_get_only_reparses_when_file_changes():
+    cfg = ConfigFile()
+    try:
+        cfg.write({"timeout": 5})
+        store = ConfigStore(cfg.path, cfg.load, check_interval=0)
+        first = store.get()
+        for _ in range(100):
+            assert store.get() is first
+        assert store.loads == 1
+        cfg.write({"timeout": 10})
+        second = store.get()
+        assert second["timeout"] == 10 and second.generation == 1
+        assert store.loads == 2
+    finally:
+        cfg.cleanup()
+
+
+def test_subscribers_only_hear_real_changes():
+    cfg = ConfigFile()
+    try:
+        cfg.write({"timeout": 5, "enabled": True})
+        store = ConfigStore(cfg.path, cfg.load, check_interval=0)
+        store.get()
+        changes = []
+        store.subscribe(lambda old, new: changes.append((old["timeout"], new["timeout"])))
+        # Rewritten with the same content: reparsed, but no event
+        cfg.write({"enabled": True, "timeout": 5})
+        store.get()
+        assert changes == []
+        cfg.write({"timeout": 7, "enabled": True})
+        store.get()
+        assert changes == [(5, 7)]
+    finally:
+        cfg.cleanup()
+
+
+def test_broken_file_keeps_last_good_snapshot():
+    cfg = ConfigFile()
+    try:
+        cfg.write({"timeout": 5})
+
+        def loader():
+            try:
+                return cfg.load()
+            except ValueError:
+                return None
+
+        store = ConfigStore(cfg.path, loader, check_interval=0)
+        good = store.get()
+        cfg.write(None, raw='{"timeout": ')
+        assert store.get() is good
+    finally:
+        cfg.cleanup()
+
+
+def test_watcher_debounces_and_notifies():
+    cfg = ConfigFile()
+    try:
+        cfg.write({"timeout": 1})
+        store = ConfigStore(cfg.path, cfg.load, debounce=0.1, poll_interval=0.02)
+        changed = threading.Event()
+        seen = []
+
+        def on_change(old, new):
+            seen.append(new["timeout"])
+            changed.set()
+
+        store.subscribe(on_change)
+        store.start()
+        try:
+            # A burst of writes settles into a single reload of the final content
+            for timeout in (2, 3, 4):
+                cfg.write({"timeout": timeout})
+                time.sleep(0.03)
+            assert changed.wait(2)
+            time.sleep(0.3)
+            assert seen == [4]
+            assert store.get()["timeout"] == 4
+        finally:
+            store.stop()
+    finally:
+        cfg.cleanup()
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
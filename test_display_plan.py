@@ -0,0 +1,67 @@
+"""
+Tests for per-display plans built from classic and v2 configs
+Runs with pytest or directly: python test_display_plan.py
+"""
+import os
+import shutil
+import tempfile
+
+from display_plan import plan_displays
+from monitor_index import monitor_key
+
+CONNECTED = [
+    {'geometry': (0, 0, 1920, 1080), 'index': 0},
+    {'geometry': (1920, 0, 4480, 1440), 'index': 1},
+]
+
+
+def test_classic_config_shares_timeout_with_mode_overrides():
+    config = {
+        "monitors": [[0, 0, 1920, 1080], [1920, 0, 4480, 1440]],
+        "monitor_indices": [0, 1],
+        "mode": "blank", "file_paths": ["a.png"], "timeout": 0.5, "interval": 20,
+        "monitor_modes": {"1": "single"},
+    }
+    left, right = plan_displays(config)
+    assert left.key == monitor_key((0, 0, 1920, 1080))
+    assert (left.timeout, left.mode, right.timeout, right.mode) == (30, "blank", 30, "single")
+    assert right.file_paths == ["a.png"] and right.interval == 20
+
+
+def test_image_mode_without_files_has_no_overlay():
+    config = {"monitors": [[0, 0, 1920, 1080]], "mode": "slideshow", "file_paths": [], "timeout": 5}
+    assert plan_displays(config) == []
+    assert plan_displays(None) == []
+
+
+def test_v2_displays_use_their_own_settings():
+    folder = tempfile.mkdtemp()
+    try:
+        for name in ("b.jpg", "a.png", "notes.txt"):
+            open(os.path.join(folder, name), "w").close()
+        config = {"displays": {
+            "display_1": {"index": 0, "enabled": True, "timeout_minutes": 1, "mode": "blank"},
+            "display_2": {"enabled": True, "timeout_minutes": 10, "mode": "slideshow", "media_path": folder},
+            "display_3": {"index": 2, "enabled": True, "timeout_minutes": 2},
+            "display_4": {"index": 0, "enabled": False},
+        }}
+        first, second = plan_displays(config, CONNECTED)
+        assert (first.geometry, first.timeout, first.mode) == ((0, 0, 1920, 1080), 60, "blank")
+        # No index: "display_2" is the second monitor; folders list their images
+        assert (second.geometry, second.timeout, second.mode) == ((1920, 0, 4480, 1440), 600, "slideshow")
+        assert [os.path.basename(p) for p in second.file_paths] == ["a.png", "b.jpg"]
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_v2_unsupported_mode_falls_back_to_blank():
+    config = {"displays": {"display_1": {"index": 0, "mode": "video", "media_path": "clip.mp4"}}}
+    (plan,) = plan_displays(config, CONNECTED)
+    assert plan.mode == "blank" and plan.file_paths == [] and plan.timeout == 180
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
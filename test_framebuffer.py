@@ -0,0 +1,57 @@
+"""
+Tests for raw framebuffer files mapped straight into images
+Runs with pytest or directly: python test_framebuffer.py
+"""
+import os
+import shutil
+import tempfile
+
+from PIL import Image
+
+from framebuffer import HEADER_SIZE, frame_size, map_frame, write_frame
+
+
+def test_round_trip_is_mapped():
+    tmp = tempfile.mkdtemp(prefix="dcplus-frame-")
+    try:
+        path = os.path.join(tmp, "frame.dcfb")
+        source = Image.new("RGB", (37, 11), (10, 20, 30))
+        source.putpixel((36, 10), (200, 100, 50))
+        write_frame(path, source)
+        assert os.path.getsize(path) == frame_size(37, 11) == HEADER_SIZE + 37 * 11 * 4
+        frame = map_frame(path)
+        assert frame.size == (37, 11) and frame.readonly
+        assert frame.getpixel((0, 0))[:3] == (10, 20, 30)
+        assert frame.getpixel((36, 10))[:3] == (200, 100, 50)
+        assert frame.convert("RGB").tobytes() == source.tobytes()
+        del frame
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_rejects_foreign_and_truncated_files():
+    tmp = tempfile.mkdtemp(prefix="dcplus-frame-")
+    try:
+        path = os.path.join(tmp, "frame.dcfb")
+        write_frame(path, Image.new("RGB", (8, 8)))
+        with open(path, "r+b") as f:
+            f.truncate(frame_size(8, 8) - 1)
+        other = os.path.join(tmp, "other.png")
+        Image.new("RGB", (8, 8)).save(other)
+        empty = os.path.join(tmp, "empty.dcfb")
+        open(empty, "wb").close()
+        for bad in (path, other, empty):
+            try:
+                map_frame(bad)
+            except ValueError:
+                continue
+            raise AssertionError(f"{bad} was accepted")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,110 @@
+"""
+Tests for GamepadWatcher's per-slot adaptive polling, driven by a fake XInput DLL
+Runs with pytest or directly: python test_gamepad_watcher.py
+"""
+from monitor_activity import (
+    ERROR_DEVICE_NOT_CONNECTED, ERROR_SUCCESS, GamepadWatcher,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeXInput:
+    """Slot -> (packet, buttons, lx); missing slots are disconnected."""
+
+    def __init__(self):
+        self.pads = {}
+        self.calls = [0] * 4
+        self.seen = set()
+
+    def XInputGetState(self, slot, ref):
+        self.calls[slot] += 1
+        state = ref._obj
+        self.seen.add(id(state))
+        if slot not in self.pads:
+            return ERROR_DEVICE_NOT_CONNECTED
+        packet, buttons, lx = self.pads[slot]
+        state.dwPacketNumber = packet
+        state.Gamepad.wButtons = buttons
+        state.Gamepad.sThumbLX = lx
+        return ERROR_SUCCESS
+
+
+def make_watcher():
+    clock = FakeClock()
+    xinput = FakeXInput()
+    inputs = []
+    watcher = GamepadWatcher(lambda: inputs.append(clock.now), xinput=xinput, clock=clock)
+    return watcher, xinput, clock, inputs
+
+
+def run_for(watcher, clock, seconds):
+    end = clock.now + seconds
+    while clock.now < end:
+        clock.now = min(end, clock.now + watcher._poll_due())
+
+
+def test_empty_slots_back_off_exponentially():
+    watcher, xinput, clock, _ = make_watcher()
+    run_for(watcher, clock, 60)
+    # 1 + 2 + 4 + 8 then every 8 s: about 10 polls a minute per slot, not 600
+    assert all(5 <= n <= 12 for n in xinput.calls)
+    assert all(s["interval"] == GamepadWatcher.EMPTY_MAX_INTERVAL for s in watcher.get_slot_stats())
+    # The four preallocated structs are the only ones ever passed in
+    assert len(xinput.seen) == 4
+
+
+def test_device_change_rescans_empty_slots_at_once():
+    watcher, xinput, clock, _ = make_watcher()
+    run_for(watcher, clock, 30)
+    xinput.pads[2] = (1, 0, 0)
+    watcher.notify_device_change()
+    watcher._poll_due()
+    assert watcher._connected[2]
+    assert watcher.get_slot_stats()[2]["interval"] == GamepadWatcher.CONNECTED_INTERVAL
+
+
+def test_moving_sticks_poll_faster_and_report_input():
+    watcher, xinput, clock, inputs = make_watcher()
+    xinput.pads[0] = (1, 0, 0)
+    watcher._poll_due()
+    assert watcher._connected[0]
+    # Inside the deadzone: packet changes but no activity
+    xinput.pads[0] = (2, 0, 1000)
+    clock.now += GamepadWatcher.CONNECTED_INTERVAL
+    watcher._poll_due()
+    assert not inputs
+    xinput.pads[0] = (3, 0, 20000)
+    clock.now += GamepadWatcher.CONNECTED_INTERVAL
+    watcher._poll_due()
+    assert inputs
+    assert watcher.get_slot_stats()[0]["interval"] == GamepadWatcher.ACTIVE_INTERVAL
+    # Back to the connected rate once the stick has been still for ACTIVE_HOLD
+    run_for(watcher, clock, GamepadWatcher.ACTIVE_HOLD + 0.2)
+    assert watcher.get_slot_stats()[0]["interval"] == GamepadWatcher.CONNECTED_INTERVAL
+
+
+def test_disconnect_restarts_backoff_and_stats_count_polls():
+    watcher, xinput, clock, _ = make_watcher()
+    xinput.pads[1] = (1, 0, 0)
+    run_for(watcher, clock, 1)
+    del xinput.pads[1]
+    run_for(watcher, clock, 0.2)
+    stats = watcher.get_slot_stats()[1]
+    assert not stats["connected"]
+    assert stats["interval"] <= 2 * GamepadWatcher.EMPTY_MIN_INTERVAL
+    assert stats["polls"] == xinput.calls[1]
+    assert stats["mean_us"] >= 0.0
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,165 @@
+"""
+Replay tests for HID report diffing (hid_reports.HidReportFilter)
+Feeds report streams shaped like DualSense, Switch Pro and generic HID
+controllers: sensor noise alone must not count as activity, real input must.
+Runs with pytest or directly: python test_hid_reports.py
+"""
+import ctypes
+import random
+
+from hid_reports import HidReportFilter
+from monitor_activity import (
+    RAWHID, RAWINPUTHEADER, RIM_TYPEHID, _iter_hid_reports, _iter_raw_input_records,
+)
+
+SONY = 0x054C
+DUALSENSE = 0x0CE6
+NINTENDO = 0x057E
+SWITCH_PRO = 0x2009
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def dualsense_usb(seq, rng, lx=128, buttons=0x08, l2=0):
+    """64-byte report 0x01: sticks, triggers, counter, buttons, then IMU and timestamp."""
+    r = bytearray(64)
+    r[0] = 0x01
+    r[1:5] = bytes((lx, 128, 128 + rng.randint(-2, 2), 128))
+    r[5] = l2
+    r[7] = seq & 0xFF
+    r[8] = buttons  # low nibble is the d-pad hat, 8 = centred
+    for i in range(16, 28):
+        r[i] = rng.randrange(256)  # gyro and accelerometer
+    r[28:32] = (seq * 333).to_bytes(4, "little")
+    return bytes(r)
+
+
+def switch_pro(seq, rng, lx=2048, buttons=0):
+    """Full report 0x30: timer, buttons, 12-bit packed sticks, then IMU samples."""
+    r = bytearray(49)
+    r[0] = 0x30
+    r[1] = seq & 0xFF
+    r[3] = buttons
+    ly = 2048 + rng.randint(-20, 20)
+    r[6] = lx & 0xFF
+    r[7] = ((lx >> 8) & 0x0F) | ((ly & 0x0F) << 4)
+    r[8] = ly >> 4
+    r[9], r[10], r[11] = 0x00, 0x08, 0x80  # right stick centred
+    for i in range(13, 49):
+        r[i] = rng.randrange(256)
+    return bytes(r)
+
+
+def replay(flt, device, reports, clock=None, rate=250.0):
+    hits = []
+    for i, report in enumerate(reports):
+        if clock is not None:
+            clock.now += 1.0 / rate
+        if flt.feed(device, report):
+            hits.append(i)
+    return hits
+
+
+def test_dualsense_sensor_noise_is_ignored():
+    rng = random.Random(1)
+    flt = HidReportFilter()
+    flt.add_device(1, SONY, DUALSENSE)
+    assert replay(flt, 1, [dualsense_usb(i, rng) for i in range(1000)]) == []
+
+
+def test_dualsense_buttons_sticks_and_triggers_count():
+    rng = random.Random(2)
+    flt = HidReportFilter()
+    flt.add_device(1, SONY, DUALSENSE)
+    stream = [dualsense_usb(i, rng) for i in range(50)]
+    stream.append(dualsense_usb(50, rng, buttons=0x28))  # cross pressed
+    stream += [dualsense_usb(51 + i, rng, buttons=0x28) for i in range(20)]  # held: no new activity
+    stream.append(dualsense_usb(71, rng))  # released: a change
+    stream.append(dualsense_usb(72, rng, lx=150))  # inside the deadzone
+    stream.append(dualsense_usb(73, rng, lx=250))  # pushed
+    stream.append(dualsense_usb(74, rng, l2=20))  # under the trigger threshold
+    stream.append(dualsense_usb(75, rng, l2=200))
+    assert replay(flt, 1, stream) == [50, 71, 73, 75]
+
+
+def test_switch_pro_packed_sticks():
+    rng = random.Random(3)
+    flt = HidReportFilter()
+    flt.add_device(7, NINTENDO, SWITCH_PRO)
+    stream = [switch_pro(i, rng) for i in range(300)]
+    stream.append(switch_pro(300, rng, lx=2048 + 300))  # about 4800 on the int16 scale
+    stream.append(switch_pro(301, rng, lx=4000))
+    stream.append(switch_pro(302, rng, buttons=0x04))
+    assert replay(flt, 7, stream) == [301, 302]
+
+
+def test_unknown_streaming_device_learns_noise_mask():
+    rng = random.Random(4)
+    clock = FakeClock()
+    flt = HidReportFilter(clock=clock)
+
+    def report(seq, button=0):
+        return bytes([0x05, seq & 0xFF, 0x80, 0x80, button, rng.randrange(256), rng.randrange(256), 0])
+
+    stream = [report(i) for i in range(500)] + [report(500, button=1)]
+    hits = replay(flt, 3, stream, clock)
+    assert hits == [500]
+    # Counter and the two sensor bytes were learned as noise
+    assert flt.noise_mask(3, 0x05) == [1, 5, 6]
+
+
+def test_unknown_on_change_device_keeps_every_byte():
+    clock = FakeClock()
+    flt = HidReportFilter(clock=clock)
+    stream = [bytes([0, 0x80, 0x80, b & 1]) for b in range(12)]
+    # A button press every half second: slow, so never treated as streaming
+    hits = replay(flt, 4, stream, clock, rate=2.0)
+    assert flt.noise_mask(4, 0) == []
+    assert hits and hits[-1] == len(stream) - 1
+
+
+def test_removed_device_starts_over():
+    rng = random.Random(5)
+    flt = HidReportFilter()
+    flt.add_device(1, SONY, DUALSENSE)
+    replay(flt, 1, [dualsense_usb(i, rng) for i in range(10)])
+    flt.remove_device(1)
+    assert not flt.has_device(1)
+    # First report after re-adding is only a baseline
+    assert not flt.feed(1, dualsense_usb(11, rng, buttons=0x28))
+
+
+def test_raw_input_buffer_records_are_split_into_reports():
+    rng = random.Random(6)
+    reports = [dualsense_usb(i, rng) for i in range(3)]
+    align = ctypes.sizeof(ctypes.c_void_p)
+    header_size = ctypes.sizeof(RAWINPUTHEADER) + ctypes.sizeof(RAWHID)
+    records = []
+    for chunk in (reports[:2], reports[2:]):
+        size = header_size + sum(len(r) for r in chunk)
+        header = RAWINPUTHEADER(RIM_TYPEHID, size, 0x1234, 0)
+        raw = bytes(header) + bytes(RAWHID(64, len(chunk))) + b"".join(chunk)
+        records.append(raw + b"\0" * (-len(raw) % align))
+    blob = b"".join(records)
+    buf = (ctypes.c_uint64 * (len(blob) // 8 + 1))()
+    ctypes.memmove(buf, blob, len(blob))
+
+    base = ctypes.addressof(buf)
+    seen = []
+    for offset, header in _iter_raw_input_records(buf, ctypes.sizeof(buf), 2):
+        assert header.dwType == RIM_TYPEHID
+        seen.extend(_iter_hid_reports(base + offset, header))
+    assert seen == reports
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,126 @@
+"""
+Tests for hook callback latency tracking and the dead-hook watchdog
+Runs with pytest or directly: python test_hook_watchdog.py
+"""
+import time
+
+from input_backends import HooksBackend
+from perf_stats import LatencyStats
+
+
+class FakeListener:
+    def __init__(self, **callbacks):
+        self.callbacks = callbacks
+        self.alive = False
+
+    def start(self):
+        self.alive = True
+
+    def stop(self):
+        self.alive = False
+
+    def is_alive(self):
+        return self.alive
+
+
+class FakeDetector:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.events = []
+
+    def _mark_input(self, x=None, y=None, kind=None):
+        if self.delay:
+            time.sleep(self.delay)
+        self.events.append((x, y, kind))
+
+
+class FakeHooks(HooksBackend):
+    """HooksBackend with fake listeners instead of pynput."""
+
+    def _make_listeners(self):
+        on_move, on_click, on_scroll, on_key = self._callbacks()
+        self.made = getattr(self, "made", 0) + 1
+        return (
+            FakeListener(on_move=on_move, on_click=on_click, on_scroll=on_scroll),
+            FakeListener(on_press=on_key, on_release=on_key),
+        )
+
+
+def start_hooks(detector):
+    hooks = FakeHooks(detector)
+    hooks.start()
+    return hooks
+
+
+def test_latency_stats_percentiles_and_budget():
+    stats = LatencyStats(budget_ms=1.0, capacity=1000)
+    for us in range(1, 1001):
+        stats.record(us * 1000)
+    stats.record(5_000_000)
+    pct = stats.percentiles()
+    assert 490 <= pct[50] <= 510
+    assert 985 <= pct[99] <= 1000
+    summary = stats.summary()
+    assert summary["count"] == 1001
+    assert summary["over_budget"] == 1
+    assert summary["max_us"] == 5000.0
+
+
+def test_callbacks_are_timed_and_budget_breaches_counted():
+    detector = FakeDetector()
+    hooks = start_hooks(detector)
+    try:
+        move = hooks._mouse_listener.callbacks["on_move"]
+        key = hooks._keyboard_listener.callbacks["on_press"]
+        for i in range(50):
+            move(i * 10, 5)
+            key("a")
+        lat = hooks.health()["latency"]
+        assert lat["count"] == 100
+        assert lat["over_budget"] == 0
+        assert ("mouse" in {e[2] for e in detector.events}) and ("keyboard" in {e[2] for e in detector.events})
+        # The 2 px filter still applies but the callback is still timed
+        move(490, 6)
+        assert hooks.latency.count == 101
+        detector.delay = 0.003
+        key("b")
+        assert hooks.health()["latency"]["over_budget"] == 1
+    finally:
+        hooks.stop()
+
+
+def test_dead_listener_thread_is_reinstalled():
+    hooks = start_hooks(FakeDetector())
+    try:
+        hooks._keyboard_listener.alive = False
+        assert not hooks.health()["alive"]
+        assert hooks.check_health()
+        assert hooks.made == 2 and hooks.reinstalls == 1
+        assert hooks.health()["alive"]
+    finally:
+        hooks.stop()
+
+
+def test_input_missed_by_hooks_triggers_reinstall_on_second_check():
+    hooks = start_hooks(FakeDetector())
+    try:
+        hooks.last_callback = time.monotonic() - 30
+        system_last = time.monotonic()
+        assert not hooks.check_health(system_last)
+        assert hooks.check_health(system_last)
+        assert hooks.dead_detections == 1
+        # Hooks that keep up with the system tick are healthy
+        hooks._keyboard_listener.callbacks["on_press"]("a")
+        assert not hooks.check_health(time.monotonic())
+        assert not hooks.check_health(time.monotonic())
+        assert hooks.reinstalls == 1
+    finally:
+        hooks.stop()
+    assert not hooks.check_health()
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
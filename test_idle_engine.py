@@ -0,0 +1,141 @@
+"""
+Tests for the deadline-driven idle engine (idle_engine.py)
+Runs with pytest or directly: python test_idle_engine.py
+"""
+import threading
+import time
+
+from idle_engine import IdleDeadlineEngine
+
+
+def test_fires_on_deadline():
+    engine = IdleDeadlineEngine()
+    fired = threading.Event()
+    fired_at = []
+    start = time.monotonic()
+    engine.touch("system", start)
+    engine.add_timer("system", 0.2, lambda timer, idle: (fired_at.append(time.monotonic()), fired.set()))
+    engine.start()
+    try:
+        assert fired.wait(2)
+        late = fired_at[0] - (start + 0.2)
+        assert -0.002 <= late < 0.05, f"fired {late * 1000:.1f} ms off the deadline"
+    finally:
+        engine.stop()
+
+
+def test_active_user_costs_few_wakeups():
+    engine = IdleDeadlineEngine()
+    fired = threading.Event()
+    engine.add_timer("system", 0.3, lambda timer, idle: fired.set())
+    engine.start()
+    try:
+        # Simulate a busy user: 1000 input events over ~0.5 s
+        end = time.monotonic() + 0.5
+        while time.monotonic() < end:
+            engine.touch("system")
+            time.sleep(0.0005)
+        assert not fired.is_set()
+        # One lazy re-arm per elapsed timeout period, not one per event
+        assert engine.wakeups <= 4, f"{engine.wakeups} wakeups while active"
+    finally:
+        engine.stop()
+
+
+def test_resume_callback_and_rearm():
+    engine = IdleDeadlineEngine()
+    fired = threading.Event()
+    resumed = threading.Event()
+    counts = {"idle": 0}
+
+    def on_idle(timer, idle):
+        counts["idle"] += 1
+        fired.set()
+
+    engine.add_timer("mon", 0.1, on_idle, lambda timer, idle: resumed.set())
+    engine.start()
+    try:
+        assert fired.wait(2)
+        assert not resumed.is_set()
+        t0 = time.monotonic()
+        engine.touch("mon")
+        assert resumed.wait(1)
+        assert time.monotonic() - t0 < 0.05
+        # Re-armed: fires again after another idle period
+        fired.clear()
+        assert fired.wait(2)
+        assert counts["idle"] == 2
+    finally:
+        engine.stop()
+
+
+def test_keys_are_independent():
+    engine = IdleDeadlineEngine()
+    fired = []
+    engine.add_timer("a", 0.1, lambda timer, idle: fired.append(timer.key))
+    engine.add_timer("b", 0.3, lambda timer, idle: fired.append(timer.key))
+    engine.start()
+    try:
+        time.sleep(0.2)
+        assert fired == ["a"]
+        time.sleep(0.2)
+        assert fired == ["a", "b"]
+    finally:
+        engine.stop()
+
+
+def test_external_last_input_source_delays_deadline():
+    external = {"system": None}
+    engine = IdleDeadlineEngine(last_input_source=lambda key: external.get(key))
+    fired = threading.Event()
+    engine.add_timer("system", 0.2, lambda timer, idle: fired.set())
+    engine.start()
+    try:
+        time.sleep(0.1)
+        external["system"] = time.monotonic()
+        assert not fired.wait(0.15)
+        assert fired.wait(1)
+    finally:
+        engine.stop()
+
+
+def test_removed_timer_never_fires():
+    engine = IdleDeadlineEngine()
+    fired = threading.Event()
+    timer = engine.add_timer("system", 0.1, lambda timer, idle: fired.set())
+    engine.remove_timer(timer)
+    engine.start()
+    try:
+        assert not fired.wait(0.3)
+        assert engine.timers() == []
+    finally:
+        engine.stop()
+
+
+def test_parked_engine_does_not_wake_and_unpark_reseeds():
+    engine = IdleDeadlineEngine()
+    fired = threading.Event()
+    engine.add_timer("system", 0.1, lambda timer, idle: fired.set())
+    engine.start()
+    try:
+        engine.park()
+        time.sleep(0.05)
+        wakeups = engine.wakeups
+        # Well past the deadline: no wakeups and no callback while parked
+        time.sleep(0.2)
+        assert engine.wakeups == wakeups and not fired.is_set()
+        unparked = time.monotonic()
+        engine.unpark()
+        assert engine.idle_seconds("system") < 0.05
+        # The time spent parked does not count: the timeout runs from unpark
+        assert fired.wait(2)
+        assert time.monotonic() - unparked >= 0.09
+    finally:
+        engine.stop()
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,135 @@
+"""
+Tests for the on-disk cache of monitor-sized overlay images
+Runs with pytest or directly: python test_image_cache.py
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from PIL import Image, ImageChops, ImageStat
+
+from image_cache import (
+    REDUCING_GAP, ScaledImageCache, decode_image, load_thumbnail, open_image, scale_image,
+)
+
+
+class TempDir:
+    def __enter__(self):
+        self.path = tempfile.mkdtemp(prefix="dcplus-cache-")
+        return self.path
+
+    def __exit__(self, *exc):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def make_image(directory, name, size=(64, 48), color="red", mode="RGB"):
+    path = os.path.join(directory, name)
+    Image.new(mode, size, color).save(path)
+    return path
+
+
+def test_hit_miss_and_invalidation():
+    with TempDir() as tmp:
+        source = make_image(tmp, "a.png")
+        cache = ScaledImageCache(os.path.join(tmp, "cache"))
+        first = cache.load(source, 32, 24)
+        assert first.size == (32, 24) and first.mode == "RGB"
+        assert (cache.hits, cache.misses) == (0, 1)
+        hit = cache.load(source, 32, 24)
+        assert hit.size == (32, 24) and hit.getpixel((0, 0))[:3] == (255, 0, 0)
+        assert (cache.hits, cache.misses) == (1, 1)
+        del hit  # Windows cannot replace or truncate a mapped entry
+        # Another monitor size or fit mode is another entry
+        cache.load(source, 16, 16)
+        cache.load(source, 32, 24, "fit")
+        assert cache.misses == 3 and len(cache.entries()) == 3
+        # Editing the source misses even at the same size
+        make_image(tmp, "a.png", color="blue")
+        st = os.stat(source)
+        os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert cache.load(source, 32, 24).getpixel((0, 0))[:3] == (0, 0, 255)
+        assert cache.misses == 4
+        assert cache.ensure(source, 32, 24) is False
+        # A damaged entry is rendered again
+        with open(cache.entry_path(source, 32, 24), "r+b") as f:
+            f.truncate(100)
+        assert cache.load(source, 32, 24).size == (32, 24) and cache.misses == 5
+
+
+def test_fit_modes_keep_exact_size():
+    img = Image.new("RGB", (200, 100), "white")
+    for fit in ("stretch", "fit", "fill"):
+        assert scale_image(img, 100, 100, fit).size == (100, 100)
+    # Letterboxing leaves black bars, filling crops to the image
+    fitted = scale_image(img, 100, 100, "fit")
+    assert fitted.getpixel((50, 5)) == (0, 0, 0) and fitted.getpixel((50, 50)) == (255, 255, 255)
+    assert scale_image(img, 100, 100, "fill").getpixel((50, 5)) == (255, 255, 255)
+    # Transparency is composited onto black
+    clear = Image.new("RGBA", (10, 10), (255, 255, 255, 0))
+    assert scale_image(clear, 10, 10).getpixel((0, 0)) == (0, 0, 0)
+
+
+def test_decode_reduces_before_resampling():
+    with TempDir() as tmp:
+        source = os.path.join(tmp, "camera.jpg")
+        gradient = Image.linear_gradient("L").resize((4000, 3000))
+        Image.merge("RGB", (gradient, gradient.transpose(Image.Transpose.ROTATE_180), gradient)).save(source)
+        # (output size, fit, size the source is resampled to)
+        for width, height, fit, target in ((320, 180, "stretch", (320, 180)),
+                                           (200, 200, "fit", (200, 150)), (200, 200, "fill", (267, 200))):
+            decoded = decode_image(source, width, height, fit)
+            # Enough resolution for the final resample, but far less than the source
+            assert decoded.width >= target[0] and decoded.height >= target[1]
+            assert decoded.width <= 2 * REDUCING_GAP * target[0] or decoded.width <= 4000 // 8
+            assert decoded.width * decoded.height <= (4000 * 3000) // 16
+            scaled = scale_image(decoded, width, height, fit)
+            assert scaled.size == (width, height)
+            full = scale_image(open_image(source), width, height, fit)
+            diff = ImageStat.Stat(ImageChops.difference(scaled, full)).mean
+            assert max(diff) < 2, diff
+        thumb = load_thumbnail(source, 64)
+        assert thumb.size == (64, 48)
+        # Palette images are converted before averaging, not reduced as indices
+        palette = os.path.join(tmp, "palette.png")
+        Image.new("RGB", (1000, 1000), (0, 128, 255)).convert("P").save(palette)
+        assert decode_image(palette, 100, 100).getpixel((0, 0))[:3] == (0, 128, 255)
+
+
+def test_evicts_least_recently_used():
+    with TempDir() as tmp:
+        sources = [make_image(tmp, f"{i}.bmp", size=(40, 40)) for i in range(3)]
+        cache = ScaledImageCache(os.path.join(tmp, "cache"))
+        cache.load(sources[0], 40, 40)
+        cache.load(sources[1], 40, 40)
+        entry_size = cache.entries()[0][1]
+        cache.max_bytes = entry_size * 2 + entry_size // 2
+        # The first entry was used more recently than the second
+        now = time.time()
+        os.utime(cache.entry_path(sources[1], 40, 40), (now - 200, now - 200))
+        cache.load(sources[0], 40, 40)
+        cache.load(sources[2], 40, 40)
+        assert cache.lookup(sources[0], 40, 40) is not None
+        assert cache.lookup(sources[1], 40, 40) is None
+        assert cache.lookup(sources[2], 40, 40) is not None
+        assert cache.evict() <= cache.max_bytes
+
+
+def test_warm_renders_in_background():
+    with TempDir() as tmp:
+        sources = [make_image(tmp, f"{i}.png") for i in range(3)]
+        cache = ScaledImageCache(os.path.join(tmp, "cache"))
+        jobs = [(path, 32, 24, "stretch") for path in sources]
+        jobs.append((os.path.join(tmp, "missing.png"), 32, 24, "stretch"))
+        cache.warm(jobs).join(5)
+        assert cache.misses == 3
+        assert all(cache.lookup(path, 32, 24) for path in sources)
+        cache.load(sources[0], 32, 24)
+        assert cache.hits == 1
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
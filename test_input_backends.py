@@ -0,0 +1,171 @@
+"""
+Tests for input backend selection and the detector running on the synthetic backend
+Runs with pytest or directly: python test_input_backends.py
+"""
+import threading
+import time
+
+import input_backends
+from input_backends import (
+    CONTROLLER, HID, KEYBOARD, MOUSE, POINTER_POSITION,
+    BackendCost, InputBackend, select_backends,
+)
+from monitor_activity import MonitorActivityDetector
+
+MONITORS = [
+    {'geometry': (0, 0, 1920, 1080)},
+    {'geometry': (1920, 0, 3840, 1080)},
+]
+
+
+class FakeHooks(InputBackend):
+    name = "fake-hooks"
+    provides = frozenset({KEYBOARD, MOUSE, POINTER_POSITION})
+    cost = BackendCost("event", 0, 2, True)
+
+
+class FakeTick(InputBackend):
+    name = "fake-tick"
+    provides = frozenset({KEYBOARD, MOUSE})
+    cost = BackendCost("pull", 0, 0, False)
+
+
+class FakePad(InputBackend):
+    name = "fake-pad"
+    provides = frozenset({CONTROLLER})
+    cost = BackendCost("poll", 10, 1, False)
+
+
+class FakeHid(InputBackend):
+    name = "fake-hid"
+    provides = frozenset({HID, CONTROLLER})
+    cost = BackendCost("poll", 20, 1, False)
+
+
+CANDIDATES = [FakeHooks, FakeTick, FakePad, FakeHid]
+
+
+def test_system_scope_prefers_hook_free_tick():
+    chosen = select_backends("system", controller=False, candidates=CANDIDATES)
+    assert chosen == [FakeTick]
+
+
+def test_per_monitor_scope_needs_pointer_position():
+    chosen = select_backends("per-monitor", controller=False, candidates=CANDIDATES)
+    assert chosen == [FakeHooks]
+
+
+def test_controllers_add_cheapest_covering_backend():
+    assert set(select_backends("system", controller=True, candidates=CANDIDATES)) == {FakeTick, FakePad}
+    # Raw input covers both controller classes, so the XInput poller is not needed
+    assert set(select_backends("system", controller=True, rawinput=True, candidates=CANDIDATES)) == {FakeTick, FakeHid}
+
+
+def test_pinned_backend_is_always_included():
+    input_backends.register_backend(FakeHooks)
+    try:
+        chosen = select_backends("system", controller=False, prefer="fake-hooks", candidates=CANDIDATES)
+        assert chosen == [FakeHooks]
+    finally:
+        input_backends._BACKENDS.pop("fake-hooks", None)
+
+
+def test_uncoverable_capabilities_degrade_gracefully():
+    assert select_backends("per-monitor", controller=True, candidates=[FakeTick]) == [FakeTick]
+
+
+def test_detector_runs_on_synthetic_backend():
+    detector = MonitorActivityDetector([dict(m) for m in MONITORS], scope="per-monitor", backend="synthetic")
+    detector.start()
+    try:
+        synthetic = detector.get_backend("synthetic")
+        assert synthetic is not None and synthetic.running
+        assert detector.get_backend_costs() == {"synthetic": BackendCost("event", 0, 0, False)._asdict()}
+        time.sleep(0.2)
+        synthetic.emit(2000, 10)
+        idle = detector.get_idle_times()
+        assert idle["system"] < 0.05
+        assert idle[str((1920, 0, 3840, 1080))] < 0.05
+        assert idle[str((0, 0, 1920, 1080))] >= 0.2
+    finally:
+        detector.stop()
+    assert not synthetic.running
+
+
+
+def test_parked_detector_stops_backends_and_reseeds_idle():
+    detector = MonitorActivityDetector([dict(m) for m in MONITORS], controller=False, backend="synthetic")
+    fired = threading.Event()
+    detector.start()
+    try:
+        synthetic = detector.get_backend("synthetic")
+        detector.add_idle_callback(0.15, lambda timer, idle: fired.set())
+        detector.park()
+        assert not synthetic.running and detector.get_backend("synthetic") is None
+        time.sleep(0.25)
+        assert not fired.is_set()
+        detector.unpark()
+        restarted = detector.get_backend("synthetic")
+        assert restarted is not synthetic and restarted.running
+        # Locked time is not idle time: every key starts from the unpark
+        assert max(detector.get_idle_times().values()) < 0.05
+        assert not fired.wait(0.1)
+        assert fired.wait(2)
+    finally:
+        detector.stop()
+
+def test_detector_idle_callback_with_pull_only_source():
+    detector = MonitorActivityDetector([dict(m) for m in MONITORS], controller=False, backend="synthetic")
+    detector.start()
+    try:
+        synthetic = detector.get_backend("synthetic")
+        # Treat the synthetic backend as a pull-only tick, like GetLastInputInfo
+        detector._pull_backends.append(synthetic)
+        fired = threading.Event()
+        resumed = threading.Event()
+        detector.add_idle_callback(0.2, lambda t, idle: fired.set(), lambda t, idle: resumed.set())
+        time.sleep(0.1)
+        synthetic.set_idle(0.0)
+        assert not fired.wait(0.15)
+        assert fired.wait(1)
+        synthetic.emit()
+        assert resumed.wait(1)
+    finally:
+        detector.stop()
+
+
+@input_backends.register_backend
+class SyntheticTick(input_backends.SyntheticBackend):
+    """Synthetic backend that can only be read, like GetLastInputInfo."""
+    name = "synthetic-tick"
+    provides = frozenset({KEYBOARD, MOUSE})
+    cost = BackendCost("pull", 0, 0, False)
+
+
+def test_pull_only_resume_is_reported_within_50ms():
+    detector = MonitorActivityDetector([dict(m) for m in MONITORS], controller=False, backend="synthetic-tick")
+    detector.start()
+    try:
+        tick = detector.get_backend("synthetic-tick")
+        assert tick is not None and not detector.uses_hooks()
+        fired = threading.Event()
+        resumed = threading.Event()
+        latency = []
+        detector.add_idle_callback(
+            0.1, lambda t, idle: fired.set(),
+            lambda t, idle: (latency.append(time.monotonic() - input_at), resumed.set()))
+        assert fired.wait(1)
+        time.sleep(0.1)
+        input_at = time.monotonic()
+        tick.set_idle(0.0)
+        assert resumed.wait(1)
+        assert latency[0] < 0.05
+    finally:
+        detector.stop()
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
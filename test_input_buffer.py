@@ -0,0 +1,86 @@
+"""
+Tests for the coalescing hook-event ring buffer (input_buffer.py)
+Runs with pytest or directly: python test_input_buffer.py
+"""
+import threading
+import time
+
+from input_buffer import CoalescingInputBuffer
+
+
+def test_drain_returns_events_in_order():
+    buf = CoalescingInputBuffer(lambda events: None, capacity=8)
+    for i in range(5):
+        buf.push(i, i * 2, when=float(i))
+    assert buf.drain() == [(float(i), i, i * 2) for i in range(5)]
+    assert buf.drain() == []
+    buf.push(when=9.0)
+    assert buf.drain() == [(9.0, None, None)]
+
+
+def test_overrun_keeps_latest_events():
+    buf = CoalescingInputBuffer(lambda events: None, capacity=4)
+    for i in range(10):
+        buf.push(i, 0, when=float(i))
+    events = buf.drain()
+    assert events[-1] == (9.0, 9, 0)
+    assert len(events) <= buf.capacity
+    assert buf.dropped >= 6
+
+
+def test_consumer_batches_at_bounded_rate():
+    batches = []
+    buf = CoalescingInputBuffer(batches.append, capacity=1024, min_interval=0.05)
+    buf.start()
+    try:
+        # ~2000 events over 0.2 s must arrive in a handful of batches
+        end = time.monotonic() + 0.2
+        count = 0
+        while time.monotonic() < end:
+            buf.push(count, 0)
+            count += 1
+            time.sleep(0.0001)
+        time.sleep(0.1)
+        buf.flush()
+        assert sum(len(b) for b in batches) + buf.dropped == count
+        assert len(batches) <= 8, f"{len(batches)} batches for {count} events"
+    finally:
+        buf.stop()
+
+
+def test_first_event_after_quiet_period_is_delivered_immediately():
+    delivered = threading.Event()
+    buf = CoalescingInputBuffer(lambda events: delivered.set(), min_interval=0.5)
+    buf.start()
+    try:
+        t0 = time.monotonic()
+        buf.push(1, 1)
+        assert delivered.wait(1)
+        assert time.monotonic() - t0 < 0.05
+    finally:
+        buf.stop()
+
+
+def test_concurrent_producers_lose_nothing_within_capacity():
+    buf = CoalescingInputBuffer(lambda events: None, capacity=4096)
+
+    def produce(tag):
+        for i in range(500):
+            buf.push(tag, i)
+
+    threads = [threading.Thread(target=produce, args=(t,)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    events = buf.drain()
+    assert len(events) == 2000
+    for tag in range(4):
+        assert [y for _, x, y in events if x == tag] == list(range(500))
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
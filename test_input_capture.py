@@ -0,0 +1,131 @@
+"""
+Tests for the seqlock shared block and the input capture process
+Runs with pytest or directly: python test_input_capture.py
+"""
+import threading
+import time
+
+from input_capture import (
+    DEVICE_CLASSES, LAYOUT, InputCaptureProcess, pack_snapshot, unpack_snapshot,
+)
+from monitor_activity import MonitorActivityDetector
+from monitor_index import monitor_key
+from shared_block import SeqlockBlock
+
+MONITORS = [
+    {'geometry': (0, 0, 1920, 1080)},
+    {'geometry': (1920, 0, 3840, 1080)},
+]
+
+
+def test_seqlock_reader_never_sees_torn_records():
+    writer = SeqlockBlock("<QQQQ", create=True)
+    reader = SeqlockBlock("<QQQQ", name=writer.name)
+    stop = threading.Event()
+
+    def write():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            writer.write(i, i, i, i)
+
+    t = threading.Thread(target=write)
+    t.start()
+    try:
+        reads = 0
+        deadline = time.monotonic() + 0.3
+        while time.monotonic() < deadline:
+            record = reader.read()
+            if record is not None:
+                assert len(set(record)) == 1
+                reads += 1
+        assert reads > 0
+    finally:
+        stop.set()
+        t.join()
+        reader.close()
+        writer.close()
+        writer.unlink()
+
+
+def test_snapshot_layout_round_trip():
+    geometries = [m['geometry'] for m in MONITORS]
+    snapshot = {"system": 10.0, "mouse": 9.0, "controller": 4.0, monitor_key(geometries[1]): 9.0}
+    record = pack_snapshot(snapshot, geometries, pid=42, heartbeat=11.0)
+    block = SeqlockBlock(LAYOUT, create=True)
+    try:
+        block.write(*record)
+        pid, heartbeat, times, hooks = unpack_snapshot(block.read())
+    finally:
+        block.close()
+        block.unlink()
+    assert (pid, heartbeat, hooks) == (42, 11.0, None)
+    # Zero timestamps (keyboard, hid, the first monitor) mean "never" and are dropped
+    assert times == snapshot
+
+
+def test_detector_publishes_per_class_and_per_monitor():
+    block = SeqlockBlock(LAYOUT, create=True)
+    detector = MonitorActivityDetector([dict(m) for m in MONITORS], scope="per-monitor", backend="synthetic")
+    detector.on_activity = lambda: block.write(*pack_snapshot(detector._last_input_snapshot(), detector._index.geometries))
+    detector.start()
+    try:
+        synthetic = detector.get_backend("synthetic")
+        time.sleep(0.05)
+        synthetic.emit(2500, 10, "mouse")
+        synthetic.emit(kind="controller")
+        detector._input_buffer.flush()
+        times = unpack_snapshot(block.read()).times
+        right, left = monitor_key(MONITORS[1]['geometry']), monitor_key(MONITORS[0]['geometry'])
+        assert set(times) >= {"system", "mouse", "controller", right, left}
+        assert "keyboard" not in times
+        assert times["mouse"] <= times["controller"]
+        assert times[right] - times[left] >= 0.0
+    finally:
+        detector.stop()
+        block.close()
+        block.unlink()
+
+
+def test_capture_child_heartbeat_and_monitor_updates():
+    capture = InputCaptureProcess([dict(m) for m in MONITORS], {"backend": "synthetic", "controller": False})
+    capture.start()
+    try:
+        deadline = time.monotonic() + 20
+        while not capture.alive() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        pid, heartbeat, times, hooks = capture.read()
+        assert pid == capture._process.pid
+        assert monitor_key(MONITORS[1]['geometry']) in times
+        assert capture.last_input("system") is not None
+
+        capture.set_monitors([{'geometry': (0, 0, 2560, 1440)}])
+        deadline = time.monotonic() + 5
+        while monitor_key((0, 0, 2560, 1440)) not in capture.read().times and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert monitor_key((0, 0, 2560, 1440)) in capture.read().times
+        assert all(c not in capture.read().times for c in DEVICE_CLASSES)
+    finally:
+        process = capture._process
+        capture.stop()
+    assert not process.is_alive()
+
+
+def test_detector_moves_push_backends_into_capture_process():
+    detector = MonitorActivityDetector([dict(m) for m in MONITORS], backend="synthetic", capture_process=True)
+    detector.start()
+    try:
+        process = detector.get_backend("process")
+        assert process is not None and detector.get_backend("synthetic") is None
+        assert process.options["capture_backends"] == "synthetic"
+        assert not detector.uses_hooks()
+        assert set(detector.get_idle_times()) == {"system"} | {monitor_key(m['geometry']) for m in MONITORS}
+    finally:
+        detector.stop()
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,72 @@
+"""
+Tests for the per-monitor spatial index (monitor_index.py)
+Runs with pytest or directly: python test_monitor_index.py
+"""
+import random
+
+from monitor_index import MonitorIndex, monitor_key
+
+
+def _linear_slot(monitors, x, y):
+    for slot, m in enumerate(monitors):
+        left, top, right, bottom = m['geometry']
+        if left <= x < right and top <= y < bottom:
+            return slot
+    return -1
+
+
+def test_side_by_side_monitors():
+    monitors = [
+        {'geometry': (0, 0, 1920, 1080)},
+        {'geometry': (1920, 0, 3840, 1080)},
+    ]
+    index = MonitorIndex(monitors)
+    assert index.slot_at(0, 0) == 0
+    assert index.slot_at(1919, 1079) == 0
+    assert index.slot_at(1920, 0) == 1
+    assert index.slot_at(3839, 500) == 1
+    assert index.slot_at(3840, 500) == -1
+    assert index.slot_at(100, 1080) == -1
+    assert index.keys == [monitor_key((0, 0, 1920, 1080)), monitor_key((1920, 0, 3840, 1080))]
+
+
+def test_gaps_and_negative_coordinates():
+    monitors = [
+        {'geometry': (-2560, -360, 0, 1080)},
+        {'geometry': (0, 0, 1920, 1080)},
+        {'geometry': (0, -1440, 2560, 0)},
+    ]
+    index = MonitorIndex(monitors)
+    assert index.slot_at(-1, -360) == 0
+    assert index.slot_at(-2560, 1079) == 0
+    assert index.slot_at(500, -1) == 2
+    assert index.slot_at(2000, 500) == -1  # gap right of the primary
+    assert index.slot_at(-100, -1000) == -1  # above the left monitor
+
+
+def test_matches_linear_scan_on_video_wall():
+    monitors = []
+    for row in range(4):
+        for col in range(6):
+            monitors.append({'geometry': (col * 1920, row * 1080, (col + 1) * 1920, (row + 1) * 1080)})
+    index = MonitorIndex(monitors)
+    rng = random.Random(1)
+    for _ in range(5000):
+        x = rng.randrange(-100, 6 * 1920 + 100)
+        y = rng.randrange(-100, 4 * 1080 + 100)
+        assert index.slot_at(x, y) == _linear_slot(monitors, x, y)
+
+
+def test_same_topology():
+    monitors = [{'geometry': (0, 0, 1920, 1080)}]
+    index = MonitorIndex(monitors)
+    assert index.same_topology([{'geometry': [0, 0, 1920, 1080]}])
+    assert not index.same_topology([{'geometry': (0, 0, 2560, 1440)}])
+    assert MonitorIndex([]).slot_at(0, 0) == -1
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
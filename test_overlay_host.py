@@ -0,0 +1,315 @@
+"""
+Tests for the persistent overlay host (protocol, renderer, shared image cache)
+Uses window-less stand-ins for Tk so it runs without a display.
+Runs with pytest or directly: python test_overlay_host.py
+"""
+import os
+import threading
+import time
+
+from overlay_host import ImageCache, OverlayHost, OverlayRenderer
+
+LEFT = (0, 0, 1920, 1080)
+RIGHT = (1920, 0, 3840, 1080)
+
+
+def displays(geometries, mode, file_paths=(), interval=30):
+    return [(g, mode, list(file_paths), interval) for g in geometries]
+
+
+def fake_host(conn):
+    """Stand-in for host_main: acknowledges commands without Tk."""
+    pid = os.getpid()
+    conn.send(("ready", pid))
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return
+        if msg[0] == "quit":
+            return
+        if msg[0] == "configure" and msg[1][0][1] == "broken":
+            conn.send(("error", pid, "cannot configure"))
+            continue
+        conn.send((msg[0], pid))
+
+
+def silent_host(conn):
+    """A host that never answers, like a hung Tk loop."""
+    while True:
+        try:
+            conn.recv()
+        except (EOFError, OSError):
+            return
+
+
+class FakeWindow:
+    def __init__(self, geometry):
+        left, top, right, bottom = geometry
+        self.width, self.height = right - left, bottom - top
+        self.image_key = None
+        self.photo = None
+        self.visible = False
+        self.destroyed = False
+
+    def set_image(self, cache, path):
+        self.photo = cache.get(path, self.width, self.height)
+        self.image_key = (path, self.width, self.height)
+
+    def set_photo(self, photo):
+        self.photo = photo
+
+    def clear(self):
+        self.photo = self.image_key = None
+
+    def show(self):
+        self.visible = True
+
+    def hide(self):
+        self.visible = False
+
+    def destroy(self):
+        self.destroyed = True
+
+
+class FakeRoot:
+    def __init__(self):
+        self.pending = {}
+
+    def after(self, ms, fn, *args):
+        self.handles = getattr(self, "handles", 0) + 1
+        self.pending[self.handles] = lambda: fn(*args)
+        self.delay = ms
+        return self.handles
+
+    def after_cancel(self, handle):
+        self.pending.pop(handle, None)
+
+    def fire(self):
+        handle, fn = self.pending.popitem()
+        fn()
+
+
+def fake_cache():
+    return ImageCache(open_image=lambda path: path, make_photo=lambda src, w, h: (src, w, h))
+
+
+def test_image_cache_shares_sizes_and_decodes_once():
+    cache = fake_cache()
+    a = cache.get("a.png", 1920, 1080)
+    assert cache.get("a.png", 1920, 1080) is a
+    cache.get("a.png", 2560, 1440)
+    assert cache.decodes == 1 and len(cache) == 2
+    cache.release_sources()
+    cache.retain([("a.png", 2560, 1440)])
+    assert len(cache) == 1
+    cache.get("a.png", 1920, 1080)
+    assert cache.decodes == 2
+
+
+def test_renderer_one_image_per_size_and_window_changes():
+    windows = {}
+
+    def make_window(geometry):
+        windows[geometry] = FakeWindow(geometry)
+        return windows[geometry]
+
+    renderer = OverlayRenderer(FakeRoot(), fake_cache(), make_window)
+    third = (3840, 0, 6400, 1440)
+    renderer.configure(displays([LEFT, RIGHT, third], "single", ["a.png"]))
+    assert windows[LEFT].photo is windows[RIGHT].photo
+    assert len(renderer.cache) == 2 and renderer.cache.decodes == 1
+    renderer.configure(displays([LEFT], "blank"))
+    assert windows[RIGHT].destroyed and windows[third].destroyed
+    assert windows[LEFT].photo is None and len(renderer.cache) == 0
+
+
+def test_renderer_slideshow_advances_together_and_rewinds():
+    root = FakeRoot()
+    renderer = OverlayRenderer(root, fake_cache(), FakeWindow)
+    renderer.configure(displays([LEFT, RIGHT], "slideshow", ["a.png", "b.png", "c.png"], 5))
+    renderer.show([LEFT])
+    root.fire()
+    left, right = renderer.windows[LEFT], renderer.windows[RIGHT]
+    assert left.image_key[0] == "b.png" and not right.visible
+    # A display shown later joins the running slideshow
+    renderer.show([RIGHT])
+    assert right.image_key[0] == "b.png" and len(root.pending) == 1
+    # Only the images on screen stay decoded
+    assert len(renderer.cache) == 1
+    renderer.hide([LEFT])
+    assert root.pending and right.visible
+    renderer.hide()
+    assert not root.pending
+    assert {w.image_key[0] for w in renderer.windows.values()} == {"a.png"}
+
+
+def test_renderer_slideshow_steps_use_prefetched_frames():
+    root = FakeRoot()
+    opened = []
+    gate = threading.Event()
+    gate.set()
+
+    def open_image(path):
+        if path == "c.png":
+            gate.wait(2)
+        opened.append((path, threading.current_thread().name))
+        return path
+
+    cache = ImageCache(open_image=open_image, make_photo=lambda src, w, h: (src, w, h))
+    renderer = OverlayRenderer(root, cache, FakeWindow)
+    renderer.configure(displays([LEFT, RIGHT], "slideshow", ["a.png", "b.png", "c.png"], 5))
+    gate.clear()
+    renderer.show()
+    content = renderer._contents[0]
+    first_due = content.due
+    deadline = time.monotonic() + 2
+    while content.prefetch.loads < 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    root.fire()
+    assert {w.image_key[0] for w in renderer.windows.values()} == {"b.png"}
+    # b.png was decoded off the Tk thread; only the first image was decoded in place
+    assert ("b.png", "SlideshowPrefetch") in opened and cache.decodes == 1
+    # Steps follow fixed deadlines (this one fired early, so the wait is longer)
+    assert content.due == first_due + 5 and root.delay > 5000
+    # c.png is still loading: the step keeps b.png and looks again shortly
+    root.fire()
+    assert renderer.windows[LEFT].image_key[0] == "b.png" and root.delay == 50
+    gate.set()
+    deadline = time.monotonic() + 2
+    while content.prefetch.loads < 2 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    root.fire()
+    assert renderer.windows[LEFT].image_key[0] == "c.png"
+    renderer.hide()
+    assert content.prefetch is None and not root.pending
+
+
+class FakePlayer:
+    def __init__(self, key):
+        self.key = key
+        self.playing = self.closed = False
+        self.plays = 0
+
+    def play(self):
+        self.playing = True
+        self.plays += 1
+
+    def pause(self):
+        self.playing = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_renderer_animations_play_on_show_and_rewind():
+    players = []
+
+    def make_player(key):
+        players.append(FakePlayer(key))
+        return players[-1]
+
+    third = (3840, 0, 6400, 1440)
+    renderer = OverlayRenderer(FakeRoot(), fake_cache(), FakeWindow, make_player)
+    renderer.configure(displays([LEFT, RIGHT, third], "gif", ["a.gif"]))
+    # One player per monitor size, created before anything is shown; decoding starts on play
+    assert sorted(p.key for p in players) == [("a.gif", 1920, 1080), ("a.gif", 2560, 1440)]
+    left = renderer.windows[LEFT]
+    assert left.image_key == ("a.gif", 1920, 1080)
+    renderer.show([LEFT, RIGHT])
+    small = next(p for p in players if p.key[1] == 1920)
+    large = next(p for p in players if p.key[1] == 2560)
+    assert small.playing and not large.playing
+    renderer._show_frame(small.key, "frame 3")
+    assert left.photo == renderer.windows[RIGHT].photo == "frame 3"
+    assert renderer.windows[third].photo != "frame 3"
+    renderer.show([third])
+    renderer.hide([third])
+    assert not large.playing and small.playing
+    renderer.hide()
+    # Hidden animations pause and show their first frame again
+    assert not small.playing and left.photo == ("a.gif", 1920, 1080)
+    renderer.show([LEFT])
+    assert small.plays == 2
+    renderer.configure(displays([LEFT], "gif", ["a.gif"]))
+    assert large.closed and not small.closed and len(players) == 2
+    # A new animation budget replaces the players
+    renderer.configure(displays([LEFT], "gif", ["a.gif"]), animation_budget=1024)
+    assert small.closed and len(players) == 3 and renderer.animation_budget == 1024
+    renderer.configure(displays([LEFT], "blank"))
+    assert players[-1].closed
+
+
+def test_renderer_displays_keep_their_own_content():
+    root = FakeRoot()
+    renderer = OverlayRenderer(root, fake_cache(), FakeWindow)
+    renderer.configure([(LEFT, "blank", [], 30), (RIGHT, "single", ["a.png"], 30)])
+    assert renderer.windows[LEFT].photo is None
+    assert renderer.windows[RIGHT].image_key == ("a.png", 1920, 1080)
+    renderer.show([RIGHT])
+    assert renderer.windows[RIGHT].visible and not renderer.windows[LEFT].visible
+    assert not root.pending
+
+
+def test_prepare_show_hide_reuses_the_process():
+    host = OverlayHost(target=fake_host)
+    try:
+        host.prepare(displays([LEFT, RIGHT], "blank"))
+        pid = host.process.pid
+        assert host.geometries == [LEFT, RIGHT]
+        for _ in range(3):
+            assert host.show()
+            assert host.last_show_latency < 1.0
+            assert host.hide()
+            host.prepare(displays([LEFT, RIGHT], "blank"))
+        # Monitor changes are a configure message, not a new process
+        host.prepare(displays([LEFT], "single", ["a.png"]))
+        assert host.geometries == [LEFT] and host.process.pid == pid
+        assert host.show([LEFT]) and host.hide([LEFT])
+        host.prepare([])
+        assert host.process is None
+    finally:
+        host.stop()
+    assert host.geometries == []
+
+
+def test_dead_host_is_respawned_on_prepare():
+    host = OverlayHost(target=fake_host)
+    try:
+        host.prepare(displays([LEFT], "slideshow", ["a.png", "b.png"], 10))
+        assert host.show() and host.hide()
+        old = host.process
+        old.terminate()
+        old.join(2)
+        assert not host.show()
+        host.prepare(displays([LEFT], "slideshow", ["a.png", "b.png"], 10))
+        assert host.process.pid != old.pid
+        assert host.show()
+    finally:
+        host.stop()
+
+
+def test_error_reply_is_skipped_and_hung_host_times_out():
+    host = OverlayHost(target=fake_host)
+    try:
+        host.prepare(displays([LEFT], "broken"))
+        assert host.show()
+    finally:
+        host.stop()
+    host = OverlayHost(target=silent_host)
+    try:
+        host.prepare(displays([LEFT], "blank"))
+        host._ready = True  # skip the start-up allowance
+        start = time.monotonic()
+        assert not host.show()
+        assert time.monotonic() - start < 5
+    finally:
+        host.stop()
+    assert host.geometries == []
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,72 @@
+"""
+Tests for the slideshow prefetcher (ordering, bounded read-ahead, errors)
+Runs with pytest or directly: python test_prefetch.py
+"""
+import threading
+import time
+
+from prefetch import Prefetcher
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_cycles_in_order_from_start():
+    prefetcher = Prefetcher(["a", "b", "c"], str.upper, start=1).start()
+    try:
+        taken = [prefetcher.take(1.0) for _ in range(5)]
+        assert [path for path, _, _ in taken] == ["b", "c", "a", "b", "c"]
+        assert all(frame == path.upper() and error is None for path, frame, error in taken)
+    finally:
+        prefetcher.stop()
+
+
+def test_reads_ahead_only_depth_frames():
+    loaded = []
+    prefetcher = Prefetcher(["a", "b", "c", "d"], lambda p: loaded.append(p) or p, depth=2).start()
+    try:
+        assert wait_for(lambda: len(loaded) == 2)
+        time.sleep(0.05)
+        assert loaded == ["a", "b"]
+        assert prefetcher.take()[0] == "a"
+        assert wait_for(lambda: len(loaded) == 3)
+        time.sleep(0.05)
+        assert loaded == ["a", "b", "c"]
+    finally:
+        prefetcher.stop()
+
+
+def test_errors_and_late_frames():
+    release = threading.Event()
+
+    def load(path):
+        if path == "bad":
+            raise OSError("cannot decode")
+        release.wait(2)
+        return path
+
+    prefetcher = Prefetcher(["bad", "slow"], load).start()
+    try:
+        path, frame, error = prefetcher.take(1.0)
+        assert path == "bad" and frame is None and isinstance(error, OSError)
+        # A frame still loading is not waited for beyond the timeout
+        assert prefetcher.take() is None
+        assert prefetcher.take(0.02) is None
+        release.set()
+        assert prefetcher.take(1.0)[:2] == ("slow", "slow")
+    finally:
+        prefetcher.stop()
+    assert wait_for(lambda: not prefetcher._thread.is_alive())
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,103 @@
+"""
+Tests for weekly protection schedules compiled into transition lists
+Runs with pytest or directly: python test_schedule.py
+"""
+import datetime
+import time
+
+from display_plan import DisplayPlan
+from monitor_index import monitor_key
+from schedule import DAYS, apply_rules, compile_schedule, parse_rules
+from service_state import ARMED, SCHEDULE
+from test_service_state import LEFT, MONITORS, RIGHT, Running, wait_for
+
+MONDAY = datetime.datetime(2026, 10, 19)
+CONFIG = {"schedule": [
+    {"name": "lobby overnight", "days": ["mon", "tue", "wed", "thu", "fri"], "start": "22:00", "end": "06:00",
+     "monitors": [1], "timeout_minutes": 1},
+    {"name": "weekend", "days": ["sat", "sun"], "mode": "slideshow", "timeout_minutes": 2},
+    {"name": "meetings", "days": ["wed"], "start": "10:00", "end": "11:30", "enabled": False},
+    {"name": "broken", "start": "25:00"},
+]}
+
+
+def naive_active(rules, when):
+    """Rule check done the slow way, minute by minute."""
+    day, minute = when.weekday(), when.hour * 60 + when.minute
+    active = []
+    for rule in rules:
+        if rule.end > rule.start:
+            on = day in rule.days and rule.start <= minute < rule.end
+        else:
+            on = (day in rule.days and minute >= rule.start) or ((day - 1) % 7 in rule.days and minute < rule.end)
+        if on:
+            active.append(rule)
+    return tuple(active)
+
+
+def test_week_of_transitions_matches_minute_by_minute_rules():
+    start = time.perf_counter()
+    rules = parse_rules(CONFIG)
+    assert [rule.name for rule in rules] == ["lobby overnight", "weekend", "meetings"]
+    schedule = compile_schedule(CONFIG)
+    # Walk the week from transition to transition
+    seen = []
+    when = MONDAY
+    while when < MONDAY + datetime.timedelta(days=7):
+        seen.append((when.strftime("%a %H:%M"), [rule.name for rule in schedule.active_at(when)]))
+        when = schedule.next_transition(when)
+    assert seen[:5] == [
+        ("Mon 00:00", []), ("Mon 22:00", ["lobby overnight"]), ("Tue 06:00", []),
+        ("Tue 22:00", ["lobby overnight"]), ("Wed 06:00", []),
+    ]
+    assert ("Wed 10:00", ["meetings"]) in seen and ("Sat 00:00", ["lobby overnight", "weekend"]) in seen
+    # The walk visits each transition once (the weekend ends at Monday 00:00)
+    assert [MONDAY + datetime.timedelta(minutes=p) for p in schedule.points] == [
+        MONDAY + datetime.timedelta(days=DAYS.index(label[:3].lower()), hours=int(label[4:6]), minutes=int(label[7:]))
+        for label, _ in seen]
+    # Every minute of the week agrees with the rules evaluated directly
+    for minute in range(7 * 24 * 60):
+        when = MONDAY + datetime.timedelta(minutes=minute, seconds=30)
+        assert schedule.active_at(when) == naive_active(rules, when), when
+    assert time.perf_counter() - start < 1.0
+
+
+def test_rules_change_timeout_mode_and_enabled_monitors():
+    monitors = [{'geometry': tuple(m)} for m in MONITORS]
+    plans = [DisplayPlan(monitor_key(m), tuple(m), 300, "blank", ["a.png"], 30) for m in MONITORS]
+    schedule = compile_schedule(CONFIG)
+    night = apply_rules(plans, schedule.active_at(MONDAY.replace(hour=23)), monitors)
+    assert [(p.key, p.timeout, p.mode) for p in night] == [(LEFT, 300, "blank"), (RIGHT, 60, "blank")]
+    weekend = apply_rules(plans, schedule.active_at(MONDAY + datetime.timedelta(days=5, hours=12)), monitors)
+    assert {(p.timeout, p.mode) for p in weekend} == {(120, "slideshow")}
+    meeting = apply_rules(plans, schedule.active_at(MONDAY + datetime.timedelta(days=2, hours=10)), monitors)
+    assert meeting == []
+
+
+def test_service_sleeps_until_the_next_transition():
+    config = {"enabled": True, "timeout": 5, "mode": "blank", "monitors": MONITORS, **CONFIG}
+    clock = [MONDAY.replace(hour=21, minute=59, second=30)]
+    run = Running(config=config)
+    run.service.now = lambda: clock[0]
+    with run:
+        assert run.armed()
+        assert {t.key: t.timeout for t in run.detector.timers} == {LEFT: 300, RIGHT: 300}
+        # One timer for the next change, nothing in between
+        assert run.service._schedule_timer.interval == 30
+        clock[0] = MONDAY.replace(hour=22)
+        run.service.machine.post(SCHEDULE, "schedule change", run.service.machine.epoch)
+        assert wait_for(lambda: {t.key: t.timeout for t in run.detector.timers} == {LEFT: 300, RIGHT: 60})
+        assert run.service.status()["schedule"] == ["lobby overnight"]
+        assert run.service._schedule_timer.interval == 8 * 3600
+        # Meetings disable protection everywhere
+        clock[0] = MONDAY + datetime.timedelta(days=2, hours=10)
+        run.service.machine.post(SCHEDULE, "schedule change", run.service.machine.epoch)
+        assert wait_for(lambda: run.service.plans == {} and not run.detector.timers)
+        assert run.service.state == ARMED
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,118 @@
+"""
+Tests for the control channel between the GUI and the background service
+Runs with pytest or directly: python test_service_control.py
+"""
+import os
+import time
+
+from service_control import ControlServer, ServiceUnavailable, control_address, send_command
+from service_state import ARMED, COOLDOWN, SESSION_UNLOCKED, SHOWING, SUSPENDED
+from test_service_state import LEFT, MONITORS, RIGHT, FakeStore, Running, wait_for
+
+KEY = b"test-key"
+
+
+def test_round_trip_and_errors():
+    def handler(command, args):
+        if command == "echo":
+            return args
+        raise ValueError(f"Unknown command '{command}'")
+
+    address = control_address(f"-test-{os.getpid()}-server")
+    server = ControlServer(handler, address, KEY)
+    server.start()
+    try:
+        assert send_command("echo", 1, "two", address=address, authkey=KEY) == [1, "two"]
+        try:
+            send_command("nope", address=address, authkey=KEY)
+            assert False, "expected the service's error"
+        except RuntimeError as e:
+            assert str(e) == "Unknown command 'nope'"
+    finally:
+        server.stop()
+    try:
+        send_command("echo", address=address, authkey=KEY)
+        assert False, "expected ServiceUnavailable"
+    except ServiceUnavailable:
+        pass
+
+
+class EditedStore(FakeStore):
+    """A store whose file was edited: the change lands on reload()."""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.pending = None
+
+    def reload(self, force=False):
+        if not self.pending:
+            return False
+        changes, self.pending = self.pending, None
+        self.update(**changes)
+        return True
+
+
+def command(run, name, *args):
+    return send_command(name, *args, address=run.address)
+
+
+def test_reload_config_applies_settings_in_place():
+    run = Running()
+    run.store = run.service.store = EditedStore(run.store.get().thaw())
+    with run:
+        assert run.armed()
+        run.store.pending = {"timeout": 10}
+        start = time.monotonic()
+        assert command(run, "reload-config") == {"changed": True, "generation": 1}
+        assert wait_for(lambda: run.detector.timers and run.detector.timer(LEFT).timeout == 600)
+        assert time.monotonic() - start < 0.5
+        status = command(run, "status")
+        assert status["state"] == ARMED and status["config_generation"] == 1
+        assert set(status["displays"]) == {LEFT, RIGHT} and not status["paused"]
+
+
+def test_trigger_covers_every_display_and_input_dismisses():
+    with Running() as run:
+        assert run.armed()
+        command(run, "trigger")
+        assert run.state_is(SHOWING)
+        assert wait_for(lambda: len(run.host.visible) == 2)
+        assert command(run, "status")["shown"] == [LEFT, RIGHT]
+        # The displays' own timers have not fired; short trigger timers report the input
+        triggered = [t for t in run.detector.timers if t.timeout == run.service.TRIGGER_GRACE]
+        assert sorted(t.key for t in triggered) == sorted([LEFT, RIGHT])
+        for timer in triggered:
+            timer.on_resume(timer, 0.0)
+        assert run.armed() and not run.host.visible
+
+
+def test_dismiss_and_pause():
+    with Running() as run:
+        assert run.armed()
+        run.detector.fire_idle(LEFT)
+        assert run.state_is(SHOWING)
+        command(run, "dismiss")
+        assert wait_for(lambda: not run.host.visible)
+        assert COOLDOWN in [t.new for t in run.service.machine.history]
+        assert run.armed()
+
+        command(run, "pause")
+        assert run.state_is(SUSPENDED)
+        # An unlock does not end a pause requested from the GUI
+        run.service.post(SESSION_UNLOCKED, "workstation unlocked")
+        time.sleep(0.05)
+        assert run.service.state == SUSPENDED and command(run, "status")["paused"]
+        command(run, "resume")
+        assert run.armed()
+
+        command(run, "pause", 0.05)
+        assert run.state_is(SUSPENDED)
+        assert run.armed() and not run.service.paused
+        assert len(run.host.geometries) == len(MONITORS)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
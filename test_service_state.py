@@ -0,0 +1,280 @@
+"""
+Tests for the service state machine and the event-driven overlay service
+Uses fake store, host and detector objects; no windows are created.
+Runs with pytest or directly: python test_service_state.py
+"""
+import itertools
+import os
+import threading
+import time
+
+from config_store import ConfigSnapshot
+from overlay_bg import OverlayService
+from service_control import control_address
+from session_events import SimulatedSessionSource
+from service_state import (
+    ARMED, COOLDOWN, DISABLED, INPUT_RESUMED, PREPARING, SESSION_LOCKED, SESSION_UNLOCKED,
+    SHOWING, SUSPENDED, TIMER, ServiceStateMachine,
+)
+
+MONITORS = [[0, 0, 1920, 1080], [1920, 0, 3840, 1080]]
+LEFT, RIGHT = (str(tuple(m)) for m in MONITORS)
+_addresses = itertools.count()
+
+
+class FakeStore:
+    def __init__(self, config):
+        self.snapshot = ConfigSnapshot(config)
+        self.watching = False
+        self.subscribers = []
+
+    def get(self):
+        return self.snapshot
+
+    def update(self, **changes):
+        old = self.snapshot
+        self.snapshot = ConfigSnapshot(dict(old.thaw(), **changes), old.generation + 1)
+        for callback in list(self.subscribers):
+            callback(old, self.snapshot)
+
+    def reload(self, force=False):
+        return False
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def start(self):
+        self.watching = True
+
+    def stop(self):
+        self.watching = False
+
+
+class FakeHost:
+    def __init__(self):
+        self.displays = []
+        self.visible = set()
+        self.shows = self.hides = 0
+        self.last_show_latency = 0.001
+
+    @property
+    def geometries(self):
+        return [d[0] for d in self.displays]
+
+    def prepare(self, displays, animation_budget=None):
+        self.displays = list(displays)
+        self.animation_budget = animation_budget
+
+    def show(self, geometries=None):
+        self.shows += 1
+        self.visible.update(geometries or self.geometries)
+        return True
+
+    def hide(self, geometries=None):
+        self.hides += 1
+        self.visible.difference_update(geometries or self.geometries)
+        return True
+
+    def stop(self):
+        self.displays = []
+
+
+class FakeTimer:
+    def __init__(self, key, timeout, on_idle, on_resume):
+        self.key, self.timeout, self.on_idle, self.on_resume = key, timeout, on_idle, on_resume
+
+
+class FakeDetector:
+    def __init__(self):
+        self.timers = []
+        self.keys = []
+        self.idle = {}
+        self.parked = False
+
+    def get_idle_times(self):
+        return dict(self.idle)
+
+    def park(self):
+        self.parked = True
+
+    def unpark(self):
+        self.parked = False
+
+    def set_monitors(self, monitors):
+        self.keys = [str(tuple(m['geometry'])) for m in monitors]
+        return False
+
+    def monitor_keys(self):
+        return list(self.keys)
+
+    def add_idle_callback(self, timeout, on_idle, on_resume=None, key="system"):
+        timer = FakeTimer(key, timeout, on_idle, on_resume)
+        self.timers.append(timer)
+        return timer
+
+    def remove_idle_callback(self, timer):
+        self.timers.remove(timer)
+
+    def timer(self, key):
+        return next(t for t in self.timers if t.key == key)
+
+    def fire_idle(self, key=LEFT):
+        timer = self.timer(key)
+        timer.on_idle(timer, timer.timeout)
+        return timer
+
+    def resume(self, key=LEFT):
+        timer = self.timer(key)
+        timer.on_resume(timer, 0.0)
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class Running:
+    def __init__(self, enabled=True, config=None, detector=True):
+        self.store = FakeStore(config or {"enabled": enabled, "timeout": 5, "mode": "blank", "monitors": MONITORS})
+        self.host = FakeHost()
+        self.detector = FakeDetector() if detector else None
+        self.session = None
+        connected = [{'geometry': tuple(m), 'index': i} for i, m in enumerate(MONITORS)]
+        # A control channel and status page of its own, so a running service is not disturbed
+        suffix = f"-test-{os.getpid()}-{next(_addresses)}"
+        self.address = control_address(suffix)
+        self.status_name = f"DisplayControlPlus-status{suffix}"
+        self.service = OverlayService(self.store, self.host, lambda: self.detector, lambda: connected,
+                                      control_address=self.address, status_name=self.status_name,
+                                      session_source_factory=self._session_source)
+        self.service.COOLDOWN = 0.05
+        self.thread = threading.Thread(target=self.service.run)
+
+    def _session_source(self, on_event):
+        self.session = SimulatedSessionSource(on_event)
+        return self.session
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.service.stop()
+        self.thread.join(2)
+        assert not self.thread.is_alive()
+
+    def state_is(self, state):
+        return wait_for(lambda: self.service.state == state)
+
+    def armed(self, displays=2):
+        """ARMED with the display timers registered (the entry action has run)."""
+        return wait_for(lambda: self.service.state == ARMED and len(self.detector.timers) == displays)
+
+
+def test_machine_logs_transitions_and_delivers_deadlines():
+    entered = []
+    machine = ServiceStateMachine({
+        (DISABLED, "go"): ARMED,
+        (ARMED, TIMER): lambda event: COOLDOWN,
+    }, on_enter={ARMED: lambda cause: machine.set_deadline(0.02), COOLDOWN: entered.append})
+    thread = threading.Thread(target=machine.run)
+    thread.start()
+    try:
+        machine.post("ignored")
+        machine.post("go", "because")
+        assert wait_for(lambda: machine.state == COOLDOWN)
+    finally:
+        machine.stop()
+        thread.join(2)
+    assert [(t.old, t.new, t.cause) for t in machine.history] == [
+        (DISABLED, ARMED, "because"), (ARMED, COOLDOWN, "deadline passed")]
+    assert entered == ["deadline passed"]
+
+
+def test_enabling_in_config_arms_without_waiting():
+    with Running(enabled=False) as run:
+        time.sleep(0.05)
+        assert run.service.state == DISABLED and not run.service.machine.history
+        start = time.monotonic()
+        run.store.update(enabled=True)
+        assert run.armed()
+        assert time.monotonic() - start < 0.5
+        assert {t.key: t.timeout for t in run.detector.timers} == {LEFT: 300, RIGHT: 300}
+        assert run.host.geometries == [tuple(m) for m in MONITORS]
+        # The host gets the animation budget with the displays
+        assert run.host.animation_budget == 256 * 1024 * 1024
+        run.store.update(animation_budget_mb=32)
+        assert wait_for(lambda: run.host.animation_budget == 32 * 1024 * 1024)
+
+
+def test_displays_show_and_hide_independently():
+    with Running() as run:
+        assert run.armed()
+        run.detector.fire_idle(LEFT)
+        assert run.state_is(SHOWING)
+        assert wait_for(lambda: run.host.visible == {tuple(MONITORS[0])})
+        # The second display's deadline shows it without a state change
+        run.detector.fire_idle(RIGHT)
+        assert wait_for(lambda: len(run.host.visible) == 2)
+        run.detector.resume(LEFT)
+        assert wait_for(lambda: run.host.visible == {tuple(MONITORS[1])})
+        assert run.service.state == SHOWING and run.service.shown == [RIGHT]
+        run.detector.resume(RIGHT)
+        assert run.armed()
+        assert run.service.hide_latency.count == 2 and not run.host.visible
+        events = [(t.new, t.event) for t in run.service.machine.history]
+        assert events[-4:] == [(PREPARING, "idle-deadline"), (SHOWING, "shown"),
+                               (COOLDOWN, INPUT_RESUMED), (ARMED, TIMER)]
+
+
+def test_v2_displays_get_their_own_timeouts_and_modes():
+    config = {"enabled": True, "displays": {
+        "display_1": {"index": 0, "enabled": True, "timeout_minutes": 1, "mode": "blank"},
+        "display_2": {"index": 1, "enabled": True, "timeout_minutes": 10, "mode": "blank"},
+        "display_3": {"index": 2, "enabled": True, "timeout_minutes": 2, "mode": "blank"},
+    }}
+    with Running(config=config) as run:
+        assert run.armed()
+        # display_3 is not connected
+        assert {t.key: t.timeout for t in run.detector.timers} == {LEFT: 60, RIGHT: 600}
+        run.detector.fire_idle(RIGHT)
+        assert run.state_is(SHOWING)
+        assert wait_for(lambda: run.host.visible == {tuple(MONITORS[1])})
+
+
+def test_stale_timer_events_are_dropped_after_rearm():
+    with Running() as run:
+        assert run.armed()
+        old = run.detector.timers[0]
+        run.store.update(timeout=10)
+        assert wait_for(lambda: len(run.service.machine.history) == 2) and run.armed()
+        old.on_idle(old, 600.0)
+        assert run.detector.timer(LEFT).timeout == 600
+        time.sleep(0.05)
+        assert run.service.state == ARMED and run.host.shows == 0
+
+
+def test_session_lock_parks_and_unlock_rearms():
+    with Running() as run:
+        assert run.armed()
+        run.detector.fire_idle()
+        assert run.state_is(SHOWING)
+        run.service.post(SESSION_LOCKED, "workstation locked")
+        assert run.state_is(SUSPENDED)
+        assert wait_for(lambda: not run.host.visible and not run.detector.timers)
+        run.service.post(SESSION_UNLOCKED, "workstation unlocked")
+        assert run.armed()
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,62 @@
+"""
+Tests for the status page published by the background service
+Runs with pytest or directly: python test_service_status.py
+"""
+import time
+
+from service_state import ARMED, SHOWING
+from service_status import (
+    ERROR_NONE, ERROR_PREPARE_FAILED, ServiceStatus, pack_status, read_status, unpack_status,
+)
+from test_service_state import LEFT, MONITORS, FakeHost, Running, wait_for
+
+
+def test_pack_round_trip():
+    displays = [((0, 0, 1920, 1080), 12.5, "blank", True), ((1920, 0, 3840, 1080), 3.0, "slideshow", False)]
+    status = unpack_status(pack_status(7, SHOWING, False, 3, ERROR_NONE, 0.0, displays, pid=42, updated=100.0))
+    assert isinstance(status, ServiceStatus)
+    assert (status.pid, status.heartbeat, status.state, status.mode, status.generation) == (42, 7, SHOWING, "blank", 3)
+    assert [tuple(d) for d in status.displays] == [tuple(d) for d in displays]
+    assert status.alive(now=101.0) and not status.alive(now=200.0)
+    assert unpack_status(None) is None
+
+
+def test_service_publishes_state_idle_and_heartbeat():
+    with Running() as run:
+        assert run.armed()
+        run.detector.idle = {"system": 4.0, LEFT: 2.0}
+        assert wait_for(lambda: getattr(read_status(run.status_name), "state", None) == ARMED)
+        first = read_status(run.status_name)
+        assert first.alive() and first.mode == "" and first.error == ERROR_NONE
+        run.detector.fire_idle(LEFT)
+        assert run.state_is(SHOWING)
+        # Transitions are published without waiting for the heartbeat
+        assert wait_for(lambda: read_status(run.status_name).state == SHOWING, timeout=0.5)
+        status = read_status(run.status_name)
+        assert status.heartbeat > first.heartbeat and status.mode == "blank"
+        assert [(d.geometry, d.idle, d.shown) for d in status.displays] == [
+            (tuple(MONITORS[0]), 2.0, True), (tuple(MONITORS[1]), 4.0, False)]
+    # A stopped service removes its page
+    assert read_status(run.status_name) is None
+
+
+class BrokenHost(FakeHost):
+    def prepare(self, displays, animation_budget=None):
+        raise OSError("no display")
+
+
+def test_last_error_is_published():
+    run = Running()
+    run.service.host = run.host = BrokenHost()
+    with run:
+        assert run.armed()
+        assert wait_for(lambda: getattr(read_status(run.status_name), "error", None) == ERROR_PREPARE_FAILED)
+        assert read_status(run.status_name).error_at <= time.monotonic()
+        assert run.service.status()["last_error"] == "prepare failed"
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,95 @@
+"""
+Tests for parking the service on session lock, sleep and display power-off
+Uses the simulated session source; no Win32 notifications are needed.
+Runs with pytest or directly: python test_session_events.py
+"""
+import time
+
+import overlay_bg
+from service_state import ARMED, PREPARING, SUSPENDED
+from service_status import read_status
+from session_events import (
+    DISPLAY_CHANGE, DISPLAY_OFF, DISPLAY_ON, LOCK, RESUME, SUSPEND, UNLOCK, SimulatedSessionSource,
+)
+from test_service_state import Running, wait_for
+
+
+def test_simulated_source_delivers_events():
+    events = []
+    source = SimulatedSessionSource(lambda kind, cause: events.append((kind, cause)))
+    source.start()
+    source.emit(LOCK)
+    source.emit(UNLOCK, "workstation unlocked")
+    assert events == [(LOCK, LOCK), (UNLOCK, "workstation unlocked")] and source.running
+
+
+def test_lock_parks_everything_until_every_reason_ends():
+    with Running() as run:
+        run.service.heartbeat_interval = 0.01
+        assert run.armed()
+        run.session.emit(LOCK, "workstation locked")
+        assert run.state_is(SUSPENDED)
+        assert wait_for(lambda: run.detector.parked and not run.store.watching and not run.detector.timers)
+        # No heartbeat while parked, yet readers still see a live service
+        assert wait_for(lambda: getattr(read_status(run.status_name), "state", None) == SUSPENDED)
+        beats = read_status(run.status_name).heartbeat
+        time.sleep(0.1)
+        status = read_status(run.status_name)
+        assert status.heartbeat == beats and status.alive(now=status.updated + 3600)
+
+        run.session.emit(DISPLAY_OFF, "displays powered off")
+        run.session.emit(UNLOCK, "workstation unlocked")
+        time.sleep(0.05)
+        assert run.service.state == SUSPENDED and run.detector.parked
+        run.session.emit(DISPLAY_ON, "displays powered on")
+        assert run.armed()
+        assert not run.detector.parked and run.store.watching
+        assert run.service.machine.history[-1].cause == "displays powered on"
+
+
+def test_sleep_and_pause_both_have_to_end():
+    with Running() as run:
+        assert run.armed()
+        run.service.handle_command("pause", [])
+        assert run.state_is(SUSPENDED)
+        run.session.emit(SUSPEND, "system suspending")
+        run.service.handle_command("resume", [])
+        time.sleep(0.05)
+        assert run.service.state == SUSPENDED and not run.service.paused and run.detector.parked
+        run.session.emit(RESUME, "system resumed")
+        assert run.armed() and not run.detector.parked
+
+
+def test_display_change_rearms_the_displays():
+    with Running() as run:
+        assert run.armed()
+        transitions = len(run.service.machine.history)
+        run.session.emit(DISPLAY_CHANGE, "display configuration changed")
+        assert wait_for(lambda: len(run.service.machine.history) > transitions) and run.armed()
+        assert run.service.machine.history[-1].cause == "display configuration changed"
+
+
+def test_unlock_does_not_count_locked_time_as_idle():
+    """Polling without a detector: the system tick says an hour idle after unlocking."""
+    real = overlay_bg.get_idle_duration
+    overlay_bg.get_idle_duration = lambda: 3600.0
+    try:
+        with Running(detector=False) as run:
+            run.service.POLL_ARMED = 0.01
+            assert run.state_is(ARMED)
+            run.session.emit(LOCK, "workstation locked")
+            assert run.state_is(SUSPENDED)
+            run.session.emit(UNLOCK, "workstation unlocked")
+            assert run.state_is(ARMED)
+            time.sleep(0.1)
+            assert run.service.state == ARMED and not run.host.visible
+            assert PREPARING not in [t.new for t in run.service.machine.history]
+    finally:
+        overlay_bg.get_idle_duration = real
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")